@@ -0,0 +1,38 @@
+"""benchmark_sketches
+
+Revision ID: 002_benchmark_sketches
+Revises: 001_initial_clean
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '002_benchmark_sketches'
+down_revision: Union[str, None] = '001_initial_clean'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Sketches de cuantiles para benchmarking percentil."""
+    op.create_table('benchmark_sketches',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('metrica', sa.String(length=50), nullable=False),
+        sa.Column('grupo', sa.String(length=100), nullable=False),
+        sa.Column('sketch', sa.JSON(), nullable=False),
+        sa.Column('total', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('metrica', 'grupo', name='uq_benchmark_sketch_metrica_grupo')
+    )
+    op.create_index(op.f('ix_benchmark_sketches_id'), 'benchmark_sketches', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    """Drop benchmark_sketches."""
+    op.drop_index(op.f('ix_benchmark_sketches_id'), table_name='benchmark_sketches')
+    op.drop_table('benchmark_sketches')
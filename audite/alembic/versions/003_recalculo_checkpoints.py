@@ -0,0 +1,43 @@
+"""recalculo_checkpoints
+
+Revision ID: 003_recalculo_checkpoints
+Revises: 002_benchmark_sketches
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '003_recalculo_checkpoints'
+down_revision: Union[str, None] = '002_benchmark_sketches'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Checkpoints de los trabajos de recálculo masivo."""
+    op.create_table('recalculo_checkpoints',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('trabajo', sa.String(length=100), nullable=False),
+        sa.Column('tabla', sa.String(length=20), nullable=False),
+        sa.Column('desde_id', sa.String(length=50), nullable=True),
+        sa.Column('hasta_id', sa.String(length=50), nullable=True),
+        sa.Column('ultimo_id', sa.String(length=50), nullable=True),
+        sa.Column('procesados', sa.Integer(), nullable=False),
+        sa.Column('estado', sa.String(length=20), nullable=False),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('trabajo', 'tabla', 'desde_id', 'hasta_id', name='uq_recalculo_checkpoint_rango')
+    )
+    op.create_index(op.f('ix_recalculo_checkpoints_id'), 'recalculo_checkpoints', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    """Drop recalculo_checkpoints."""
+    op.drop_index(op.f('ix_recalculo_checkpoints_id'), table_name='recalculo_checkpoints')
+    op.drop_table('recalculo_checkpoints')
@@ -0,0 +1,27 @@
+"""user token_version
+
+Revision ID: 004_user_token_version
+Revises: 003_recalculo_checkpoints
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '004_user_token_version'
+down_revision: Union[str, None] = '003_recalculo_checkpoints'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Versión de token por usuario para revocar JWT sin consultar users por email."""
+    op.add_column('users', sa.Column('token_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    """Drop users.token_version."""
+    op.drop_column('users', 'token_version')
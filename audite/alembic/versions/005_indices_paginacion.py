@@ -0,0 +1,61 @@
+"""indices_paginacion
+
+Revision ID: 005_indices_paginacion
+Revises: 004_user_token_version
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '005_indices_paginacion'
+down_revision: Union[str, None] = '004_user_token_version'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLAS = ('auditorias_basicas', 'auditorias_agro', 'autodiagnostico_respuestas')
+# Catálogos del panel paginados por cursor cuyo created_at no tenía default en la
+# base: una fila con NULL da un cursor (NULL, id) que corta el recorrido
+CATALOGOS = ('sectores_industriales', 'benchmarks', 'tipos_equipos', 'plantillas_recomendaciones')
+
+
+def _concurrente() -> dict:
+    # En PostgreSQL se construyen sin bloquear escrituras (fuera de la transacción)
+    return {'postgresql_concurrently': True} if op.get_bind().dialect.name == 'postgresql' else {}
+
+
+def _ahora() -> str:
+    # En SQLite, con el formato de texto de DateTime (ver app/utils/paginacion.ahora)
+    if op.get_bind().dialect.name == 'sqlite':
+        return "(strftime('%Y-%m-%d %H:%M:%f000', 'now'))"
+    return "CURRENT_TIMESTAMP"
+
+
+def upgrade() -> None:
+    """Índices (created_at, id) para la paginación por cursor de los listados."""
+    for tabla in CATALOGOS:
+        op.execute(f"UPDATE {tabla} SET created_at = {_ahora()} WHERE created_at IS NULL")
+        with op.batch_alter_table(tabla) as batch:
+            batch.alter_column('created_at', existing_type=sa.DateTime(), nullable=False,
+                               server_default=sa.text(_ahora()))
+
+    with op.get_context().autocommit_block():
+        for tabla in TABLAS:
+            op.create_index(
+                f'ix_{tabla}_created_at_id', tabla, ['created_at', 'id'],
+                unique=False, if_not_exists=True, **_concurrente()
+            )
+
+
+def downgrade() -> None:
+    """Drop índices de paginación."""
+    with op.get_context().autocommit_block():
+        for tabla in TABLAS:
+            op.drop_index(f'ix_{tabla}_created_at_id', table_name=tabla, if_exists=True, **_concurrente())
+
+    for tabla in CATALOGOS:
+        with op.batch_alter_table(tabla) as batch:
+            batch.alter_column('created_at', existing_type=sa.DateTime(), nullable=True, server_default=None)
@@ -0,0 +1,54 @@
+"""indices_consultas
+
+Revision ID: 006_indices_consultas
+Revises: 005_indices_paginacion
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '006_indices_consultas'
+down_revision: Union[str, None] = '005_indices_paginacion'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (nombre, tabla, columnas, condición del índice parcial)
+INDICES = (
+    ('ix_respuestas_formulario_session_created', 'respuestas_formulario', ['session_id', 'created_at'], None),
+    ('ix_respuestas_formulario_pregunta_session', 'respuestas_formulario', ['pregunta_id', 'session_id'], None),
+    ('ix_preguntas_formulario_formulario_activa_orden', 'preguntas_formulario', ['formulario_id', 'activa', 'orden'], None),
+    ('ix_preguntas_formulario_pregunta_padre_id', 'preguntas_formulario', ['pregunta_padre_id'], 'pregunta_padre_id IS NOT NULL'),
+    ('ix_autodiagnostico_respuestas_pregunta_opcion', 'autodiagnostico_respuestas', ['pregunta_id', 'opcion_seleccionada'], None),
+)
+
+
+def _concurrente() -> dict:
+    # En PostgreSQL se construyen sin bloquear escrituras (fuera de la transacción)
+    return {'postgresql_concurrently': True} if op.get_bind().dialect.name == 'postgresql' else {}
+
+
+def upgrade() -> None:
+    """Índices compuestos y parciales para las consultas más frecuentes de formularios y respuestas."""
+    with op.get_context().autocommit_block():
+        for nombre, tabla, columnas, condicion in INDICES:
+            parcial = {}
+            if condicion:
+                parcial = {'postgresql_where': sa.text(condicion), 'sqlite_where': sa.text(condicion)}
+            op.create_index(nombre, tabla, columnas, unique=False, if_not_exists=True,
+                            **parcial, **_concurrente())
+        # (session_id, created_at) cubre las búsquedas por session_id
+        op.drop_index('ix_respuestas_formulario_session_id', table_name='respuestas_formulario',
+                      if_exists=True, **_concurrente())
+
+
+def downgrade() -> None:
+    """Drop índices de consultas y restaurar el índice simple de session_id."""
+    with op.get_context().autocommit_block():
+        op.create_index('ix_respuestas_formulario_session_id', 'respuestas_formulario', ['session_id'],
+                        unique=False, if_not_exists=True, **_concurrente())
+        for nombre, tabla, _, _ in reversed(INDICES):
+            op.drop_index(nombre, table_name=tabla, if_exists=True, **_concurrente())
@@ -0,0 +1,107 @@
+"""diagnosticos_feria_jsonb
+
+Revision ID: 007_diagnosticos_feria_jsonb
+Revises: 006_indices_consultas
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '007_diagnosticos_feria_jsonb'
+down_revision: Union[str, None] = '006_indices_consultas'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLA = 'diagnosticos_feria'
+COLUMNAS_JSON = (
+    'contact_info', 'background', 'production', 'equipment', 'renewable', 'volume',
+    'meta_data', 'comparacion_sector', 'recomendaciones',
+)
+
+# (columna generada, tipo, expresión PostgreSQL, expresión SQLite)
+GENERADAS = (
+    ('tipo_producto', sa.String(),
+     "(production ->> 'productType')",
+     "json_extract(production, '$.productType')"),
+    ('email_contacto', sa.String(),
+     "lower((contact_info ->> 'email_contacto'))",
+     "lower(json_extract(contact_info, '$.email_contacto'))"),
+    ('region', sa.String(),
+     "(contact_info ->> 'ubicacion')",
+     "json_extract(contact_info, '$.ubicacion')"),
+    ('consumo_energia', sa.Float(),
+     "CAST((equipment ->> 'energyConsumption') AS FLOAT)",
+     "CAST(json_extract(equipment, '$.energyConsumption') AS FLOAT)"),
+)
+
+
+def _es_postgresql() -> bool:
+    return op.get_bind().dialect.name == 'postgresql'
+
+
+def _concurrente() -> dict:
+    # En PostgreSQL se construyen sin bloquear escrituras (fuera de la transacción)
+    return {'postgresql_concurrently': True} if _es_postgresql() else {}
+
+
+def upgrade() -> None:
+    """
+    JSONB en PostgreSQL para los JSON de diagnosticos_feria y columnas generadas
+    (con índice) para tipo de producto, email, región y consumo de energía.
+
+    En PostgreSQL el cambio de tipo y las columnas STORED reescriben la tabla (dos
+    veces) con un bloqueo exclusivo. En SQLite los JSON quedan como texto y las columnas
+    generadas son VIRTUAL (ALTER TABLE no admite agregar columnas STORED).
+    """
+    postgresql = _es_postgresql()
+    if postgresql:
+        op.execute(
+            f"ALTER TABLE {TABLA} "
+            + ", ".join(f"ALTER COLUMN {c} TYPE jsonb USING {c}::jsonb" for c in COLUMNAS_JSON)
+        )
+
+        # Una sola sentencia: una sola reescritura de la tabla para las cuatro columnas
+        op.execute(
+            f"ALTER TABLE {TABLA} "
+            + ", ".join(
+                f"ADD COLUMN {columna} {tipo.compile(dialect=op.get_context().dialect)} "
+                f"GENERATED ALWAYS AS ({expresion}) STORED"
+                for columna, tipo, expresion, _ in GENERADAS
+            )
+        )
+    else:
+        for columna, tipo, _, expresion in GENERADAS:
+            op.add_column(TABLA, sa.Column(columna, tipo, sa.Computed(sa.text(expresion), persisted=False)))
+
+    with op.get_context().autocommit_block():
+        for columna, _, _, _ in GENERADAS:
+            op.create_index(f'ix_{TABLA}_{columna}', TABLA, [columna], unique=False,
+                            if_not_exists=True, **_concurrente())
+        if postgresql:
+            # Consultas de contención sobre production (production @> '{...}')
+            op.create_index(f'ix_{TABLA}_production', TABLA, ['production'], unique=False,
+                            postgresql_using='gin', postgresql_ops={'production': 'jsonb_path_ops'},
+                            if_not_exists=True, **_concurrente())
+
+
+def downgrade() -> None:
+    """Drop columnas generadas e índices, y volver a JSON en PostgreSQL."""
+    postgresql = _es_postgresql()
+    with op.get_context().autocommit_block():
+        if postgresql:
+            op.drop_index(f'ix_{TABLA}_production', table_name=TABLA, if_exists=True, **_concurrente())
+        for columna, _, _, _ in reversed(GENERADAS):
+            op.drop_index(f'ix_{TABLA}_{columna}', table_name=TABLA, if_exists=True, **_concurrente())
+
+    for columna, _, _, _ in reversed(GENERADAS):
+        op.drop_column(TABLA, columna)
+
+    if postgresql:
+        op.execute(
+            f"ALTER TABLE {TABLA} "
+            + ", ".join(f"ALTER COLUMN {c} TYPE json USING {c}::json" for c in COLUMNAS_JSON)
+        )
@@ -0,0 +1,123 @@
+"""particiones_respuestas
+
+Revision ID: 008_particiones_respuestas
+Revises: 007_diagnosticos_feria_jsonb
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from datetime import date, datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '008_particiones_respuestas'
+down_revision: Union[str, None] = '007_diagnosticos_feria_jsonb'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Meses futuros con partición creada; después los crea app/utils/particiones.py
+MESES_ADELANTE = 3
+
+# tabla: (columna FK, tabla referenciada, secuencia del id, índices (nombre, columnas))
+TABLAS = {
+    'respuestas_formulario': (
+        'pregunta_id', 'preguntas_formulario', 'respuestas_formulario_id_seq', (
+            ('ix_respuestas_formulario_id', 'id'),
+            ('ix_respuestas_formulario_session_created', 'session_id, created_at'),
+            ('ix_respuestas_formulario_pregunta_session', 'pregunta_id, session_id'),
+        ),
+    ),
+    'autodiagnostico_respuestas': (
+        'pregunta_id', 'autodiagnostico_preguntas', None, (
+            ('ix_autodiagnostico_respuestas_id', 'id'),
+            ('ix_autodiagnostico_respuestas_session_id', 'session_id'),
+            ('ix_autodiagnostico_respuestas_created_at_id', 'created_at, id'),
+            ('ix_autodiagnostico_respuestas_pregunta_opcion', 'pregunta_id, opcion_seleccionada'),
+        ),
+    ),
+}
+
+
+def _sumar_meses(mes: date, meses: int) -> date:
+    indice = mes.year * 12 + mes.month - 1 + meses
+    return date(indice // 12, indice % 12 + 1, 1)
+
+
+def _meses(desde: date, hasta: date):
+    mes = date(desde.year, desde.month, 1)
+    while mes <= hasta:
+        yield mes
+        mes = _sumar_meses(mes, 1)
+
+
+def _restricciones_e_indices(tabla: str, clave: str) -> None:
+    columna_fk, referida, _, indices = TABLAS[tabla]
+    op.execute(f"ALTER TABLE {tabla} ADD PRIMARY KEY ({clave})")
+    op.execute(f"ALTER TABLE {tabla} ADD FOREIGN KEY ({columna_fk}) REFERENCES {referida} (id)")
+    for nombre, columnas in indices:
+        op.execute(f"CREATE INDEX {nombre} ON {tabla} ({columnas})")
+
+
+def upgrade() -> None:
+    """
+    Particionado por rango mensual de created_at para las tablas de respuestas
+    (solo PostgreSQL; en SQLite no hace nada).
+
+    Copia cada tabla a una nueva tabla particionada, con una partición por mes
+    desde la respuesta más antigua hasta MESES_ADELANTE meses en el futuro, más una
+    DEFAULT. La clave primaria pasa a ser (id, created_at), porque debe incluir la
+    clave de partición, y created_at pasa a ser NOT NULL. La copia bloquea las
+    tablas: ejecutar en una ventana de mantención.
+    """
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    mes_actual = datetime.now(timezone.utc).date()
+    for tabla, (_, _, secuencia, _) in TABLAS.items():
+        op.execute(f"UPDATE {tabla} SET created_at = now() WHERE created_at IS NULL")
+        op.execute(f"ALTER TABLE {tabla} RENAME TO {tabla}_plana")
+        op.execute(
+            f"CREATE TABLE {tabla} (LIKE {tabla}_plana INCLUDING DEFAULTS) PARTITION BY RANGE (created_at)"
+        )
+        op.execute(f"ALTER TABLE {tabla} ALTER COLUMN created_at SET NOT NULL")
+
+        mas_antigua = op.get_bind().execute(sa.text(f"SELECT min(created_at) FROM {tabla}_plana")).scalar()
+        desde = mas_antigua.astimezone(timezone.utc).date() if mas_antigua else mes_actual
+        for mes in _meses(desde, _sumar_meses(mes_actual, MESES_ADELANTE)):
+            op.execute(
+                f"CREATE TABLE {tabla}_p{mes:%Y%m} PARTITION OF {tabla} "
+                f"FOR VALUES FROM ('{mes.isoformat()} 00:00:00+00') "
+                f"TO ('{_sumar_meses(mes, 1).isoformat()} 00:00:00+00')"
+            )
+        op.execute(f"CREATE TABLE {tabla}_default PARTITION OF {tabla} DEFAULT")
+
+        op.execute(f"INSERT INTO {tabla} SELECT * FROM {tabla}_plana")
+        if secuencia:
+            # La secuencia del id pertenece a la tabla vieja: se borraría con ella
+            op.execute(f"ALTER SEQUENCE {secuencia} OWNED BY {tabla}.id")
+        op.execute(f"DROP TABLE {tabla}_plana")
+
+        # Índices después de la copia (se construyen una vez por partición)
+        _restricciones_e_indices(tabla, 'id, created_at')
+        op.execute(f"ANALYZE {tabla}")
+
+
+def downgrade() -> None:
+    """
+    Volver a tablas sin particionar. Las filas de las particiones que la
+    mantención ya eliminó están en el archivo frío y no se reincorporan.
+    """
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    for tabla, (_, _, secuencia, _) in TABLAS.items():
+        op.execute(f"CREATE TABLE {tabla}_plana (LIKE {tabla} INCLUDING DEFAULTS)")
+        op.execute(f"INSERT INTO {tabla}_plana SELECT * FROM {tabla}")
+        if secuencia:
+            op.execute(f"ALTER SEQUENCE {secuencia} OWNED BY {tabla}_plana.id")
+        op.execute(f"DROP TABLE {tabla} CASCADE")
+        op.execute(f"ALTER TABLE {tabla}_plana RENAME TO {tabla}")
+        op.execute(f"ALTER TABLE {tabla} ALTER COLUMN created_at DROP NOT NULL")
+        _restricciones_e_indices(tabla, 'id')
@@ -0,0 +1,42 @@
+"""archivo_frio
+
+Revision ID: 009_archivo_frio
+Revises: 008_particiones_respuestas
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '009_archivo_frio'
+down_revision: Union[str, None] = '008_particiones_respuestas'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Índice de las sesiones y diagnósticos movidos al archivo frío (Parquet)."""
+    op.create_table('archivo_frio',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('tabla', sa.String(length=50), nullable=False),
+        sa.Column('clave', sa.String(length=100), nullable=False),
+        sa.Column('codigo', sa.String(length=8), nullable=True),
+        sa.Column('archivo', sa.String(length=255), nullable=False),
+        sa.Column('filas', sa.Integer(), nullable=False),
+        sa.Column('archivado_en', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_archivo_frio_id'), 'archivo_frio', ['id'], unique=False)
+    op.create_index(op.f('ix_archivo_frio_codigo'), 'archivo_frio', ['codigo'], unique=False)
+    op.create_index('ix_archivo_frio_tabla_clave', 'archivo_frio', ['tabla', 'clave'], unique=False)
+
+
+def downgrade() -> None:
+    """Drop archivo_frio."""
+    op.drop_index('ix_archivo_frio_tabla_clave', table_name='archivo_frio')
+    op.drop_index(op.f('ix_archivo_frio_codigo'), table_name='archivo_frio')
+    op.drop_index(op.f('ix_archivo_frio_id'), table_name='archivo_frio')
+    op.drop_table('archivo_frio')
@@ -1,5 +1,9 @@
 from sqlalchemy.orm import Session
+from sqlalchemy import insert
+from typing import List, Optional
 from . import models, schemas
+from .utils import archivo_frio
+from .utils.paginacion import paginar
 from datetime import datetime
 
 def get_user(db: Session, user_id: int):
@@ -8,8 +12,9 @@ def get_user(db: Session, user_id: int):
 def get_user_by_email(db: Session, email: str):
     return db.query(models.User).filter(models.User.email == email).first()
 
-def get_users(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.User).offset(skip).limit(limit).all()
+def get_users(db: Session, skip: int = 0, limit: int = 100, cursor: Optional[str] = None):
+    """Usuarios por (created_at, id); `cursor` (ver utils.paginacion) reemplaza a skip"""
+    return paginar(db.query(models.User), models.User, limit, cursor, offset=skip).filas
 
 def create_user(db: Session, user: schemas.UserCreate):
     db_user = models.User(
@@ -82,6 +87,17 @@ def create_recomendacion(db: Session, recomendacion: schemas.RecomendacionBase,
     db.refresh(db_recomendacion)
     return db_recomendacion
 
+def bulk_create_recomendaciones(db: Session, filas: List[dict]):
+    """
+    Inserta varias recomendaciones con un único INSERT masivo (sin commit).
+    
+    Args:
+        db: Sesión de la base de datos
+        filas: Diccionarios con las columnas de Recomendacion, incluida la FK de la auditoría
+    """
+    if filas:
+        db.execute(insert(models.Recomendacion), filas)
+
 def get_recomendaciones_by_auditoria(db: Session, auditoria_id: int, tipo_auditoria: str = 'basica'):
     if tipo_auditoria == 'agro':
         return db.query(models.Recomendacion)\
@@ -391,10 +407,11 @@ def save_respuestas_batch(db: Session, session_id: str, respuestas: list[schemas
     return db_respuestas
 
 def get_respuestas_by_session(db: Session, session_id: str):
-    """Obtener todas las respuestas por sesión"""
-    return db.query(models.RespuestaFormulario)\
+    """Obtener todas las respuestas por sesión (de la base y, si se archivó, del archivo frío)"""
+    respuestas = db.query(models.RespuestaFormulario)\
         .filter(models.RespuestaFormulario.session_id == session_id)\
         .order_by(models.RespuestaFormulario.created_at).all()
+    return archivo_frio.combinar(respuestas, archivo_frio.leer(db, "respuestas_formulario", session_id))
 
 def get_estadisticas_formulario(db: Session, formulario_id: int):
     """Obtener métricas y estadísticas de un formulario"""
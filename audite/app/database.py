@@ -1,11 +1,20 @@
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
 from dotenv import load_dotenv
+import logging
 import os
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+# Loguear cada sentencia SQL (solo para depuración local: es muy costoso)
+SQL_ECHO = os.getenv("SQL_ECHO", "false").lower() == "true"
+DB_CONNECT_TIMEOUT = int(os.getenv("DB_CONNECT_TIMEOUT", "5"))
+# Conexiones que el lifespan abre al arrancar cada worker (acotado por pool_size)
+CONEXIONES_CALENTAMIENTO = int(os.getenv("DB_WARMUP_CONNECTIONS", "10"))
+
 # Obtener la URL de la base de datos desde variables de entorno
 DATABASE_URL = os.getenv("DATABASE_URL")
 
@@ -15,30 +24,39 @@ if not DATABASE_URL:
     if environment == "production":
         raise ValueError("❌ DATABASE_URL es obligatoria en producción")
     elif environment == "development":
-        print("🔧 Entorno de desarrollo detectado")
+        logger.info("🔧 Entorno de desarrollo detectado")
         # Preferir PostgreSQL en desarrollo también
         if os.getenv("USE_POSTGRES_DEV", "true").lower() == "true":
             DATABASE_URL = "postgresql://audite_user:audite_password_2024@db:5432/audite"
-            print("🐘 Usando PostgreSQL para desarrollo (recomendado)")
+            logger.info("🐘 Usando PostgreSQL para desarrollo (recomendado)")
         else:
             DATABASE_URL = "sqlite:///./audite.db"
-            print("⚠️  Usando SQLite para desarrollo (puede causar inconsistencias)")
+            logger.warning("⚠️  Usando SQLite para desarrollo (puede causar inconsistencias)")
     else:
         DATABASE_URL = "sqlite:///./audite.db"
-        print("⚠️  Entorno desconocido, usando SQLite por defecto")
+        logger.warning("⚠️  Entorno desconocido, usando SQLite por defecto")
 else:
     db_type = "PostgreSQL" if DATABASE_URL.startswith("postgresql") else "SQLite" if DATABASE_URL.startswith("sqlite") else "Otra BD"
-    print(f"✅ Usando {db_type}: {DATABASE_URL.split('@')[0] if '@' in DATABASE_URL else 'archivo local'}@***")
+    # Solo el esquema: la URL incluye usuario y contraseña
+    logger.info(f"✅ Usando {db_type}: {DATABASE_URL.split('://')[0]}://***")
 
 # Configuración específica según el tipo de base de datos
-if DATABASE_URL.startswith("sqlite"):
+if DATABASE_URL in ("sqlite://", "sqlite:///:memory:"):
+    # SQLite en memoria (tests): una única conexión compartida entre hilos
+    engine = create_engine(
+        DATABASE_URL,
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    logger.info("🗄️  Configuración SQLite en memoria aplicada")
+elif DATABASE_URL.startswith("sqlite"):
     # Configuración para SQLite
     engine = create_engine(
         DATABASE_URL,
         connect_args={"check_same_thread": False},
-        echo=os.getenv("ENVIRONMENT") == "development"
+        echo=SQL_ECHO
     )
-    print("🗄️  Configuración SQLite aplicada")
+    logger.info("🗄️  Configuración SQLite aplicada")
 elif DATABASE_URL.startswith("postgresql"):
     # Configuración para PostgreSQL
     engine = create_engine(
@@ -47,13 +65,15 @@ elif DATABASE_URL.startswith("postgresql"):
         max_overflow=20,
         pool_pre_ping=True,
         pool_recycle=300,
-        echo=os.getenv("ENVIRONMENT") == "development"
+        # Fallar rápido si la base no responde, en lugar de colgar el arranque
+        connect_args={"connect_timeout": DB_CONNECT_TIMEOUT},
+        echo=SQL_ECHO
     )
-    print("🐘 Configuración PostgreSQL aplicada")
+    logger.info("🐘 Configuración PostgreSQL aplicada")
 else:
     # Configuración genérica
     engine = create_engine(DATABASE_URL)
-    print("⚙️  Configuración genérica aplicada")
+    logger.info("⚙️  Configuración genérica aplicada")
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
@@ -66,22 +86,36 @@ def get_db():
     finally:
         db.close()
 
-# Función para verificar conexión
-def test_connection():
-    """Prueba la conexión a la base de datos"""
+def calentar_pool(conexiones: int = CONEXIONES_CALENTAMIENTO) -> int:
+    """
+    Abre hasta `conexiones` conexiones (sin superar pool_size) y las devuelve al
+    pool, para que las primeras peticiones no paguen el handshake. Devuelve
+    cuántas se abrieron; un error de conexión se loguea y no detiene el arranque.
+    """
+    tamano = getattr(engine.pool, "size", lambda: conexiones)()
+    abiertas = []
     try:
-        with engine.connect() as connection:
-            if DATABASE_URL.startswith("sqlite"):
-                result = connection.execute(text("SELECT 1")).fetchone()
-            else:
-                result = connection.execute(text("SELECT 1 as test")).fetchone()
-            
-            if result:
-                print("✅ Conexión a base de datos exitosa")
-                return True
-            else:
-                print("❌ Error en la conexión a base de datos")
-                return False
+        for _ in range(max(0, min(conexiones, tamano))):
+            abiertas.append(engine.connect())
     except Exception as e:
-        print(f"❌ Error conectando a base de datos: {e}")
-        return False 
\ No newline at end of file
+        logger.warning(f"No se pudo calentar el pool de conexiones: {e}")
+    finally:
+        for conexion in abiertas:
+            conexion.close()
+    logger.info(f"Pool de conexiones calentado: {len(abiertas)} conexiones")
+    return len(abiertas)
+
+def estadisticas_pool() -> dict:
+    """Estado del pool de conexiones de este worker (los pools sin cola no informan todo)"""
+    pool = engine.pool
+    datos = {"clase": type(pool).__name__}
+    for clave, medir in (
+        ("size", "size"),
+        ("checked_in", "checkedin"),
+        ("checked_out", "checkedout"),
+        ("overflow", "overflow"),
+    ):
+        funcion = getattr(pool, medir, None)
+        if funcion is not None:
+            datos[clave] = funcion()
+    return datos
@@ -1,47 +1,143 @@
 """
 Módulo de health check para AuditE API
+
+- /livez: el proceso responde. No hace E/S; sirve para reiniciar workers colgados.
+- /readyz: el worker terminó de calentarse y la última sonda a la base fue
+  exitosa y reciente. La sonda corre en segundo plano cada HEALTH_PROBE_SECONDS,
+  así que los healthchecks de Docker y los monitores externos no consumen
+  conexiones del pool: solo leen el último resultado.
+- /health: compatibilidad con los monitores existentes, servido desde la misma sonda.
 """
 
 from fastapi import APIRouter
 from fastapi.responses import JSONResponse
 from datetime import datetime
+from typing import Any, Dict, Optional
+from sqlalchemy import text
+import asyncio
 import logging
 import os
+import time
 
-from .database import test_connection
+from .database import engine, estadisticas_pool
+from .utils import calentamiento
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
-@router.get("/health")
-async def health_check():
-    """Endpoint de health check para Docker y monitoreo"""
-    try:
-        # Verificar conexión a base de datos
-        db_status = test_connection()
-        environment = os.getenv("ENVIRONMENT", "development")
-        
+INTERVALO_SONDA = float(os.getenv("HEALTH_PROBE_SECONDS", "5"))
+# Un resultado más viejo que esto indica que la sonda dejó de correr
+ANTIGUEDAD_MAXIMA = float(os.getenv("HEALTH_PROBE_MAX_AGE_SECONDS", str(INTERVALO_SONDA * 3)))
+
+
+class SondaBaseDatos:
+    """Último resultado de `SELECT 1` contra la base, medido fuera del camino de la petición"""
+
+    def __init__(self):
+        self.ok: Optional[bool] = None
+        self.latencia_ms: Optional[float] = None
+        self.error: Optional[str] = None
+        self.verificado_en: Optional[datetime] = None
+        self._momento: Optional[float] = None
+
+    def ejecutar(self) -> bool:
+        inicio = time.perf_counter()
+        try:
+            with engine.connect() as conexion:
+                conexion.execute(text("SELECT 1"))
+            ok, error = True, None
+        except Exception as e:
+            ok, error = False, str(e)
+        if not ok and self.ok is not False:
+            logger.error(f"Sonda de base de datos falló: {error}")
+        elif ok and self.ok is False:
+            logger.info("Sonda de base de datos recuperada")
+        self.ok, self.error = ok, error
+        self.latencia_ms = round((time.perf_counter() - inicio) * 1000, 2)
+        self.verificado_en = datetime.utcnow()
+        self._momento = time.monotonic()
+        return ok
+
+    def antiguedad(self) -> Optional[float]:
+        if self._momento is None:
+            return None
+        return time.monotonic() - self._momento
+
+    def vigente(self) -> bool:
+        antiguedad = self.antiguedad()
+        return bool(self.ok) and antiguedad is not None and antiguedad <= ANTIGUEDAD_MAXIMA
+
+    def a_dict(self) -> Dict[str, Any]:
+        antiguedad = self.antiguedad()
         return {
-            "status": "healthy" if db_status else "unhealthy",
-            "timestamp": datetime.utcnow().isoformat(),
-            "version": "2.0.0",
-            "environment": environment,
-            "database": "connected" if db_status else "disconnected",
-            "services": {
-                "api": "running",
-                "database": "connected" if db_status else "error"
-            }
+            "ok": self.ok,
+            "latencia_ms": self.latencia_ms,
+            "error": self.error,
+            "verificado_en": self.verificado_en.isoformat() if self.verificado_en else None,
+            "antiguedad_s": round(antiguedad, 2) if antiguedad is not None else None,
         }
-    except Exception as e:
-        logger.error(f"Health check failed: {e}")
-        return JSONResponse(
-            status_code=503,
-            content={
-                "status": "unhealthy",
-                "timestamp": datetime.utcnow().isoformat(),
-                "error": str(e)
-            }
-        )
+
+
+sonda = SondaBaseDatos()
+
+
+async def tarea_periodica_sonda() -> None:
+    """Sondea la base de inmediato y luego cada INTERVALO_SONDA segundos"""
+    loop = asyncio.get_running_loop()
+    while True:
+        await loop.run_in_executor(None, sonda.ejecutar)
+        await asyncio.sleep(INTERVALO_SONDA)
+
+
+def _estado_base_datos() -> str:
+    if sonda.ok is None:
+        return "unknown"
+    return "connected" if sonda.vigente() else "disconnected"
+
+
+@router.get("/livez")
+async def livez():
+    """Liveness: el proceso responde (sin E/S)"""
+    return {"status": "alive"}
+
+
+@router.get("/readyz")
+async def readyz():
+    """Readiness: calentamiento terminado y base de datos accesible según la última sonda"""
+    listo = calentamiento.estado.listo and sonda.vigente()
+    if listo:
+        status = "ready"
+    elif not calentamiento.estado.listo:
+        status = "warming_up"
+    else:
+        status = "database_unavailable"
+    datos = {
+        "status": status,
+        "timestamp": datetime.utcnow().isoformat(),
+        "base_datos": sonda.a_dict(),
+        "pool": estadisticas_pool(),
+        "calentamiento": calentamiento.estado.a_dict(),
+    }
+    return JSONResponse(status_code=200 if listo else 503, content=datos)
+
+
+@router.get("/health")
+async def health_check():
+    """Endpoint de health check para Docker y monitoreo (usar /livez y /readyz)"""
+    database = _estado_base_datos()
+    return {
+        "status": "healthy" if database == "connected" else "unhealthy",
+        "timestamp": datetime.utcnow().isoformat(),
+        "version": "2.0.0",
+        "environment": os.getenv("ENVIRONMENT", "development"),
+        "database": database,
+        "services": {
+            "api": "running",
+            "database": database if database != "disconnected" else "error"
+        },
+        "pool": estadisticas_pool(),
+    }
+
 
 @router.get("/")
 async def root():
@@ -54,4 +150,4 @@ async def root():
         "docs": "/docs",
         "health": "/health",
         "timestamp": datetime.utcnow().isoformat()
-    } 
\ No newline at end of file
+    }
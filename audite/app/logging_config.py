@@ -0,0 +1,152 @@
+"""
+Configuración de logging de AuditE API.
+Los registros se encolan con un QueueHandler y un QueueListener los formatea
+(JSON por defecto) y escribe en un hilo aparte, de modo que la E/S de logs no
+ocurre en el camino de la petición. Si la cola se llena, los registros se
+descartan en lugar de bloquear. Los DEBUG por petición (logger app.peticiones)
+se muestrean con LOG_DEBUG_SAMPLE_RATE y las cabeceras sensibles se redactan
+antes de loguearse.
+"""
+
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, WatchedFileHandler
+from typing import Any, Dict, Mapping, Optional
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+import random
+import sys
+
+NIVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+FORMATO = os.getenv("LOG_FORMAT", "json").lower()  # json | texto
+ARCHIVO = os.getenv("LOG_FILE") or None
+TAMANO_COLA = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+# Fracción de los DEBUG por petición que se emiten (el resto se descarta antes de
+# encolarse), con cualquier LOG_LEVEL. LOG_DEBUG_SAMPLE_RATE=1.0 los emite todos
+TASA_MUESTREO_DEBUG = float(os.getenv("LOG_DEBUG_SAMPLE_RATE", "0.01"))
+# Logger de las líneas por petición del middleware; solo este se muestrea
+LOGGER_PETICIONES = "app.peticiones"
+
+CABECERAS_SENSIBLES = {
+    "authorization", "proxy-authorization", "cookie", "set-cookie",
+    "x-api-key", "x-csrf-token", "x-profile",
+} | {c.strip().lower() for c in os.getenv("LOG_REDACT_HEADERS", "").split(",") if c.strip()}
+REDACTADO = "[redactado]"
+
+# Atributos propios de LogRecord; el resto son los `extra` del llamador
+_ATRIBUTOS_REGISTRO = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+_listener: Optional[QueueListener] = None
+descartados = 0
+
+
+def redactar_cabeceras(cabeceras: Mapping[str, str]) -> Dict[str, str]:
+    """Copia de las cabeceras con los valores sensibles reemplazados"""
+    return {
+        clave: REDACTADO if clave.lower() in CABECERAS_SENSIBLES else valor
+        for clave, valor in cabeceras.items()
+    }
+
+
+class FormateadorJSON(logging.Formatter):
+    """Un objeto JSON por línea, con los `extra` del registro como campos"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        datos: Dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "nivel": record.levelname,
+            "logger": record.name,
+            "mensaje": record.getMessage(),
+            "pid": record.process,
+        }
+        for clave, valor in vars(record).items():
+            if clave not in _ATRIBUTOS_REGISTRO and not clave.startswith("_"):
+                datos[clave] = valor
+        if record.exc_text:
+            datos["excepcion"] = record.exc_text
+        elif record.exc_info:
+            datos["excepcion"] = self.formatException(record.exc_info)
+        return json.dumps(datos, ensure_ascii=False, default=str)
+
+
+class FiltroMuestreoDebug(logging.Filter):
+    """Deja pasar todos los registros INFO o superiores y una fracción de los DEBUG.
+    Se instala en el logger de peticiones, no en el manejador: los DEBUG de
+    SQLAlchemy y del resto de las bibliotecas no se muestrean."""
+
+    def __init__(self, tasa: float = TASA_MUESTREO_DEBUG):
+        super().__init__()
+        self.tasa = tasa
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG or self.tasa >= 1:
+            return True
+        return random.random() < self.tasa
+
+
+class ManejadorCola(QueueHandler):
+    """QueueHandler que no formatea en el hilo que loguea y descarta si la cola está llena"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Solo se resuelve el mensaje (los argumentos pueden cambiar después);
+        # el formateo JSON y la escritura quedan para el hilo del listener
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        global descartados
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            descartados += 1
+
+
+def _formateador() -> logging.Formatter:
+    if FORMATO == "json":
+        return FormateadorJSON()
+    return logging.Formatter("%(asctime)s %(levelname)s [%(name)s] %(message)s")
+
+
+def configurar_logging() -> None:
+    """Instala la cola de logging en el logger raíz (idempotente, una vez por proceso)"""
+    global _listener
+    if _listener is not None:
+        return
+
+    destinos = [logging.StreamHandler(sys.stdout)]
+    if ARCHIVO:
+        os.makedirs(os.path.dirname(ARCHIVO) or ".", exist_ok=True)
+        destinos.append(WatchedFileHandler(ARCHIVO, encoding="utf-8"))
+    formateador = _formateador()
+    for destino in destinos:
+        destino.setFormatter(formateador)
+
+    cola: queue.Queue = queue.Queue(maxsize=TAMANO_COLA)
+    manejador = ManejadorCola(cola)
+    logging.getLogger(LOGGER_PETICIONES).addFilter(FiltroMuestreoDebug())
+
+    raiz = logging.getLogger()
+    for anterior in list(raiz.handlers):
+        raiz.removeHandler(anterior)
+    raiz.addHandler(manejador)
+    raiz.setLevel(NIVEL)
+
+    _listener = QueueListener(cola, *destinos, respect_handler_level=True)
+    _listener.start()
+    atexit.register(detener_logging)
+
+
+def detener_logging() -> None:
+    """Vacía la cola y detiene el hilo del listener"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
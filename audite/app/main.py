@@ -1,3 +1,8 @@
+# El logging se configura antes de importar el resto de la app para que los
+# mensajes emitidos al importar (database.py) ya pasen por la cola
+from .logging_config import configurar_logging, redactar_cabeceras, LOGGER_PETICIONES
+configurar_logging()
+
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
@@ -7,35 +12,76 @@ from .routers.diagnostico_feria import router as diagnostico_feria_router
 from .routers.autodiagnostico import router as autodiagnostico_router
 from .routers.diagnosticos_industria import router as diagnosticos_industria_router
 from .routers.admin_formularios import router as admin_formularios_router
-from .health import router as health_router
-from . import models
-from .database import engine, test_connection
+from .routers.admin_sistema import router as admin_sistema_router
+from .health import router as health_router, tarea_periodica_sonda
+from . import metrics
+from .database import engine
+from .utils.benchmarking import tarea_periodica_sketches
+from .utils.parametros import tarea_periodica_parametros
+from .utils.reglas import tarea_periodica_plantillas
+from .utils.catalogo_formularios import tarea_periodica_catalogo
+from .utils.particiones import tarea_periodica_particiones
+from .utils import calentamiento
+from .utils import instrumentacion
+from .utils.instrumentacion import instrumentar_engine
+from .utils.consultas_lentas import instalar_detector
+from .utils import perfilador
+from .utils.paginacion import (
+    CursorInvalido, CABECERA_SIGUIENTE, CABECERA_TOTAL, CABECERA_TOTAL_APROXIMADO
+)
+from contextlib import asynccontextmanager
+import asyncio
 import os
 import logging
-from datetime import datetime
-from datetime import datetime
 
-# Configurar logging
-logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
+# Líneas DEBUG por petición, muestreadas con LOG_DEBUG_SAMPLE_RATE
+logger_peticiones = logging.getLogger(LOGGER_PETICIONES)
 
-# Solo crear tablas si SKIP_DB_SETUP no es "true"
-skip_db_setup = os.getenv("SKIP_DB_SETUP", "false").lower() == "true"
-if not skip_db_setup:
-    logger.info("SKIP_DB_SETUP no es true, creando tablas...")
-    try:
-        models.Base.metadata.create_all(bind=engine)
-        logger.info("Tablas creadas o ya existentes.")
-    except Exception as e:
-        logger.error(f"Error al crear tablas: {e}")
-        # Podrías decidir si quieres que la app falle aquí o continúe
-else:
-    logger.info("SKIP_DB_SETUP es true, saltando creación de tablas.")
+# El esquema se crea/migra en un paso explícito (scripts/crear_esquema.py o
+# `alembic upgrade head`), nunca al importar la app: el arranque de cada worker
+# no toca la base hasta el calentamiento que lanza el lifespan.
 
 # Determinar el ambiente
 ENVIRONMENT = os.getenv("ENVIRONMENT", "development")
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    loop = asyncio.get_running_loop()
+    tareas = []
+    # Calentar pool, cachés y modelos en segundo plano: el worker responde /livez
+    # de inmediato y /readyz recién cuando terminó
+    if calentamiento.HABILITADO:
+        tareas.append(asyncio.ensure_future(loop.run_in_executor(None, calentamiento.calentar, app)))
+    else:
+        calentamiento.marcar_listo_sin_calentar()
+    
+    tareas += [
+        # Sondear la base en segundo plano; /readyz y /health leen el último resultado
+        asyncio.create_task(tarea_periodica_sonda()),
+        # Cargar parámetros del sistema y vigilar cambios hechos desde otros workers
+        asyncio.create_task(tarea_periodica_parametros()),
+        # Compilar plantillas de recomendación y recompilarlas cuando cambien
+        asyncio.create_task(tarea_periodica_plantillas()),
+        # Vigilar cambios en el catálogo de formularios hechos desde otros workers
+        asyncio.create_task(tarea_periodica_catalogo()),
+    ]
+    # Recalcular periódicamente los sketches de percentiles por sector
+    if os.getenv("BENCHMARK_REFRESH_ENABLED", "true").lower() == "true":
+        tareas.append(asyncio.create_task(tarea_periodica_sketches()))
+    # Crear las particiones mensuales futuras de las respuestas y separar las vencidas
+    if os.getenv("PARTITION_MAINTENANCE_ENABLED", "true").lower() == "true":
+        tareas.append(asyncio.create_task(tarea_periodica_particiones()))
+    app.state.tareas_fondo = tareas
+    try:
+        yield
+    finally:
+        for tarea in tareas:
+            tarea.cancel()
+        await asyncio.gather(*tareas, return_exceptions=True)
+
 app = FastAPI(
+    lifespan=lifespan,
     title="Audite API",
     description="""
     API para el sistema de auditorías energéticas.
@@ -53,13 +99,72 @@ app = FastAPI(
     openapi_url="/openapi.json"
 )
 
+# Instrumentación SQL por petición y detector de consultas lentas
+instrumentar_engine(engine)
+instalar_detector(engine)
+
 # Middleware para logging de requests
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
-    logger.debug(f"Incoming request: {request.method} {request.url}")
-    logger.debug(f"Headers: {request.headers}")
-    response = await call_next(request)
-    logger.debug(f"Response status: {response.status_code}")
+    if logger_peticiones.isEnabledFor(logging.DEBUG):
+        logger_peticiones.debug(
+            "Incoming request: %s %s", request.method, request.url.path,
+            extra={"cabeceras": redactar_cabeceras(request.headers)}
+        )
+    if not instrumentacion.HABILITADO and not metrics.HABILITADO:
+        response = await call_next(request)
+        logger_peticiones.debug("Response status: %s", response.status_code)
+        return response
+    
+    metricas = instrumentacion.iniciar_peticion(request.scope)
+    if metrics.HABILITADO:
+        metrics.PETICIONES_EN_CURSO.inc()
+    try:
+        response = await call_next(request)
+    finally:
+        if metrics.HABILITADO:
+            metrics.PETICIONES_EN_CURSO.dec()
+    total_ms = metricas.total_ms()
+    
+    if metrics.HABILITADO:
+        metrics.DURACION_PETICIONES.labels(
+            metodo=request.method,
+            ruta=metrics.ruta_de(request.scope),
+            estado=str(response.status_code)
+        ).observe(total_ms / 1000)
+        metrics.actualizar_gauges()
+    
+    if instrumentacion.HABILITADO:
+        instrumentacion.registrar_peticion(
+            request.method, instrumentacion.plantilla_ruta(request.scope),
+            response.status_code, metricas, total_ms
+        )
+        if instrumentacion.CABECERA_HABILITADA:
+            response.headers["Server-Timing"] = instrumentacion.cabecera_server_timing(metricas, total_ms)
+    return response
+
+# Perfilado de una petición puntual: X-Profile con un token de administrador
+@app.middleware("http")
+async def perfilar_peticion(request: Request, call_next):
+    token = request.headers.get(perfilador.CABECERA_PERFIL) if perfilador.CABECERA_HABILITADA else None
+    if not token or not admin_auth.token_admin_valido(token):
+        return await call_next(request)
+    
+    muestreador = perfilador.MuestreadorPilas(perfilador.INTERVALO_PETICION_MS)
+    try:
+        muestreador.iniciar()
+    except perfilador.PerfiladorOcupado:
+        logger.warning("Perfilado de petición omitido: ya hay una sesión de muestreo en curso")
+        return await call_next(request)
+    try:
+        response = await call_next(request)
+    finally:
+        muestreador.detener()
+    
+    perfil_id = perfilador.perfiles.guardar(
+        muestreador, request.method, instrumentacion.plantilla_ruta(request.scope)
+    )
+    response.headers[perfilador.CABECERA_ID_PERFIL] = perfil_id
     return response
 
 # Configuración de CORS
@@ -83,58 +188,24 @@ app.add_middleware(
         "Origin",
         "X-Requested-With",
         "X-CSRF-Token",
+        "X-Profile",
     ],
     expose_headers=[
         "Content-Length",
         "Content-Range",
+        "Server-Timing",
+        "X-Profile-Id",
+        CABECERA_SIGUIENTE,
+        CABECERA_TOTAL,
+        CABECERA_TOTAL_APROXIMADO,
     ],
     max_age=3600,
 )
 
-# Health check endpoint para Docker
-@app.get("/health")
-async def health_check():
-    """Endpoint de health check para Docker y monitoreo"""
-    try:
-        from datetime import datetime
-        # Verificar conexión a base de datos
-        db_status = test_connection()
-        
-        return {
-            "status": "healthy" if db_status else "unhealthy",
-            "timestamp": datetime.utcnow().isoformat(),
-            "version": "2.0.0",
-            "environment": ENVIRONMENT,
-            "database": "connected" if db_status else "disconnected",
-            "services": {
-                "api": "running",
-                "database": "connected" if db_status else "error"
-            }
-        }
-    except Exception as e:
-        logger.error(f"Health check failed: {e}")
-        return JSONResponse(
-            status_code=503,
-            content={
-                "status": "unhealthy",
-                "timestamp": datetime.utcnow().isoformat(),
-                "error": str(e)
-            }
-        )
-
-# Root endpoint
-@app.get("/")
-async def root():
-    """Endpoint raíz con información básica"""
-    from datetime import datetime
-    return {
-        "message": "AuditE API - Sistema de Auditorías Energéticas",
-        "version": "2.0.0",
-        "environment": ENVIRONMENT,
-        "docs": "/docs",
-        "health": "/health",
-        "timestamp": datetime.utcnow().isoformat()
-    }
+# Cursor de paginación que no fue emitido por la API
+@app.exception_handler(CursorInvalido)
+async def cursor_invalido_handler(request: Request, exc: CursorInvalido):
+    return JSONResponse(status_code=400, content={"detail": str(exc)})
 
 # Manejador de errores personalizado para CORS
 @app.exception_handler(Exception)
@@ -165,9 +236,10 @@ async def generic_exception_handler(request: Request, exc: Exception):
 #     )
 
 # Incluir los routers
-# Health check y root endpoints
-from .health import router as health_router
+# Health check (/livez, /readyz, /health) y root endpoints
 app.include_router(health_router)
+if metrics.HABILITADO:
+    app.include_router(metrics.router)
 
 app.include_router(auth.router)
 app.include_router(auditoria_basica.router)
@@ -180,46 +252,4 @@ app.include_router(autodiagnostico_router)
 # Nuevos routers para formularios por industria
 app.include_router(diagnosticos_industria_router)  # Endpoints públicos
 app.include_router(admin_formularios_router)  # Endpoints admin
-
-# Health check endpoint para Docker
-@app.get("/health")
-async def health_check():
-    """Endpoint de health check para Docker y monitoreo"""
-    try:
-        # Verificar conexión a base de datos
-        db_status = test_connection()
-        
-        return {
-            "status": "healthy" if db_status else "unhealthy",
-            "timestamp": datetime.utcnow().isoformat(),
-            "version": "2.0.0",
-            "environment": ENVIRONMENT,
-            "database": "connected" if db_status else "disconnected",
-            "services": {
-                "api": "running",
-                "database": "connected" if db_status else "error"
-            }
-        }
-    except Exception as e:
-        logger.error(f"Health check failed: {e}")
-        return JSONResponse(
-            status_code=503,
-            content={
-                "status": "unhealthy",
-                "timestamp": datetime.utcnow().isoformat(),
-                "error": str(e)
-            }
-        )
-
-# Root endpoint
-@app.get("/")
-async def root():
-    """Endpoint raíz con información básica"""
-    return {
-        "message": "AuditE API - Sistema de Auditorías Energéticas",
-        "version": "2.0.0",
-        "environment": ENVIRONMENT,
-        "docs": "/docs",
-        "health": "/health",
-        "timestamp": datetime.utcnow().isoformat()
-    } 
\ No newline at end of file
+app.include_router(admin_sistema_router)  # Diagnóstico del worker (consultas lentas, perfilador)
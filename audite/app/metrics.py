@@ -0,0 +1,121 @@
+"""
+Métricas Prometheus para AuditE API.
+Con varios workers de gunicorn, PROMETHEUS_MULTIPROC_DIR (configurado en
+gunicorn_config.py sobre /dev/shm) hace que cada proceso escriba sus valores en
+archivos compartidos y /metrics agregue los de todos los workers.
+"""
+
+from fastapi import APIRouter, Response
+from prometheus_client import (
+    CollectorRegistry, Counter, Gauge, Histogram, CONTENT_TYPE_LATEST,
+    REGISTRY, generate_latest, multiprocess
+)
+import os
+import time
+
+router = APIRouter()
+
+HABILITADO = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+MULTIPROCESO = bool(os.getenv("PROMETHEUS_MULTIPROC_DIR"))
+# Los gauges de pool y cachés se refrescan como mucho cada este intervalo por worker
+INTERVALO_GAUGES = float(os.getenv("METRICS_GAUGE_INTERVAL", "5"))
+
+RUTA_DESCONOCIDA = "sin_ruta"
+
+DURACION_PETICIONES = Histogram(
+    "audite_http_request_duration_seconds",
+    "Duración de las peticiones HTTP por plantilla de ruta",
+    ["metodo", "ruta", "estado"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+PETICIONES_EN_CURSO = Gauge(
+    "audite_http_requests_in_progress",
+    "Peticiones HTTP en curso",
+    multiprocess_mode="livesum",
+)
+POOL_CONEXIONES = Gauge(
+    "audite_db_pool_connections",
+    "Conexiones del pool de SQLAlchemy por estado",
+    ["estado"],
+    multiprocess_mode="livesum",
+)
+CACHE_CONSULTAS = Gauge(
+    "audite_cache_lookups",
+    "Consultas a cachés en memoria por resultado (acumulado del worker)",
+    ["cache", "resultado"],
+    multiprocess_mode="livesum",
+)
+HASHING_PENDIENTES = Gauge(
+    "audite_password_hash_pending",
+    "Operaciones bcrypt en ejecución o en cola",
+    multiprocess_mode="livesum",
+)
+HASHING_RECHAZADAS = Gauge(
+    "audite_password_hash_rejected",
+    "Operaciones bcrypt rechazadas por saturación (acumulado del worker)",
+    multiprocess_mode="livesum",
+)
+HASHING_FALLIDAS = Gauge(
+    "audite_password_hash_failed",
+    "Operaciones bcrypt que terminaron con error (acumulado del worker)",
+    multiprocess_mode="livesum",
+)
+FORMULARIOS_ENVIADOS = Counter(
+    "audite_form_submissions_total",
+    "Envíos de formularios",
+    ["formulario"],
+)
+DIAGNOSTICOS_CREADOS = Counter(
+    "audite_diagnostics_created_total",
+    "Diagnósticos y auditorías creados",
+    ["tipo"],
+)
+
+_ultima_actualizacion = 0.0
+
+
+def ruta_de(scope) -> str:
+    """Plantilla de la ruta; las peticiones sin ruta se agrupan para acotar la cardinalidad"""
+    ruta = scope.get("route")
+    return getattr(ruta, "path", None) or RUTA_DESCONOCIDA
+
+
+def actualizar_gauges(forzar: bool = False) -> None:
+    """Copia el estado del pool, las cachés y el pool de hashing de este worker a los gauges"""
+    global _ultima_actualizacion
+    ahora = time.monotonic()
+    if not forzar and ahora - _ultima_actualizacion < INTERVALO_GAUGES:
+        return
+    _ultima_actualizacion = ahora
+
+    from .database import estadisticas_pool
+    from .utils.tokens import estadisticas_tokens
+    from .utils.hashing import estadisticas_hashing
+
+    for estado, valor in estadisticas_pool().items():
+        if estado != "clase":
+            POOL_CONEXIONES.labels(estado=estado).set(valor)
+
+    for cache, datos in estadisticas_tokens().items():
+        CACHE_CONSULTAS.labels(cache=f"tokens_{cache}", resultado="acierto").set(datos["aciertos"])
+        CACHE_CONSULTAS.labels(cache=f"tokens_{cache}", resultado="fallo").set(datos["fallos"])
+
+    hashing = estadisticas_hashing()
+    HASHING_PENDIENTES.set(hashing["pendientes"])
+    HASHING_RECHAZADAS.set(hashing["rechazadas"])
+    HASHING_FALLIDAS.set(hashing["fallidas"])
+
+
+def _registro() -> CollectorRegistry:
+    if not MULTIPROCESO:
+        return REGISTRY
+    registro = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registro)
+    return registro
+
+
+@router.get("/metrics", include_in_schema=False)
+def metrics():
+    """Métricas en formato de exposición de Prometheus"""
+    actualizar_gauges(forzar=True)
+    return Response(generate_latest(_registro()), media_type=CONTENT_TYPE_LATEST)
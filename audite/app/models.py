@@ -1,6 +1,9 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Boolean, Text, JSON, func, Table, UniqueConstraint
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Boolean, Text, JSON, func, Table, UniqueConstraint, Index, text, Computed, cast
 from sqlalchemy.orm import relationship
 from .database import Base
+from .utils.parametros import get_parametros
+from .utils.tipos_json import JSONBinario, campo_json
+from .utils.paginacion import ahora
 from datetime import datetime
 import json
 
@@ -14,6 +17,7 @@ class User(Base):
     empresa = Column(String(100))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     is_active = Column(Boolean, default=True)
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")  # Incrementar revoca los tokens emitidos
 
     # Relaciones
     auditorias_basicas = relationship("AuditoriaBasica", back_populates="usuario")
@@ -58,6 +62,11 @@ class AuditoriaBasica(Base):
     usuario = relationship("User", back_populates="auditorias_basicas")
     recomendaciones = relationship("Recomendacion", back_populates="auditoria_basica")
 
+    # Paginación por cursor sobre (created_at, id) (utils/paginacion.py)
+    __table_args__ = (
+        Index('ix_auditorias_basicas_created_at_id', 'created_at', 'id'),
+    )
+
     def get_fuentes_energia(self):
         """Convierte el JSON a diccionario"""
         return self.fuentes_energia if isinstance(self.fuentes_energia, dict) else {}
@@ -102,7 +111,8 @@ class AuditoriaBasica(Base):
 
     def calcular_potencial_ahorro(self):
         """Calcula el potencial de ahorro basado en múltiples factores"""
-        base_potencial = 0.15  # 15% base
+        parametros = get_parametros()
+        base_potencial = parametros.ahorro_base_basica  # 15% base
         
         # Factores que aumentan el potencial
         if not self.tiene_auditoria_previa:
@@ -120,7 +130,32 @@ class AuditoriaBasica(Base):
         if self.consumo_anual > 500000:  # alto consumo
             base_potencial += 0.04  # +4%
             
-        return min(base_potencial, 0.35)  # máximo 35%
+        return min(base_potencial, parametros.ahorro_maximo_basica)  # máximo 35%
+
+    def calcular_puntuacion_eficiencia(self):
+        """Calcula la puntuación de eficiencia (0-100)"""
+        base_puntuacion = 70.0
+        if self.tiene_auditoria_previa:
+            base_puntuacion += 5
+        if self.renewable_energy:
+            base_puntuacion += 10
+        if self.equipment_age == 'menos_5_anos':
+            base_puntuacion += 5
+        return min(base_puntuacion, 100)
+
+    def get_benchmark_sector(self):
+        """Comparación con el benchmark del sector (podríamos mejorar esto con datos reales)"""
+        benchmarks = {
+            'industrial': 150000.0,
+            'comercial': 100000.0,
+            'alimentacion': 200000.0,
+            'otros': 100000.0
+        }
+        consumo_promedio = benchmarks.get(self.sector.lower(), benchmarks['otros'])
+        return {
+            "consumo_promedio_sector": consumo_promedio,
+            "diferencia_porcentual": ((self.consumo_anual - consumo_promedio) / consumo_promedio) * 100
+        }
 
     def calcular_distribucion_consumo(self):
         """Calcula la distribución estimada del consumo energético"""
@@ -244,10 +279,15 @@ class AuditoriaAgro(Base):
     usuario = relationship("User", back_populates="auditorias_agro")
     recomendaciones = relationship("Recomendacion", back_populates="auditoria_agro")
 
+    # Paginación por cursor sobre (created_at, id) (utils/paginacion.py)
+    __table_args__ = (
+        Index('ix_auditorias_agro_created_at_id', 'created_at', 'id'),
+    )
+
     def calcular_consumo_total(self):
         """Calcula el consumo energético total en kWh/año"""
         # Convertir consumo de combustible a kWh (factor aproximado: 10 kWh/litro)
-        consumo_combustible_kwh = self.consumo_combustible * 10
+        consumo_combustible_kwh = self.consumo_combustible * get_parametros().kwh_por_litro_combustible
         
         consumos = [
             self.consumo_electrico,
@@ -290,7 +330,8 @@ class AuditoriaAgro(Base):
 
     def calcular_potencial_ahorro(self):
         """Calcula el potencial de ahorro basado en múltiples factores"""
-        base_potencial = 0.15  # 15% base
+        parametros = get_parametros()
+        base_potencial = parametros.ahorro_base_agro  # 15% base
         
         if not self.tiene_certificacion:
             base_potencial += 0.05  # +5%
@@ -309,7 +350,7 @@ class AuditoriaAgro(Base):
         if self.calcular_consumo_total() > 500000:  # alto consumo
             base_potencial += 0.05  # +5%
         
-        return min(base_potencial, 0.40)  # máximo 40%
+        return min(base_potencial, parametros.ahorro_maximo_agro)  # máximo 40%
 
     def calcular_puntuacion_eficiencia(self):
         """Calcula la puntuación de eficiencia (0-100)"""
@@ -336,9 +377,10 @@ class AuditoriaAgro(Base):
 
     def calcular_huella_carbono(self):
         """Calcula la huella de carbono en kgCO2e/año"""
-        # Factores de emisión aproximados
-        factor_electricidad = 0.4  # kgCO2e/kWh
-        factor_combustible = 2.7  # kgCO2e/litro
+        # Factores de emisión configurables en ParametrosSistema
+        parametros = get_parametros()
+        factor_electricidad = parametros.factor_emision_electricidad  # kgCO2e/kWh
+        factor_combustible = parametros.factor_emision_combustible  # kgCO2e/litro
         
         emisiones_electricidad = self.consumo_electrico * factor_electricidad
         emisiones_combustible = self.consumo_combustible * factor_combustible
@@ -351,9 +393,10 @@ class AuditoriaAgro(Base):
 
     def calcular_costo_energia_por_produccion(self):
         """Calcula el costo energético por unidad de producción"""
-        # Costos aproximados
-        costo_kwh = 0.12  # $/kWh
-        costo_combustible = 1.2  # $/litro
+        # Costos configurables en ParametrosSistema
+        parametros = get_parametros()
+        costo_kwh = parametros.costo_kwh  # $/kWh
+        costo_combustible = parametros.costo_combustible_litro  # $/litro
         
         costo_total = (self.consumo_electrico * costo_kwh) + (self.consumo_combustible * costo_combustible)
         return costo_total / self.produccion_anual if self.produccion_anual > 0 else 0
@@ -473,7 +516,7 @@ class SectorIndustrial(Base):
     id = Column(Integer, primary_key=True, index=True)
     nombre = Column(String, unique=True, index=True)
     descripcion = Column(String)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.utcnow, server_default=ahora(), nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Relaciones
@@ -489,12 +532,64 @@ class Benchmark(Base):
     unidad_medida = Column(String)
     año = Column(Integer)
     fuente = Column(String)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.utcnow, server_default=ahora(), nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Relaciones
     sector = relationship("SectorIndustrial", back_populates="benchmarks")
 
+class BenchmarkSketch(Base):
+    """Sketch de cuantiles por métrica y grupo (sector, tipo de cultivo o producto)"""
+    __tablename__ = "benchmark_sketches"
+
+    id = Column(Integer, primary_key=True, index=True)
+    metrica = Column(String(50), nullable=False)  # 'agro_kpi_por_area', 'basica_intensidad', ...
+    grupo = Column(String(100), nullable=False)  # Valor normalizado del grupo, '*' para toda la población
+    sketch = Column(JSON, nullable=False)  # Buckets logarítmicos serializados
+    total = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        UniqueConstraint('metrica', 'grupo', name='uq_benchmark_sketch_metrica_grupo'),
+    )
+
+class RecalculoCheckpoint(Base):
+    """Avance de un trabajo de recálculo masivo por tabla y rango de ids"""
+    __tablename__ = "recalculo_checkpoints"
+
+    id = Column(Integer, primary_key=True, index=True)
+    trabajo = Column(String(100), nullable=False)  # Nombre libre del trabajo, p.ej. 'factores-2026-10'
+    tabla = Column(String(20), nullable=False)  # 'agro', 'basica' o 'feria'
+    desde_id = Column(String(50))  # Rango [desde_id, hasta_id); NULL = sin límite
+    hasta_id = Column(String(50))
+    ultimo_id = Column(String(50))  # Último id procesado y confirmado
+    procesados = Column(Integer, nullable=False, default=0)
+    estado = Column(String(20), nullable=False, default="en_progreso")  # en_progreso, completado, error
+    error = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        UniqueConstraint('trabajo', 'tabla', 'desde_id', 'hasta_id', name='uq_recalculo_checkpoint_rango'),
+    )
+
+class ArchivoFrio(Base):
+    """Sesión o diagnóstico movido a un archivo Parquet del archivo frío (utils/archivo_frio.py)"""
+    __tablename__ = "archivo_frio"
+
+    id = Column(Integer, primary_key=True, index=True)
+    tabla = Column(String(50), nullable=False)  # Tabla de origen
+    clave = Column(String(100), nullable=False)  # session_id, o id del diagnóstico de feria
+    codigo = Column(String(8), nullable=True, index=True)  # Código de acceso del diagnóstico de feria
+    archivo = Column(String(255), nullable=False)  # Ruta relativa a ARCHIVE_DIR
+    filas = Column(Integer, nullable=False)
+    archivado_en = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        # Una sesión que volvió a recibir respuestas puede quedar en más de un archivo
+        Index('ix_archivo_frio_tabla_clave', 'tabla', 'clave'),
+    )
+
 class TipoEquipo(Base):
     __tablename__ = "tipos_equipos"
 
@@ -506,7 +601,7 @@ class TipoEquipo(Base):
     unidad_potencia = Column(String)
     eficiencia_tipica = Column(Float)
     vida_util = Column(Integer)  # en años
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.utcnow, server_default=ahora(), nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 class PlantillaRecomendacion(Base):
@@ -522,7 +617,7 @@ class PlantillaRecomendacion(Base):
     periodo_retorno_tipico = Column(Float)  # en meses
     prioridad = Column(Integer)  # 1-5
     condiciones_aplicacion = Column(JSON)  # Condiciones para aplicar esta recomendación
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.utcnow, server_default=ahora(), nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 class ParametrosSistema(Base):
@@ -544,33 +639,53 @@ class DiagnosticoFeria(Base):
     access_code = Column(String(8), unique=True, index=True)
     
     # Datos de Contacto (Etapa 1)
-    contact_info = Column(JSON, nullable=False)
+    contact_info = Column(JSONBinario, nullable=False)
 
     # Estado del diagnóstico
     estado = Column(String(50), default='CONTACTO_INICIADO', nullable=False)
 
     # Datos del Diagnóstico (Etapa 2 - pueden ser NULL inicialmente)
-    background = Column(JSON, nullable=True)
-    production = Column(JSON, nullable=True)
-    equipment = Column(JSON, nullable=True)
-    renewable = Column(JSON, nullable=True)
-    volume = Column(JSON, nullable=True)
-    meta_data = Column(JSON, nullable=True)
+    background = Column(JSONBinario, nullable=True)
+    production = Column(JSONBinario, nullable=True)
+    equipment = Column(JSONBinario, nullable=True)
+    renewable = Column(JSONBinario, nullable=True)
+    volume = Column(JSONBinario, nullable=True)
+    meta_data = Column(JSONBinario, nullable=True)
     
     # Resultados calculados (Etapa 2 - serán NULL inicialmente)
     intensidad_energetica = Column(Float, nullable=True)
     costo_energia_anual = Column(Float, nullable=True)
     potencial_ahorro = Column(Float, nullable=True)
     puntuacion_eficiencia = Column(Float, nullable=True)
-    comparacion_sector = Column(JSON, nullable=True)
+    comparacion_sector = Column(JSONBinario, nullable=True)
     
     # Recomendaciones generadas (Etapa 2 - serán NULL inicialmente)
-    recomendaciones = Column(JSON, nullable=True)
+    recomendaciones = Column(JSONBinario, nullable=True)
     
     # URLs relacionadas (Etapa 2 - serán NULL inicialmente, o generadas al completar)
     pdf_url = Column(String, nullable=True)
     view_url = Column(String, nullable=True)
 
+    # Campos de los JSON por los que se filtra o agrega, como columnas generadas
+    # (STORED en PostgreSQL) para no re-parsear el JSON en cada fila
+    tipo_producto = Column(String, Computed(campo_json(production, "productType"), persisted=True))
+    email_contacto = Column(String, Computed(func.lower(campo_json(contact_info, "email_contacto")), persisted=True))
+    region = Column(String, Computed(campo_json(contact_info, "ubicacion"), persisted=True))
+    consumo_energia = Column(Float, Computed(cast(campo_json(equipment, "energyConsumption"), Float), persisted=True))
+
+    __table_args__ = (
+        Index('ix_diagnosticos_feria_tipo_producto', 'tipo_producto'),
+        Index('ix_diagnosticos_feria_email_contacto', 'email_contacto'),
+        Index('ix_diagnosticos_feria_region', 'region'),
+        Index('ix_diagnosticos_feria_consumo_energia', 'consumo_energia'),
+        # Consultas de contención sobre production (production @> '{...}'), solo PostgreSQL
+        Index(
+            'ix_diagnosticos_feria_production', 'production',
+            postgresql_using='gin', postgresql_ops={'production': 'jsonb_path_ops'}
+        ).ddl_if(dialect='postgresql'),
+    )
+
+
 # Nuevos modelos para el sistema de preguntas autoadministrables
 
 class AutodiagnosticoPregunta(Base):
@@ -622,12 +737,20 @@ class AutodiagnosticoRespuesta(Base):
     # Metadatos
     ip_address = Column(String(45), nullable=True)
     user_agent = Column(String(500), nullable=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Clave de partición mensual en PostgreSQL (utils/particiones.py)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
     # Relación con pregunta
     pregunta = relationship("AutodiagnosticoPregunta")
 
+    # Paginación por cursor sobre (created_at, id) (utils/paginacion.py)
+    __table_args__ = (
+        Index('ix_autodiagnostico_respuestas_created_at_id', 'created_at', 'id'),
+        # Conteos por pregunta y opción (estadísticas de administración)
+        Index('ix_autodiagnostico_respuestas_pregunta_opcion', 'pregunta_id', 'opcion_seleccionada'),
+    )
+
 
 # ========================================
 # NUEVOS MODELOS: FORMULARIOS POR INDUSTRIA
@@ -700,19 +823,36 @@ class PreguntaFormulario(Base):
     preguntas_hijas = relationship("PreguntaFormulario", remote_side=[pregunta_padre_id])
     respuestas = relationship("RespuestaFormulario", back_populates="pregunta")
 
+    __table_args__ = (
+        # Preguntas activas de un formulario en orden (endpoints públicos y catálogo)
+        Index('ix_preguntas_formulario_formulario_activa_orden', 'formulario_id', 'activa', 'orden'),
+        # Preguntas hijas de una condicional; la mayoría no tiene padre
+        Index('ix_preguntas_formulario_pregunta_padre_id', 'pregunta_padre_id',
+              postgresql_where=text('pregunta_padre_id IS NOT NULL'),
+              sqlite_where=text('pregunta_padre_id IS NOT NULL')),
+    )
+
 
 class RespuestaFormulario(Base):
     """Modelo para respuestas de usuarios con soporte para campos 'Otro'"""
     __tablename__ = "respuestas_formulario"
 
     id = Column(Integer, primary_key=True, index=True)
-    session_id = Column(String(100), nullable=False, index=True)  # UUID de sesión
+    session_id = Column(String(100), nullable=False)  # UUID de sesión
     pregunta_id = Column(Integer, ForeignKey("preguntas_formulario.id"), nullable=False)
     valor_respuesta = Column(JSON, nullable=True)  # Flexible para cualquier tipo
     valor_otro = Column(Text, nullable=True)  # Texto del campo "Otro"
     ip_address = Column(String(45), nullable=True)  # IPv4/IPv6
     user_agent = Column(String(500), nullable=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Clave de partición mensual en PostgreSQL (utils/particiones.py)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
 
     # Relaciones
-    pregunta = relationship("PreguntaFormulario", back_populates="respuestas") 
\ No newline at end of file
+    pregunta = relationship("PreguntaFormulario", back_populates="respuestas")
+
+    __table_args__ = (
+        # Respuestas de una sesión en orden (reemplaza al índice simple de session_id)
+        Index('ix_respuestas_formulario_session_created', 'session_id', 'created_at'),
+        # Join por pregunta para las estadísticas de un formulario
+        Index('ix_respuestas_formulario_pregunta_session', 'pregunta_id', 'session_id'),
+    ) 
\ No newline at end of file
@@ -1,6 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Response
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from datetime import datetime
 import csv
 import io
@@ -9,6 +9,11 @@ import json
 from .. import models, schemas
 from ..database import get_db
 from .auth import get_current_active_user
+from ..utils.parametros import recargar_parametros
+from ..utils.reglas import recargar_plantillas
+from ..utils.hashing import estadisticas_hashing
+from ..utils.tokens import estadisticas_tokens
+from ..utils.paginacion import cabeceras_pagina, paginar, total_tabla
 
 router = APIRouter(
     prefix="/admin",
@@ -19,11 +24,16 @@ router = APIRouter(
 # Endpoints para Sectores Industriales
 @router.get("/sectores/", response_model=List[schemas.SectorIndustrial])
 def listar_sectores(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
+    incluir_total: bool = False,
     db: Session = Depends(get_db)
 ):
-    return db.query(models.SectorIndustrial).offset(skip).limit(limit).all()
+    pagina = paginar(db.query(models.SectorIndustrial), models.SectorIndustrial, limit, cursor, offset=skip)
+    cabeceras_pagina(response, pagina, total_tabla(db, models.SectorIndustrial) if incluir_total else None)
+    return pagina.filas
 
 @router.post("/sectores/", response_model=schemas.SectorIndustrial)
 def crear_sector(
@@ -90,11 +100,16 @@ def importar_sectores(
 # Endpoints para Benchmarks
 @router.get("/benchmarks/", response_model=List[schemas.Benchmark])
 def listar_benchmarks(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
+    incluir_total: bool = False,
     db: Session = Depends(get_db)
 ):
-    return db.query(models.Benchmark).offset(skip).limit(limit).all()
+    pagina = paginar(db.query(models.Benchmark), models.Benchmark, limit, cursor, offset=skip)
+    cabeceras_pagina(response, pagina, total_tabla(db, models.Benchmark) if incluir_total else None)
+    return pagina.filas
 
 @router.post("/benchmarks/", response_model=schemas.Benchmark)
 def crear_benchmark(
@@ -107,6 +122,16 @@ def crear_benchmark(
     db.refresh(db_benchmark)
     return db_benchmark
 
+# Estado del pool de hashing de contraseñas
+@router.get("/metricas/hashing")
+def metricas_hashing():
+    return estadisticas_hashing()
+
+# Estado de la caché de tokens verificados
+@router.get("/metricas/tokens")
+def metricas_tokens():
+    return estadisticas_tokens()
+
 @router.get("/benchmarks/sector/{sector_id}", response_model=List[schemas.Benchmark])
 def obtener_benchmarks_sector(
     sector_id: int,
@@ -117,11 +142,16 @@ def obtener_benchmarks_sector(
 # Endpoints para Tipos de Equipos
 @router.get("/equipos/", response_model=List[schemas.TipoEquipo])
 def listar_equipos(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
+    incluir_total: bool = False,
     db: Session = Depends(get_db)
 ):
-    return db.query(models.TipoEquipo).offset(skip).limit(limit).all()
+    pagina = paginar(db.query(models.TipoEquipo), models.TipoEquipo, limit, cursor, offset=skip)
+    cabeceras_pagina(response, pagina, total_tabla(db, models.TipoEquipo) if incluir_total else None)
+    return pagina.filas
 
 @router.post("/equipos/", response_model=schemas.TipoEquipo)
 def crear_equipo(
@@ -152,11 +182,16 @@ def registrar_eficiencia(
 # Endpoints para Plantillas de Recomendaciones
 @router.get("/recomendaciones/", response_model=List[schemas.PlantillaRecomendacion])
 def listar_plantillas(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
+    incluir_total: bool = False,
     db: Session = Depends(get_db)
 ):
-    return db.query(models.PlantillaRecomendacion).offset(skip).limit(limit).all()
+    pagina = paginar(db.query(models.PlantillaRecomendacion), models.PlantillaRecomendacion, limit, cursor, offset=skip)
+    cabeceras_pagina(response, pagina, total_tabla(db, models.PlantillaRecomendacion) if incluir_total else None)
+    return pagina.filas
 
 @router.post("/recomendaciones/", response_model=schemas.PlantillaRecomendacion)
 def crear_plantilla(
@@ -167,6 +202,7 @@ def crear_plantilla(
     db.add(db_plantilla)
     db.commit()
     db.refresh(db_plantilla)
+    recargar_plantillas(db, forzar=True)
     return db_plantilla
 
 @router.get("/recomendaciones/categoria/{categoria}", response_model=List[schemas.PlantillaRecomendacion])
@@ -199,6 +235,8 @@ def actualizar_parametros(
     db_parametro.updated_at = datetime.utcnow()
     db.commit()
     db.refresh(db_parametro)
+    # Aplicar el cambio de inmediato en este worker; el resto lo detecta por sondeo
+    recargar_parametros(db, forzar=True)
     return db_parametro
 
 # Endpoints para Exportación
@@ -7,7 +7,10 @@ import jwt
 import hashlib
 import secrets
 import os
+import threading
 from passlib.context import CryptContext
+from ..utils.hashing import ejecutar_hash, PoolSaturado, REINTENTAR_EN
+from ..utils.tokens import tokens_admin
 
 router = APIRouter(prefix="/admin/auth", tags=["Admin Authentication"])
 
@@ -21,10 +24,23 @@ pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 security = HTTPBearer()
 
 # Credenciales de administrador (en producción, esto debería estar en base de datos)
+# ADMIN_PASSWORD_HASH permite entregar el hash bcrypt ya calculado; si no existe,
+# ADMIN_PASSWORD se hashea una sola vez en el primer login (no al importar el módulo)
 ADMIN_CREDENTIALS = {
     "username": os.getenv("ADMIN_USERNAME", "admin_audite"),
-    "password_hash": pwd_context.hash(os.getenv("ADMIN_PASSWORD", "AuditE2024!SecureAdmin#2024"))
+    "password_hash": os.getenv("ADMIN_PASSWORD_HASH") or None
 }
+_admin_hash_lock = threading.Lock()
+
+def get_admin_password_hash() -> str:
+    """Hash de la contraseña de administrador, calculado perezosamente y cacheado"""
+    if ADMIN_CREDENTIALS["password_hash"] is None:
+        with _admin_hash_lock:
+            if ADMIN_CREDENTIALS["password_hash"] is None:
+                ADMIN_CREDENTIALS["password_hash"] = pwd_context.hash(
+                    os.getenv("ADMIN_PASSWORD", "AuditE2024!SecureAdmin#2024")
+                )
+    return ADMIN_CREDENTIALS["password_hash"]
 
 # Modelos
 class AdminLoginRequest(BaseModel):
@@ -44,6 +60,9 @@ class AdminTokenData(BaseModel):
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
+def verify_admin_password(plain_password: str) -> bool:
+    return verify_password(plain_password, get_admin_password_hash())
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -58,6 +77,10 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
 
 def verify_admin_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
     """Verificar token JWT de administrador"""
+    username = tokens_admin.obtener(credentials.credentials)
+    if username is not None:
+        return username
+    
     try:
         payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
         username: str = payload.get("sub")
@@ -78,7 +101,8 @@ def verify_admin_token(credentials: HTTPAuthorizationCredentials = Depends(secur
                 detail="Token expirado",
                 headers={"WWW-Authenticate": "Bearer"},
             )
-            
+        
+        tokens_admin.guardar(credentials.credentials, username, exp_timestamp)
         return username
         
     except jwt.PyJWTError:
@@ -88,14 +112,30 @@ def verify_admin_token(credentials: HTTPAuthorizationCredentials = Depends(secur
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+def token_admin_valido(token: str) -> bool:
+    """Verifica un token de administrador recibido fuera de Authorization (p.ej. en middlewares)"""
+    try:
+        verify_admin_token(HTTPAuthorizationCredentials(scheme="Bearer", credentials=token))
+        return True
+    except HTTPException:
+        return False
+
 # Endpoints
 @router.post("/login", response_model=AdminLoginResponse)
 async def admin_login(credentials: AdminLoginRequest):
     """Autenticar administrador y generar token JWT"""
     
-    # Verificar credenciales
-    if (credentials.username != ADMIN_CREDENTIALS["username"] or 
-        not verify_password(credentials.password, ADMIN_CREDENTIALS["password_hash"])):
+    # Verificar credenciales (bcrypt fuera del event loop)
+    try:
+        password_valido = await ejecutar_hash(verify_admin_password, credentials.password)
+    except PoolSaturado:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Demasiadas solicitudes de autenticación, intente nuevamente",
+            headers={"Retry-After": str(REINTENTAR_EN)},
+        )
+    
+    if credentials.username != ADMIN_CREDENTIALS["username"] or not password_valido:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Credenciales incorrectas",
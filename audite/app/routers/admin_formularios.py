@@ -13,6 +13,7 @@ from .. import crud, schemas
 from ..routers.admin_auth import verify_admin_token
 from ..utils.conditional_logic import validar_dependencias_pregunta, obtener_preguntas_dependientes
 from ..utils.sugerencias_industria import mapear_respuestas_a_templates
+from ..utils.respuestas_json import RespuestaJSON, fila_a_dict
 
 router = APIRouter(prefix="/api/admin", tags=["Admin - Formularios por Industria"])
 
@@ -614,7 +615,7 @@ async def admin_estadisticas_formulario(
         )
 
 
-@router.get("/respuestas/{formulario_id}")
+@router.get("/respuestas/{formulario_id}", response_class=RespuestaJSON)
 async def admin_respuestas_formulario(
     formulario_id: int,
     limit: int = 100,
@@ -638,14 +639,16 @@ async def admin_respuestas_formulario(
         if session_id:
             # Respuestas de una sesión específica
             respuestas = crud.get_respuestas_by_session(db, session_id)
-            respuestas_filtradas = [r for r in respuestas 
-                                  if crud.get_pregunta_by_id(db, r.pregunta_id).formulario_id == formulario_id]
-            return {
+            ids_preguntas = {
+                p.id for p in crud.get_preguntas_by_formulario(db, formulario_id, solo_activas=False)
+            }
+            respuestas_filtradas = [fila_a_dict(r) for r in respuestas if r.pregunta_id in ids_preguntas]
+            return RespuestaJSON({
                 "session_id": session_id,
                 "formulario_id": formulario_id,
                 "total_respuestas": len(respuestas_filtradas),
                 "respuestas": respuestas_filtradas
-            }
+            })
         else:
             # Implementar función para obtener todas las respuestas de un formulario
             # Esta funcionalidad requeriría una nueva función en crud.py
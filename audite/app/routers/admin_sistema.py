@@ -0,0 +1,206 @@
+"""
+Router administrativo de diagnóstico del sistema.
+Expone el registro de consultas lentas y el perfilador por muestreo del worker
+que atiende la petición, y las operaciones de mantenimiento que recorren tablas
+completas (sketches de percentiles y recálculo masivo de resultados) o que
+cambian el estado de otros usuarios.
+"""
+
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from datetime import datetime
+import asyncio
+import logging
+import os
+
+from .. import models
+from ..database import get_db
+from ..routers.admin_auth import verify_admin_token
+from ..utils import consultas_lentas, perfilador, recalculo
+from ..utils.benchmarking import recalcular_sketches
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(
+    prefix="/api/admin/sistema",
+    tags=["Admin - Sistema"],
+    dependencies=[Depends(verify_admin_token)]
+)
+
+
+# ============================================================================
+# CONSULTAS LENTAS
+# ============================================================================
+
+@router.get("/consultas-lentas")
+def listar_consultas_lentas(
+    huella: Optional[str] = None,
+    limite: int = Query(50, ge=1, le=500)
+):
+    """Consultas lentas más recientes de este worker, opcionalmente filtradas por huella"""
+    return {
+        "habilitado": consultas_lentas.HABILITADO,
+        "umbral_ms": consultas_lentas.UMBRAL_MS,
+        "consultas": consultas_lentas.registro.entradas(huella, limite),
+    }
+
+
+@router.get("/consultas-lentas/resumen")
+def resumen_consultas_lentas():
+    """Consultas lentas agrupadas por huella, ordenadas por tiempo total"""
+    return consultas_lentas.registro.resumen()
+
+
+@router.delete("/consultas-lentas")
+def limpiar_consultas_lentas():
+    consultas_lentas.registro.limpiar()
+    return {"message": "Registro de consultas lentas vaciado"}
+
+
+# ============================================================================
+# PERFILADOR POR MUESTREO
+# ============================================================================
+
+def _archivo_colapsado(contenido: str, nombre: str) -> PlainTextResponse:
+    return PlainTextResponse(
+        contenido,
+        headers={"Content-Disposition": f'attachment; filename="{nombre}.collapsed"'}
+    )
+
+
+@router.get("/perfil")
+async def perfilar_worker(
+    segundos: float = Query(10, gt=0, le=perfilador.DURACION_MAXIMA),
+    intervalo_ms: float = Query(perfilador.INTERVALO_MS, ge=1, le=1000),
+    ociosos: bool = False
+):
+    """
+    Muestrea las pilas de este worker durante `segundos` y devuelve un archivo
+    collapsed-stack (flamegraph.pl, speedscope).
+    """
+    loop = asyncio.get_running_loop()
+    try:
+        muestreador = await loop.run_in_executor(
+            None, perfilador.perfilar, segundos, intervalo_ms, ociosos
+        )
+    except perfilador.PerfiladorOcupado:
+        raise HTTPException(status_code=409, detail="Ya hay una sesión de perfilado en curso en este worker")
+    nombre = f"perfil-{os.getpid()}-{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}"
+    return _archivo_colapsado(muestreador.colapsado(), nombre)
+
+
+@router.get("/perfiles")
+def listar_perfiles():
+    """Perfiles de peticiones individuales (cabecera X-Profile) guardados en este worker"""
+    return perfilador.perfiles.listar()
+
+
+@router.get("/perfiles/{perfil_id}")
+def obtener_perfil(perfil_id: str):
+    perfil = perfilador.perfiles.obtener(perfil_id)
+    if perfil is None:
+        raise HTTPException(status_code=404, detail="Perfil no encontrado en este worker")
+    return _archivo_colapsado(perfil[1], f"perfil-{perfil_id}")
+
+
+# ============================================================================
+# SKETCHES DE PERCENTILES
+# ============================================================================
+
+def _ejecutar_recalculo_sketches():
+    from ..database import SessionLocal
+    db = SessionLocal()
+    try:
+        recalcular_sketches(db)
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error recalculando sketches de benchmarking: {e}")
+    finally:
+        db.close()
+
+
+@router.post("/benchmarks/percentiles/recalcular", status_code=202)
+def recalcular_percentiles(background_tasks: BackgroundTasks):
+    """Recorre las tablas de auditorías en segundo plano; la respuesta no espera el recálculo"""
+    background_tasks.add_task(_ejecutar_recalculo_sketches)
+    return {"message": "Recálculo de sketches de percentiles iniciado"}
+
+
+# ============================================================================
+# RECÁLCULO MASIVO DE RESULTADOS ALMACENADOS
+# ============================================================================
+
+def _ejecutar_recalculo(trabajo: str, tablas: List[str]):
+    from ..database import SessionLocal
+    db = SessionLocal()
+    try:
+        recalculo.recalcular_todo(db, trabajo, tablas)
+        recalcular_sketches(db)
+    finally:
+        db.close()
+
+
+@router.post("/recalculo/{tabla}", status_code=202)
+def iniciar_recalculo(
+    tabla: str,
+    background_tasks: BackgroundTasks,
+    trabajo: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """Lanza el recálculo en segundo plano; rechaza el lanzamiento si ya hay uno en curso"""
+    if tabla != "todas" and tabla not in recalculo.TABLAS:
+        raise HTTPException(status_code=404, detail="Tabla no encontrada")
+    en_curso = recalculo.trabajo_en_curso(db)
+    if en_curso is not None:
+        raise HTTPException(status_code=409, detail=f"Ya hay un recálculo en curso: {en_curso}")
+    tablas = list(recalculo.TABLAS) if tabla == "todas" else [tabla]
+    trabajo = trabajo or f"admin-{datetime.utcnow():%Y%m%d%H%M%S}"
+    recalculo.reservar_trabajo(db, trabajo, tablas)
+    background_tasks.add_task(_ejecutar_recalculo, trabajo, tablas)
+    return {"message": "Recálculo iniciado", "trabajo": trabajo, "tablas": tablas}
+
+
+@router.get("/recalculo/estado")
+def estado_recalculo(
+    trabajo: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    query = db.query(models.RecalculoCheckpoint)
+    if trabajo:
+        query = query.filter(models.RecalculoCheckpoint.trabajo == trabajo)
+    checkpoints = query.order_by(models.RecalculoCheckpoint.updated_at.desc()).limit(100).all()
+    return [
+        {
+            "trabajo": c.trabajo,
+            "tabla": c.tabla,
+            "desde_id": c.desde_id,
+            "hasta_id": c.hasta_id,
+            "ultimo_id": c.ultimo_id,
+            "procesados": c.procesados,
+            "estado": c.estado,
+            "error": c.error,
+            "updated_at": c.updated_at,
+        }
+        for c in checkpoints
+    ]
+
+
+# ============================================================================
+# USUARIOS
+# ============================================================================
+
+@router.put("/usuarios/{usuario_id}/desactivar")
+def desactivar_usuario(
+    usuario_id: int,
+    db: Session = Depends(get_db)
+):
+    """Desactiva al usuario y revoca sus tokens (también los ya verificados en caché)"""
+    usuario = db.query(models.User).filter(models.User.id == usuario_id).first()
+    if not usuario:
+        raise HTTPException(status_code=404, detail="Usuario no encontrado")
+    usuario.is_active = False
+    usuario.token_version = (usuario.token_version or 0) + 1
+    db.commit()
+    return {"message": "Usuario desactivado", "id": usuario_id}
@@ -5,6 +5,7 @@ from typing import List, Dict
 from sqlalchemy.sql import func
 
 from app.routers.auth import get_current_user
+from ..utils.tokens import Principal
 from .. import models, schemas
 from ..database import get_db
 import os
@@ -58,7 +59,7 @@ async def load_default_data(db: Session = Depends(get_db)):
 async def create_industry_type(
     industry_type: schemas.AgroIndustryTypeCreate,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Crea un nuevo tipo de industria agrícola."""
     db_industry_type = models.AgroIndustryType(**industry_type.model_dump())
@@ -95,7 +96,7 @@ async def update_industry_type(
     type_id: int,
     industry_type: schemas.AgroIndustryTypeCreate,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Actualiza un tipo de industria agrícola existente."""
     db_industry_type = db.query(models.AgroIndustryType).filter(models.AgroIndustryType.id == type_id).first()
@@ -113,7 +114,7 @@ async def update_industry_type(
 async def delete_industry_type(
     type_id: int,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Elimina un tipo de industria agrícola."""
     db_industry_type = db.query(models.AgroIndustryType).filter(models.AgroIndustryType.id == type_id).first()
@@ -128,7 +129,7 @@ async def delete_industry_type(
 async def create_equipment(
     equipment: schemas.AgroEquipmentCreate,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Crea un nuevo equipo agrícola."""
     db_equipment = models.AgroEquipment(**equipment.model_dump())
@@ -165,7 +166,7 @@ async def update_equipment(
     equipment_id: int,
     equipment: schemas.AgroEquipmentCreate,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Actualiza un equipo agrícola existente."""
     db_equipment = db.query(models.AgroEquipment).filter(models.AgroEquipment.id == equipment_id).first()
@@ -183,7 +184,7 @@ async def update_equipment(
 async def delete_equipment(
     equipment_id: int,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Elimina un equipo agrícola."""
     db_equipment = db.query(models.AgroEquipment).filter(models.AgroEquipment.id == equipment_id).first()
@@ -198,7 +199,7 @@ async def delete_equipment(
 async def create_process(
     process: schemas.AgroProcessCreate,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Crea un nuevo proceso agrícola."""
     process_data = process.model_dump(exclude={'productos'})
@@ -236,7 +237,7 @@ async def update_process(
     process_id: int,
     process: schemas.AgroProcessCreate,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Actualiza un proceso agrícola existente."""
     db_process = db.query(models.AgroProcess).filter(models.AgroProcess.id == process_id).first()
@@ -255,7 +256,7 @@ async def update_process(
 async def delete_process(
     process_id: int,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Elimina un proceso agrícola."""
     db_process = db.query(models.AgroProcess).filter(models.AgroProcess.id == process_id).first()
@@ -270,7 +271,7 @@ async def delete_process(
 async def create_equipment_category(
     category: schemas.AgroEquipmentCategoryCreate,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Crea una nueva categoría de equipo agrícola."""
     db_category = models.AgroEquipmentCategory(**category.model_dump())
@@ -307,7 +308,7 @@ async def update_equipment_category(
     category_id: int,
     category: schemas.AgroEquipmentCategoryCreate,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Actualiza una categoría de equipo existente."""
     db_category = db.query(models.AgroEquipmentCategory).filter(models.AgroEquipmentCategory.id == category_id).first()
@@ -325,7 +326,7 @@ async def update_equipment_category(
 async def delete_equipment_category(
     category_id: int,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Elimina una categoría de equipo."""
     db_category = db.query(models.AgroEquipmentCategory).filter(models.AgroEquipmentCategory.id == category_id).first()
@@ -340,7 +341,7 @@ async def delete_equipment_category(
 async def create_etapa_subsector(
     etapa_subsector: schemas.AgroEtapaSubsectorCreate,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Crea una nueva relación etapa-subsector."""
     db_etapa_subsector = models.AgroEtapaSubsector(**etapa_subsector.model_dump())
@@ -382,7 +383,7 @@ async def update_etapa_subsector(
     etapa_subsector_id: int,
     etapa_subsector: schemas.AgroEtapaSubsectorCreate,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Actualiza una relación etapa-subsector existente."""
     db_etapa_subsector = db.query(models.AgroEtapaSubsector).filter(models.AgroEtapaSubsector.id == etapa_subsector_id).first()
@@ -400,7 +401,7 @@ async def update_etapa_subsector(
 async def delete_etapa_subsector(
     etapa_subsector_id: int,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Elimina una relación etapa-subsector."""
     db_etapa_subsector = db.query(models.AgroEtapaSubsector).filter(models.AgroEtapaSubsector.id == etapa_subsector_id).first()
@@ -415,7 +416,7 @@ async def delete_etapa_subsector(
 def create_proceso_producto(
     proceso_producto: schemas.ProcesoProducto,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Crear una nueva relación proceso-producto con consumo de referencia"""
     proceso = db.query(models.AgroProcess).filter(models.AgroProcess.id == proceso_producto.proceso_id).first()
@@ -435,7 +436,7 @@ def create_proceso_producto(
 def get_productos_por_proceso(
     proceso_id: int,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Obtener todos los productos asociados a un proceso"""
     proceso = db.query(models.AgroProcess).filter(models.AgroProcess.id == proceso_id).first()
@@ -449,7 +450,7 @@ def get_productos_por_proceso(
 def create_consumo_por_fuente(
     consumo: schemas.ConsumoPorFuente,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Registrar un nuevo consumo por fuente de energía"""
     auditoria = db.query(models.AuditoriaAgro).filter(models.AuditoriaAgro.id == consumo.auditoria_id).first()
@@ -475,7 +476,7 @@ def create_consumo_por_fuente(
 def get_consumos_por_auditoria(
     auditoria_id: int,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Obtener todos los consumos registrados para una auditoría"""
     auditoria = db.query(models.AuditoriaAgro).filter(models.AuditoriaAgro.id == auditoria_id).first()
@@ -489,7 +490,7 @@ def get_consumos_por_auditoria(
 def get_fuentes_energia_equipo(
     equipo_id: int,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Obtener las fuentes de energía disponibles para un equipo"""
     equipo = db.query(models.AgroEquipment).filter(models.AgroEquipment.id == equipo_id).first()
@@ -502,7 +503,7 @@ def get_fuentes_energia_equipo(
 def get_consumo_total_por_fuente(
     auditoria_id: int,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Calcular el consumo total por fuente de energía para una auditoría"""
     auditoria = db.query(models.AuditoriaAgro).filter(models.AuditoriaAgro.id == auditoria_id).first()
@@ -523,7 +524,7 @@ def get_consumo_total_por_fuente(
 async def get_proceso_producto_by_id(
     proceso_producto_id: int,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Obtener una relación proceso-producto específica por su ID."""
     query = text("SELECT * FROM proceso_producto WHERE id = :id")
@@ -536,7 +537,7 @@ async def get_proceso_producto_by_id(
 async def get_consumo_por_fuente_by_id(
     consumo_id: int,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Obtener un registro de consumo por fuente específico por su ID."""
     query = text("SELECT * FROM consumo_por_fuente WHERE id = :id")
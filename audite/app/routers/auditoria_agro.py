@@ -1,10 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from .. import models, schemas, crud
 from ..database import get_db
 from . import auth
 from .auth import get_current_user
+from ..utils.tokens import Principal
+from ..utils.benchmarking import obtener_percentil, grupo_agro, METRICA_AGRO
+from ..utils import recomendaciones as reglas_recomendaciones
+from .. import metrics
+from ..utils.paginacion import cabeceras_pagina, paginar, total_tabla
 
 router = APIRouter(
     prefix="/auditoria-agro",
@@ -14,7 +19,7 @@ router = APIRouter(
 
 async def get_current_user_auditoria(
     auditoria_id: int,
-    current_user: models.User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ) -> models.AuditoriaAgro:
     """Verifica que la auditoría pertenezca al usuario actual"""
@@ -28,7 +33,7 @@ async def get_current_user_auditoria(
 @router.post("/", response_model=schemas.AuditoriaAgro)
 def create_auditoria_agro(
     auditoria: schemas.AuditoriaAgroCreate,
-    current_user: models.User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -57,7 +62,11 @@ def create_auditoria_agro(
     db_auditoria.costo_energia_por_produccion = db_auditoria.calcular_costo_energia_por_produccion()
     
     # Obtener benchmark y comparaciones
-    db_auditoria.comparacion_benchmark = db_auditoria.get_benchmark_sector()
+    comparacion = db_auditoria.get_benchmark_sector()
+    percentil = obtener_percentil(db, METRICA_AGRO, grupo_agro(db_auditoria.tipo_cultivo), db_auditoria.kpi_por_area)
+    if percentil is not None:
+        comparacion["percentil_sector"] = percentil
+    db_auditoria.comparacion_benchmark = comparacion
     
     # Guardar en la base de datos
     db.add(db_auditoria)
@@ -65,22 +74,27 @@ def create_auditoria_agro(
     db.refresh(db_auditoria)
     
     # Generar recomendaciones basadas en los datos
-    recomendaciones = generar_recomendaciones_agro(db_auditoria)
-    for recomendacion in recomendaciones:
-        db_recomendacion = models.Recomendacion(
-            **recomendacion.dict(),
-            auditoria_agro_id=db_auditoria.id
-        )
-        db.add(db_recomendacion)
+    reglas_recomendaciones.guardar_recomendaciones(db, "agro", [db_auditoria])
     
     db.commit()
     db.refresh(db_auditoria)
+    metrics.DIAGNOSTICOS_CREADOS.labels(tipo="agro").inc()
     
     return db_auditoria
 
 @router.get("/", response_model=List[schemas.AuditoriaAgro])
-def read_auditorias_agro(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    auditorias = db.query(models.AuditoriaAgro).offset(skip).limit(limit).all()
+def read_auditorias_agro(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    incluir_total: bool = False,
+    db: Session = Depends(get_db)
+):
+    # Paginación por cursor (X-Next-Cursor); skip solo se usa sin cursor
+    pagina = paginar(db.query(models.AuditoriaAgro), models.AuditoriaAgro, limit, cursor, offset=skip)
+    cabeceras_pagina(response, pagina, total_tabla(db, models.AuditoriaAgro) if incluir_total else None)
+    auditorias = pagina.filas
     
     for auditoria in auditorias:
         # Calcular todos los campos si no existen
@@ -181,7 +195,7 @@ def read_auditoria_agro(auditoria_id: int, db: Session = Depends(get_db)):
 async def update_auditoria_agro(
     auditoria_id: int,
     auditoria: schemas.AuditoriaAgroUpdate,
-    current_user: models.User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -206,92 +220,19 @@ async def update_auditoria_agro(
     crud.delete_recomendaciones_auditoria(db, auditoria_id, tipo_auditoria='agro')
     
     # Generar nuevas recomendaciones
-    recomendaciones = generar_recomendaciones_agro(updated_auditoria)
-    for recomendacion in recomendaciones:
-        db_recomendacion = models.Recomendacion(
-            **recomendacion.dict(),
-            auditoria_agro_id=updated_auditoria.id
-        )
-        db.add(db_recomendacion)
+    reglas_recomendaciones.guardar_recomendaciones(db, "agro", [updated_auditoria])
+    db.commit()
+    db.refresh(updated_auditoria)
     
     return updated_auditoria
 
 @router.delete("/{auditoria_id}")
 async def delete_auditoria_agro(
     auditoria_id: int,
-    current_user: models.User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Elimina una auditoría agrícola y sus recomendaciones asociadas"""
     auditoria = await get_current_user_auditoria(auditoria_id, current_user, db)
     crud.delete_auditoria_agro(db, auditoria_id)
     return None
-
-def generar_recomendaciones_agro(auditoria: models.AuditoriaAgro) -> List[schemas.RecomendacionBase]:
-    """Genera recomendaciones basadas en los datos de la auditoría agrícola"""
-    recomendaciones = []
-    
-    # Análisis de eficiencia de riego
-    if auditoria.sistemas_riego:
-        tipo_riego = auditoria.sistemas_riego.get('tipo', '').lower()
-        if tipo_riego == 'gravedad' or tipo_riego == 'aspersores':
-            recomendaciones.append(schemas.RecomendacionBase(
-                categoria="Riego",
-                titulo="Modernización del sistema de riego",
-                descripcion="Implementar un sistema de riego por goteo para mejorar la eficiencia",
-                ahorro_estimado=30.0,
-                costo_implementacion="Alto",
-                periodo_retorno=24.0,
-                prioridad=1
-            ))
-    
-    # Análisis de equipos
-    if auditoria.equipos:
-        if not auditoria.tiene_mantenimiento:
-            recomendaciones.append(schemas.RecomendacionBase(
-                categoria="Equipos",
-                titulo="Programa de mantenimiento preventivo",
-                descripcion="Implementar un programa de mantenimiento para optimizar el consumo de combustible",
-                ahorro_estimado=15.0,
-                costo_implementacion="Medio",
-                periodo_retorno=12.0,
-                prioridad=2
-            ))
-    
-    # Análisis de automatización
-    if not auditoria.tiene_automatizacion and auditoria.area_total > 50:
-        recomendaciones.append(schemas.RecomendacionBase(
-            categoria="Automatización",
-            titulo="Sistema de control automático",
-            descripcion="Implementar sistemas de control y monitoreo automático para optimizar el consumo",
-            ahorro_estimado=20.0,
-            costo_implementacion="Alto",
-            periodo_retorno=36.0,
-            prioridad=3
-        ))
-    
-    # Análisis de consumo eléctrico
-    if auditoria.consumo_electrico > 100000:
-        recomendaciones.append(schemas.RecomendacionBase(
-            categoria="Energía Renovable",
-            titulo="Sistema fotovoltaico",
-            descripcion="Instalar sistema de energía solar para reducir consumo eléctrico",
-            ahorro_estimado=25.0,
-            costo_implementacion="Alto",
-            periodo_retorno=48.0,
-            prioridad=2
-        ))
-    
-    # Análisis de eficiencia energética
-    if auditoria.calcular_kpi_area() > auditoria.get_benchmark_sector()["consumo_promedio_sector"]:
-        recomendaciones.append(schemas.RecomendacionBase(
-            categoria="Eficiencia Energética",
-            titulo="Auditoría energética detallada",
-            descripcion="Realizar una auditoría energética detallada para identificar oportunidades de mejora",
-            ahorro_estimado=20.0,
-            costo_implementacion="Medio",
-            periodo_retorno=12.0,
-            prioridad=1
-        ))
-    
-    return recomendaciones 
\ No newline at end of file
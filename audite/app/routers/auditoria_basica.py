@@ -1,8 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from .. import models, schemas
 from ..database import get_db
+from ..utils.benchmarking import obtener_percentil, grupo_basica, METRICA_BASICA
+from ..utils import recomendaciones as reglas_recomendaciones
+from .. import metrics
+from ..utils.paginacion import cabeceras_pagina, paginar, total_tabla
 
 router = APIRouter(
     prefix="/auditoria-basica",
@@ -32,44 +36,41 @@ def create_auditoria_basica(
     db_auditoria.potencial_ahorro = db_auditoria.calcular_potencial_ahorro() * 100  # Convertir a porcentaje
     
     # Calcular puntuación de eficiencia
-    base_puntuacion = 70.0
-    if db_auditoria.tiene_auditoria_previa:
-        base_puntuacion += 5
-    if db_auditoria.renewable_energy:
-        base_puntuacion += 10
-    if db_auditoria.equipment_age == 'menos_5_anos':
-        base_puntuacion += 5
-    db_auditoria.puntuacion_eficiencia = min(base_puntuacion, 100)
+    db_auditoria.puntuacion_eficiencia = db_auditoria.calcular_puntuacion_eficiencia()
     
     # Calcular distribución del consumo usando el nuevo método
     db_auditoria.distribucion_consumo = db_auditoria.calcular_distribucion_consumo()
     
-    # Comparación con benchmark del sector (podríamos mejorar esto con datos reales)
-    benchmarks = {
-        'industrial': 150000.0,
-        'comercial': 100000.0,
-        'alimentacion': 200000.0,
-        'otros': 100000.0
-    }
-    consumo_promedio = benchmarks.get(db_auditoria.sector.lower(), benchmarks['otros'])
-    db_auditoria.comparacion_benchmark = {
-        "consumo_promedio_sector": consumo_promedio,
-        "diferencia_porcentual": ((db_auditoria.consumo_anual - consumo_promedio) / consumo_promedio) * 100
-    }
-    
-    # Generar recomendaciones
-    recomendaciones = generar_recomendaciones_basicas(auditoria)
-    db_auditoria.recomendaciones = recomendaciones
+    # Comparación con benchmark del sector
+    db_auditoria.comparacion_benchmark = db_auditoria.get_benchmark_sector()
+    percentil = obtener_percentil(db, METRICA_BASICA, grupo_basica(db_auditoria.sector), db_auditoria.intensidad_energetica)
+    if percentil is not None:
+        db_auditoria.comparacion_benchmark["percentil_sector"] = percentil
     
     # Guardar en la base de datos
     db.add(db_auditoria)
+    db.flush()
+    
+    # Generar recomendaciones
+    reglas_recomendaciones.guardar_recomendaciones(db, "basica", [db_auditoria])
     db.commit()
     db.refresh(db_auditoria)
+    metrics.DIAGNOSTICOS_CREADOS.labels(tipo="basica").inc()
     return db_auditoria
 
 @router.get("/", response_model=List[schemas.AuditoriaBasica])
-def read_auditorias_basicas(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    auditorias = db.query(models.AuditoriaBasica).offset(skip).limit(limit).all()
+def read_auditorias_basicas(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    incluir_total: bool = False,
+    db: Session = Depends(get_db)
+):
+    # Paginación por cursor (X-Next-Cursor); skip solo se usa sin cursor
+    pagina = paginar(db.query(models.AuditoriaBasica), models.AuditoriaBasica, limit, cursor, offset=skip)
+    cabeceras_pagina(response, pagina, total_tabla(db, models.AuditoriaBasica) if incluir_total else None)
+    auditorias = pagina.filas
     
     # Asegurar valores por defecto para campos booleanos y calculados
     for auditoria in auditorias:
@@ -114,56 +115,3 @@ def read_auditoria_basica(auditoria_id: int, db: Session = Depends(get_db)):
     if db_auditoria is None:
         raise HTTPException(status_code=404, detail="Auditoría no encontrada")
     return db_auditoria
-
-def generar_recomendaciones_basicas(auditoria: schemas.AuditoriaBasicaCreate) -> List[models.Recomendacion]:
-    """Genera recomendaciones básicas basadas en los datos de la auditoría"""
-    recomendaciones = []
-    
-    # Recomendaciones basadas en el consumo anual
-    if auditoria.consumo_anual > 100000:
-        recomendaciones.append(models.Recomendacion(
-            categoria="Energías Renovables",
-            titulo="Instalación de sistemas de energía renovable",
-            descripcion="Considerar la instalación de paneles solares u otros sistemas de energía renovable para reducir el consumo de la red",
-            ahorro_estimado=30.0,
-            costo_implementacion="Alto",
-            periodo_retorno=48.0,
-            prioridad=2
-        ))
-    
-    # Recomendaciones basadas en las fuentes de energía
-    if "electricidad" in auditoria.fuentes_energia:
-        recomendaciones.extend([
-            models.Recomendacion(
-                categoria="Iluminación",
-                titulo="Cambio a iluminación LED",
-                descripcion="Reemplazar las luminarias existentes por tecnología LED de alta eficiencia",
-                ahorro_estimado=15.0,
-                costo_implementacion="Medio",
-                periodo_retorno=24.0,
-                prioridad=1
-            ),
-            models.Recomendacion(
-                categoria="Control",
-                titulo="Instalación de sensores de movimiento",
-                descripcion="Implementar sensores de movimiento para control automático de iluminación",
-                ahorro_estimado=10.0,
-                costo_implementacion="Bajo",
-                periodo_retorno=12.0,
-                prioridad=1
-            )
-        ])
-    
-    # Recomendaciones basadas en el tamaño de la instalación
-    if auditoria.tamano_instalacion > 500:
-        recomendaciones.append(models.Recomendacion(
-            categoria="Gestión",
-            titulo="Sistema de gestión energética",
-            descripcion="Implementar un sistema de gestión energética para monitoreo y control del consumo",
-            ahorro_estimado=20.0,
-            costo_implementacion="Medio",
-            periodo_retorno=36.0,
-            prioridad=2
-        ))
-    
-    return recomendaciones 
\ No newline at end of file
@@ -2,6 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException, status, Request
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
+from sqlalchemy import event
 from datetime import datetime, timedelta
 import jwt
 
@@ -9,6 +10,8 @@ from passlib.context import CryptContext
 from typing import Optional
 from .. import models, schemas
 from ..database import get_db
+from ..utils.hashing import ejecutar_hash, PoolSaturado, REINTENTAR_EN
+from ..utils.tokens import Principal, tokens_usuarios, invalidar_usuario, estado_usuario
 
 router = APIRouter(
     prefix="/auth",
@@ -30,12 +33,23 @@ def verify_password(plain_password, hashed_password):
 def get_password_hash(password):
     return pwd_context.hash(password)
 
-def authenticate_user(db: Session, email: str, password: str):
+async def authenticate_user(db: Session, email: str, password: str):
     user = db.query(models.User).filter(models.User.email == email).first()
-    if not user or not verify_password(password, user.hashed_password):
+    if not user or not await ejecutar_hash(verify_password, password, user.hashed_password):
         return False
     return user
 
+def _respuesta_saturado(request: Request) -> JSONResponse:
+    return JSONResponse(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        content={"detail": "Demasiadas solicitudes de autenticación, intente nuevamente"},
+        headers={
+            "Access-Control-Allow-Origin": request.headers.get("origin", "*"),
+            "Access-Control-Allow-Credentials": "true",
+            "Retry-After": str(REINTENTAR_EN),
+        },
+    )
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -46,7 +60,31 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+def create_user_token(user: models.User, expires_delta: Optional[timedelta] = None):
+    """Token con la identidad del usuario: email, id y versión de token"""
+    return create_access_token(
+        data={"sub": user.email, "uid": user.id, "tv": user.token_version or 0},
+        expires_delta=expires_delta
+    )
+
+@event.listens_for(models.User.is_active, "set")
+def _invalidar_tokens_usuario(target, value, oldvalue, initiator):
+    """Al desactivar un usuario se descartan sus tokens verificados en caché"""
+    if not value and target.id is not None:
+        invalidar_usuario(target.id)
+
+@event.listens_for(models.User.token_version, "set")
+def _invalidar_tokens_version(target, value, oldvalue, initiator):
+    """Al cambiar la versión de token se descartan los tokens anteriores en caché"""
+    if target.id is not None and value != oldvalue:
+        invalidar_usuario(target.id)
+
+async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> Principal:
+    # Token ya verificado: sin HMAC ni consulta a la base de datos
+    principal = tokens_usuarios.obtener(token)
+    if principal is not None:
+        return principal
+    
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -59,10 +97,23 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
             raise credentials_exception
     except jwt.InvalidTokenError:
         raise credentials_exception
-    user = db.query(models.User).filter(models.User.email == email).first()
-    if user is None:
-        raise credentials_exception
-    return user
+    
+    usuario_id = payload.get("uid")
+    if usuario_id is not None:
+        # Identidad en el token: solo se valida la versión contra el estado cacheado
+        estado = estado_usuario(db, usuario_id)
+        if estado is None or payload.get("tv", 0) != estado[0]:
+            raise credentials_exception
+        principal = Principal(id=usuario_id, email=email, is_active=estado[1])
+    else:
+        # Tokens emitidos antes de incluir uid
+        user = db.query(models.User).filter(models.User.email == email).first()
+        if user is None:
+            raise credentials_exception
+        principal = Principal(id=user.id, email=user.email, is_active=bool(user.is_active))
+    
+    tokens_usuarios.guardar(token, principal, payload.get("exp"), dueno=principal.id)
+    return principal
 
 @router.post("/register", response_model=schemas.User)
 async def register_user(request: Request, user: schemas.UserCreate, db: Session = Depends(get_db)):
@@ -81,9 +132,13 @@ async def register_user(request: Request, user: schemas.UserCreate, db: Session
             },
         )
     
+    try:
+        hashed_password = await ejecutar_hash(get_password_hash, user.password)
+    except PoolSaturado:
+        return _respuesta_saturado(request)
+    
     try:
         # Crear el nuevo usuario
-        hashed_password = get_password_hash(user.password)
         db_user = models.User(
             email=user.email,
             hashed_password=hashed_password,
@@ -123,7 +178,10 @@ async def login_for_access_token(
     """
     Obtiene un token de acceso JWT.
     """
-    user = authenticate_user(db, form_data.username, form_data.password)
+    try:
+        user = await authenticate_user(db, form_data.username, form_data.password)
+    except PoolSaturado:
+        return _respuesta_saturado(request)
     if not user:
         return JSONResponse(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -136,9 +194,7 @@ async def login_for_access_token(
         )
     
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": user.email}, expires_delta=access_token_expires
-    )
+    access_token = create_user_token(user, expires_delta=access_token_expires)
     
     return JSONResponse(
         content={"access_token": access_token, "token_type": "bearer"},
@@ -148,7 +204,7 @@ async def login_for_access_token(
         },
     )
 
-async def get_current_active_user(current_user: models.User = Depends(get_current_user)):
+async def get_current_active_user(current_user: Principal = Depends(get_current_user)):
     """
     Verifica que el usuario actual esté activo.
     """
@@ -7,6 +7,8 @@ import uuid
 from datetime import datetime
 
 from ..database import get_db
+from .. import metrics
+from ..utils import archivo_frio
 from ..models import (
     AutodiagnosticoPregunta, 
     AutodiagnosticoOpcion, 
@@ -31,6 +33,8 @@ from ..routers.auth import get_current_user
 
 # Importar el nuevo sistema de autenticación
 from ..routers.admin_auth import verify_admin_token
+from ..utils.respuestas_json import RespuestaJSON, fila_a_dict
+from ..utils.paginacion import paginar, total_tabla
 
 router = APIRouter(
     prefix="/autodiagnostico",
@@ -83,13 +87,15 @@ async def enviar_respuestas(
         
         respuestas_guardadas = []
         
+        # Verificar en una sola consulta que las preguntas existen
+        ids_preguntas = {r.pregunta_id for r in sesion_data.respuestas}
+        preguntas_existentes = {
+            fila.id for fila in db.query(AutodiagnosticoPregunta.id)
+            .filter(AutodiagnosticoPregunta.id.in_(ids_preguntas))
+        } if ids_preguntas else set()
+        
         for respuesta_data in sesion_data.respuestas:
-            # Verificar que la pregunta existe
-            pregunta = db.query(AutodiagnosticoPregunta)\
-                .filter(AutodiagnosticoPregunta.id == respuesta_data.pregunta_id)\
-                .first()
-            
-            if not pregunta:
+            if respuesta_data.pregunta_id not in preguntas_existentes:
                 raise HTTPException(
                     status_code=400, 
                     detail=f"Pregunta con ID {respuesta_data.pregunta_id} no encontrada"
@@ -113,6 +119,7 @@ async def enviar_respuestas(
             respuestas_guardadas.append(respuesta)
         
         db.commit()
+        metrics.FORMULARIOS_ENVIADOS.labels(formulario="autodiagnostico").inc()
         
         return {
             "message": "Respuestas guardadas exitosamente",
@@ -131,13 +138,7 @@ async def obtener_sesion(session_id: str, db: Session = Depends(get_db)):
     Obtiene las respuestas de una sesión específica.
     Endpoint público para revisar respuestas enviadas.
     """
-    respuestas = db.query(AutodiagnosticoRespuesta)\
-        .options(selectinload(AutodiagnosticoRespuesta.pregunta))\
-        .filter(AutodiagnosticoRespuesta.session_id == session_id)\
-        .all()
-    
-    if not respuestas:
-        raise HTTPException(status_code=404, detail="Sesión no encontrada")
+    respuestas = _respuestas_sesion(db, session_id)
     
     total_preguntas = db.query(AutodiagnosticoPregunta)\
         .filter(AutodiagnosticoPregunta.es_activa == True)\
@@ -152,26 +153,43 @@ async def obtener_sesion(session_id: str, db: Session = Depends(get_db)):
         completado=len(respuestas) >= total_preguntas
     )
 
-@router.get("/sugerencias/{session_id}", response_model=AutodiagnosticoObtenerSugerenciasResponse)
-async def obtener_sugerencias_sesion(session_id: str, db: Session = Depends(get_db)):
+def _respuestas_sesion(db: Session, session_id: str) -> List[AutodiagnosticoRespuesta]:
     """
-    Obtiene las sugerencias basadas en las respuestas de una sesión.
-    Endpoint público para mostrar las recomendaciones al usuario.
+    Respuestas de la sesión con sus preguntas y opciones (tres consultas, sin N+1),
+    más las que estén en el archivo frío si la sesión se archivó.
     """
     respuestas = db.query(AutodiagnosticoRespuesta)\
+        .options(
+            selectinload(AutodiagnosticoRespuesta.pregunta)
+            .selectinload(AutodiagnosticoPregunta.opciones)
+        )\
         .filter(AutodiagnosticoRespuesta.session_id == session_id)\
         .all()
     
+    respuestas = archivo_frio.combinar(respuestas, _respuestas_archivadas(db, session_id))
     if not respuestas:
         raise HTTPException(status_code=404, detail="Sesión no encontrada")
-    
+    return respuestas
+
+def _respuestas_archivadas(db: Session, session_id: str) -> List[AutodiagnosticoRespuesta]:
+    """Respuestas desde el archivo frío, con sus preguntas y opciones de la base"""
+    respuestas = archivo_frio.leer(db, "autodiagnostico_respuestas", session_id)
+    if respuestas:
+        preguntas = {
+            p.id: p for p in db.query(AutodiagnosticoPregunta)
+            .options(selectinload(AutodiagnosticoPregunta.opciones))
+            .filter(AutodiagnosticoPregunta.id.in_({r.pregunta_id for r in respuestas}))
+        }
+        for respuesta in respuestas:
+            respuesta.pregunta = preguntas.get(respuesta.pregunta_id)
+    return respuestas
+
+def _sugerencias_de(respuestas: List[AutodiagnosticoRespuesta]) -> List[AutodiagnosticoSugerencia]:
+    """Sugerencias de las opciones elegidas; no consulta la base"""
     sugerencias_dict = {}
     
     for respuesta in respuestas:
-        pregunta = db.query(AutodiagnosticoPregunta)\
-            .options(selectinload(AutodiagnosticoPregunta.opciones))\
-            .filter(AutodiagnosticoPregunta.id == respuesta.pregunta_id)\
-            .first()
+        pregunta = respuesta.pregunta
         
         if not pregunta:
             continue
@@ -195,7 +213,15 @@ async def obtener_sugerencias_sesion(session_id: str, db: Session = Depends(get_
                         sugerencia=opcion.sugerencia
                     )
 
-    sugerencias = list(sugerencias_dict.values())
+    return list(sugerencias_dict.values())
+
+@router.get("/sugerencias/{session_id}", response_model=AutodiagnosticoObtenerSugerenciasResponse)
+async def obtener_sugerencias_sesion(session_id: str, db: Session = Depends(get_db)):
+    """
+    Obtiene las sugerencias basadas en las respuestas de una sesión.
+    Endpoint público para mostrar las recomendaciones al usuario.
+    """
+    sugerencias = _sugerencias_de(_respuestas_sesion(db, session_id))
     
     return AutodiagnosticoObtenerSugerenciasResponse(
         session_id=session_id,
@@ -210,23 +236,15 @@ async def obtener_sesion_completa_con_sugerencias(session_id: str, db: Session =
     Obtiene las respuestas de una sesión junto con las sugerencias correspondientes.
     Endpoint público para mostrar resultados completos.
     """
-    # Obtener respuestas
-    respuestas = db.query(AutodiagnosticoRespuesta)\
-        .options(selectinload(AutodiagnosticoRespuesta.pregunta))\
-        .filter(AutodiagnosticoRespuesta.session_id == session_id)\
-        .all()
-    
-    if not respuestas:
-        raise HTTPException(status_code=404, detail="Sesión no encontrada")
-    
-    # Obtener sugerencias usando el endpoint existente
-    sugerencias_response = await obtener_sugerencias_sesion(session_id, db)
+    respuestas = _respuestas_sesion(db, session_id)
+    # Las sugerencias se calculan sobre las mismas respuestas ya cargadas
+    sugerencias = _sugerencias_de(respuestas)
     
     return AutodiagnosticoResultadosConSugerencias(
         session_id=session_id,
         respuestas=respuestas,
-        sugerencias=sugerencias_response.sugerencias,
-        total_sugerencias=len(sugerencias_response.sugerencias),
+        sugerencias=sugerencias,
+        total_sugerencias=len(sugerencias),
         created_at=respuestas[0].created_at
     )
 
@@ -524,17 +542,23 @@ async def admin_obtener_estadisticas(
         respuestas_mas_comunes=respuestas_mas_comunes
     )
 
-@router.get("/admin/respuestas")
+@router.get("/admin/respuestas", response_class=RespuestaJSON)
 async def admin_listar_respuestas(
     session_id: Optional[str] = None,
     pregunta_id: Optional[int] = None,
     limit: int = 100,
     offset: int = 0,
+    cursor: Optional[str] = None,
+    total_aproximado: bool = False,
     current_admin: str = Depends(verify_admin_token),
     db: Session = Depends(get_db)
 ):
     """
-    Lista respuestas con filtros opcionales (admin).
+    Lista respuestas con filtros opcionales (admin), de la más reciente a la más
+    antigua. Para avanzar se envía el `next_cursor` de la página anterior (offset
+    solo se usa sin cursor). `total` es un conteo exacto; con total_aproximado=true
+    y sin filtros es la estimación del planificador en PostgreSQL, que no recorre
+    la tabla.
     """
     query = db.query(AutodiagnosticoRespuesta)\
         .options(selectinload(AutodiagnosticoRespuesta.pregunta))
@@ -545,16 +569,18 @@ async def admin_listar_respuestas(
     if pregunta_id:
         query = query.filter(AutodiagnosticoRespuesta.pregunta_id == pregunta_id)
     
-    respuestas = query.order_by(desc(AutodiagnosticoRespuesta.created_at))\
-        .offset(offset)\
-        .limit(limit)\
-        .all()
+    pagina = paginar(query, AutodiagnosticoRespuesta, limit, cursor, offset=offset, descendente=True)
     
-    total = query.count()
+    if session_id or pregunta_id:
+        total, aproximado = query.count(), False
+    else:
+        total, aproximado = total_tabla(db, AutodiagnosticoRespuesta, aproximado=total_aproximado)
     
-    return {
-        "respuestas": respuestas,
+    return RespuestaJSON({
+        "respuestas": [fila_a_dict(r, relaciones=("pregunta",)) for r in pagina.filas],
         "total": total,
+        "total_aproximado": aproximado,
         "limit": limit,
-        "offset": offset
-    } 
\ No newline at end of file
+        "offset": offset,
+        "next_cursor": pagina.siguiente
+    }) 
\ No newline at end of file
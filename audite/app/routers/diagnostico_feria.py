@@ -3,6 +3,12 @@ from sqlalchemy.orm import Session
 from typing import List, Dict, Any
 from .. import models, schemas
 from ..database import get_db
+from ..utils.parametros import get_parametros
+from ..utils.benchmarking import obtener_percentil, grupo_feria, METRICA_FERIA
+from ..utils.reglas_feria import obtener_motor
+from .. import metrics
+from ..utils.respuestas_json import responder
+from ..utils import archivo_frio
 import uuid
 import random
 import string
@@ -31,92 +37,6 @@ BENCHMARKS = {
     "default": {"consumo": 500, "eficiencia": 0.75}
 }
 
-# Plantillas de recomendaciones por categoría
-RECOMENDACIONES_TEMPLATES = {
-    "equipos": [
-        {
-            "categoria": "equipos",
-            "titulo": "Actualización de sistemas de refrigeración",
-            "descripcion": "Reemplazar equipos de refrigeración antiguos por modelos eficientes con tecnología inverter puede reducir el consumo hasta un 40%.",
-            "ahorroEstimado": 0.25,  # 25%
-            "costoImplementacion": "alto",
-            "periodoRetorno": 24,
-            "prioridad": 4
-        },
-        {
-            "categoria": "equipos",
-            "titulo": "Mantenimiento preventivo de equipos críticos",
-            "descripcion": "Implementar un programa de mantenimiento preventivo para equipos con alto consumo energético para optimizar su eficiencia.",
-            "ahorroEstimado": 0.12,  # 12%
-            "costoImplementacion": "bajo",
-            "periodoRetorno": 6,
-            "prioridad": 5
-        }
-    ],
-    "gestion": [
-        {
-            "categoria": "gestion",
-            "titulo": "Sistema de monitoreo energético",
-            "descripcion": "Implementar un sistema de monitoreo energético en tiempo real para identificar consumos anómalos y oportunidades de ahorro.",
-            "ahorroEstimado": 0.15,  # 15%
-            "costoImplementacion": "medio",
-            "periodoRetorno": 12,
-            "prioridad": 4
-        },
-        {
-            "categoria": "gestion",
-            "titulo": "Capacitación del personal en eficiencia energética",
-            "descripcion": "Programa de capacitación para operadores y personal sobre buenas prácticas de uso energético y optimización de procesos.",
-            "ahorroEstimado": 0.08,  # 8%
-            "costoImplementacion": "bajo",
-            "periodoRetorno": 3,
-            "prioridad": 5
-        }
-    ],
-    "renovables": [
-        {
-            "categoria": "renovables",
-            "titulo": "Instalación de sistema fotovoltaico",
-            "descripcion": "Implementar un sistema solar fotovoltaico para autoconsumo que cubra parcialmente la demanda energética.",
-            "ahorroEstimado": 0.30,  # 30%
-            "costoImplementacion": "alto",
-            "periodoRetorno": 48,
-            "prioridad": 3
-        },
-        {
-            "categoria": "renovables",
-            "titulo": "Calentamiento solar de agua para procesos",
-            "descripcion": "Sistema de colectores solares térmicos para precalentar agua en procesos industriales.",
-            "ahorroEstimado": 0.20,  # 20%
-            "costoImplementacion": "medio",
-            "periodoRetorno": 24,
-            "prioridad": 4
-        }
-    ],
-    "iluminacion": [
-        {
-            "categoria": "iluminacion",
-            "titulo": "Reemplazo por iluminación LED",
-            "descripcion": "Sustituir sistemas de iluminación convencionales por tecnología LED de alta eficiencia.",
-            "ahorroEstimado": 0.70,  # 70% del consumo en iluminación
-            "costoImplementacion": "bajo",
-            "periodoRetorno": 8,
-            "prioridad": 5
-        }
-    ],
-    "factor_potencia": [
-        {
-            "categoria": "factor_potencia",
-            "titulo": "Corrección de factor de potencia",
-            "descripcion": "Instalar banco de capacitores para corregir el factor de potencia y eliminar las multas por este concepto.",
-            "ahorroEstimado": 1.0,  # 100% de las multas
-            "costoImplementacion": "medio",
-            "periodoRetorno": 12,
-            "prioridad": 5
-        }
-    ]
-}
-
 def generar_codigo_acceso():
     """Genera un código de acceso aleatorio de 8 caracteres alfanuméricos"""
     return ''.join(random.choices(string.ascii_uppercase + string.digits, k=8))
@@ -128,12 +48,13 @@ def calcular_intensidad_energetica(consumo: float, produccion: float) -> float:
 def calcular_costo_energia_anual(consumo: float, costo_electricidad: float, costo_combustible: float) -> float:
     """Calcula el costo energético anual total"""
     costo_electricidad_anual = consumo * costo_electricidad
-    costo_combustible_estimado = (consumo * 0.3) * costo_combustible  # Estimación simplificada
+    fraccion_combustible = get_parametros().fraccion_consumo_combustible_feria
+    costo_combustible_estimado = (consumo * fraccion_combustible) * costo_combustible  # Estimación simplificada
     return costo_electricidad_anual + costo_combustible_estimado
 
 def calcular_potencial_ahorro(equipo_intensivo: str, tiene_multas: bool, costo_total: float) -> float:
     """Calcula el potencial de ahorro basado en las características del consumo"""
-    potencial_ahorro_base = 0.15  # 15% ahorro base
+    potencial_ahorro_base = get_parametros().ahorro_base_feria  # 15% ahorro base
     
     # Modificadores basados en equipos intensivos
     if equipo_intensivo == "Sistemas de refrigeración":
@@ -195,70 +116,7 @@ def generar_recomendaciones(datos: schemas.DiagnosticoFeriaCreate,
                            potencial_ahorro: float, 
                            costo_anual: float) -> List[Dict[str, Any]]:
     """Genera recomendaciones personalizadas basadas en los datos del diagnóstico"""
-    recomendaciones = []
-    categorias_usadas = set()
-    
-    # Recomendaciones basadas en interés en renovables
-    if datos.renewable.interestedInRenewable:
-        for recomendacion in RECOMENDACIONES_TEMPLATES["renovables"]:
-            rec_copy = recomendacion.copy()
-            rec_copy["id"] = str(uuid.uuid4())
-            rec_copy["ahorroEstimado"] = costo_anual * rec_copy["ahorroEstimado"]
-            recomendaciones.append(rec_copy)
-            categorias_usadas.add("renovables")
-    
-    # Recomendaciones por factor de potencia
-    if datos.renewable.penaltiesReceived:
-        for recomendacion in RECOMENDACIONES_TEMPLATES["factor_potencia"]:
-            rec_copy = recomendacion.copy()
-            rec_copy["id"] = str(uuid.uuid4())
-            # Estimar el costo de multas como 5% del costo energético
-            costo_multas = costo_anual * 0.05 * (datos.renewable.penaltyCount or 1)
-            rec_copy["ahorroEstimado"] = costo_multas
-            recomendaciones.append(rec_copy)
-            categorias_usadas.add("factor_potencia")
-    
-    # Recomendaciones por tipo de equipo intensivo
-    if datos.equipment.mostIntensiveEquipment == "Sistemas de iluminación":
-        for recomendacion in RECOMENDACIONES_TEMPLATES["iluminacion"]:
-            rec_copy = recomendacion.copy()
-            rec_copy["id"] = str(uuid.uuid4())
-            # Estimamos que iluminación es 15% del consumo
-            costo_iluminacion = costo_anual * 0.15
-            rec_copy["ahorroEstimado"] = costo_iluminacion * rec_copy["ahorroEstimado"]
-            recomendaciones.append(rec_copy)
-            categorias_usadas.add("iluminacion")
-    
-    # Siempre incluir al menos una recomendación de equipos
-    if "equipos" not in categorias_usadas and len(recomendaciones) < 5:
-        recomendacion = RECOMENDACIONES_TEMPLATES["equipos"][0].copy()
-        recomendacion["id"] = str(uuid.uuid4())
-        recomendacion["ahorroEstimado"] = costo_anual * recomendacion["ahorroEstimado"]
-        recomendaciones.append(recomendacion)
-    
-    # Siempre incluir al menos una recomendación de gestión
-    if "gestion" not in categorias_usadas and len(recomendaciones) < 5:
-        recomendacion = RECOMENDACIONES_TEMPLATES["gestion"][0].copy()
-        recomendacion["id"] = str(uuid.uuid4())
-        recomendacion["ahorroEstimado"] = costo_anual * recomendacion["ahorroEstimado"]
-        recomendaciones.append(recomendacion)
-    
-    # Asegurarse de tener al menos 3 recomendaciones
-    while len(recomendaciones) < 3:
-        # Añadir recomendaciones adicionales de categorías no usadas
-        for categoria, templates in RECOMENDACIONES_TEMPLATES.items():
-            if categoria not in categorias_usadas and templates:
-                recomendacion = templates[0].copy()
-                recomendacion["id"] = str(uuid.uuid4())
-                recomendacion["ahorroEstimado"] = costo_anual * recomendacion["ahorroEstimado"]
-                recomendaciones.append(recomendacion)
-                categorias_usadas.add(categoria)
-                break
-        else:
-            # Si ya hemos usado todas las categorías, terminamos el bucle
-            break
-    
-    return recomendaciones
+    return obtener_motor().generar(datos, costo_anual)
 
 @router.post("/", response_model=schemas.DiagnosticoFeriaResponse)
 async def crear_diagnostico_feria(
@@ -302,6 +160,9 @@ async def crear_diagnostico_feria(
             diagnostico.equipment.energyConsumption,
             diagnostico.volume.annualProduction
         )
+        percentil = obtener_percentil(db, METRICA_FERIA, grupo_feria(diagnostico.production.productType), intensidad_energetica)
+        if percentil is not None:
+            comparacion_sector["percentilSector"] = percentil
         
         # Generar recomendaciones
         recomendaciones = generar_recomendaciones(
@@ -336,6 +197,7 @@ async def crear_diagnostico_feria(
         db.add(nuevo_diagnostico)
         db.commit()
         db.refresh(nuevo_diagnostico)
+        metrics.DIAGNOSTICOS_CREADOS.labels(tipo="feria").inc()
         
         # Preparar respuesta
         resultados = {
@@ -365,42 +227,84 @@ async def crear_diagnostico_feria(
         logger.error(f"Error al crear diagnóstico: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error al procesar el diagnóstico: {str(e)}")
 
-@router.get("/{diagnostico_id}", response_model=schemas.DiagnosticoFeriaResponse)
-async def obtener_diagnostico_feria(diagnostico_id: str, db: Session = Depends(get_db)):
-    """
-    Obtiene un diagnóstico específico por su ID.
-    No requiere autenticación.
-    """
-    diagnostico = db.query(models.DiagnosticoFeria).filter(models.DiagnosticoFeria.id == diagnostico_id).first()
-    
-    if not diagnostico:
-        raise HTTPException(status_code=404, detail="Diagnóstico no encontrado")
-    
-    # Convertir datos almacenados al formato de respuesta
-    resultados = {
+# Valores de un diagnóstico que solo tiene el contacto (estado CONTACTO_INICIADO).
+# Se arman una vez desde los schemas (con todos sus campos opcionales) y se
+# comparten entre peticiones: solo se leen al serializar la respuesta.
+_POR_DEFECTO_CONTACTO = {
+    "background": schemas.Background(hasPreviousAudits=False, mainInterest="").model_dump(),
+    "production": schemas.Production(productType="", exportProducts=False, processesOfInterest=[]).model_dump(),
+    "equipment": schemas.Equipment(mostIntensiveEquipment="", energyConsumption=0.0).model_dump(),
+    "renewable": schemas.Renewable(interestedInRenewable=False, electricTariff="", penaltiesReceived=False).model_dump(),
+    "volume": schemas.Volume(
+        annualProduction=0.0, productionUnit="",
+        energyCosts=schemas.EnergyCosts(electricity=0.0, fuel=0.0), energyCostPercentage=0.0
+    ).model_dump(),
+}
+_RESULTADOS_POR_DEFECTO = schemas.ResultadosDiagnostico(
+    intensidadEnergetica=0.0,
+    costoEnergiaAnual=0.0,
+    potencialAhorro=0.0,
+    puntuacionEficiencia=0.0,
+    comparacionSector=schemas.ComparacionSector(
+        consumoPromedioSector=0.0, diferenciaPorcentual=0.0, eficienciaReferencia=0.0
+    )
+).model_dump()
+
+def _resultados(diagnostico: models.DiagnosticoFeria) -> Dict[str, Any]:
+    comparacion = diagnostico.comparacion_sector
+    if comparacion is not None and "percentilSector" not in comparacion:
+        comparacion = {**comparacion, "percentilSector": None}
+    return {
         "intensidadEnergetica": diagnostico.intensidad_energetica,
         "costoEnergiaAnual": diagnostico.costo_energia_anual,
         "potencialAhorro": diagnostico.potencial_ahorro,
         "puntuacionEficiencia": diagnostico.puntuacion_eficiencia,
-        "comparacionSector": diagnostico.comparacion_sector
+        "comparacionSector": comparacion
     }
+
+def _respuesta_diagnostico(diagnostico: models.DiagnosticoFeria) -> Dict[str, Any]:
+    """
+    Respuesta (DiagnosticoFeriaResponse) de un diagnóstico almacenado. Los JSON
+    guardados se validaron al escribirse, así que se sirven con `responder`.
+    """
+    if diagnostico.estado == 'CONTACTO_INICIADO':
+        # Completar los campos requeridos que aún no se capturaron
+        secciones = {
+            clave: getattr(diagnostico, clave) or valor
+            for clave, valor in _POR_DEFECTO_CONTACTO.items()
+        }
+        resultados = _RESULTADOS_POR_DEFECTO
+    else:
+        secciones = {clave: getattr(diagnostico, clave) for clave in _POR_DEFECTO_CONTACTO}
+        resultados = _resultados(diagnostico)
     
     return {
         "id": diagnostico.id,
         "createdAt": diagnostico.created_at.isoformat(),
         "accessCode": diagnostico.access_code,
         "contactInfo": diagnostico.contact_info,
-        "background": diagnostico.background,
-        "production": diagnostico.production,
-        "equipment": diagnostico.equipment,
-        "renewable": diagnostico.renewable,
-        "volume": diagnostico.volume,
+        **secciones,
         "results": resultados,
-        "recomendaciones": diagnostico.recomendaciones,
+        "recomendaciones": diagnostico.recomendaciones or [], # Asegurar que nunca sea None
         "pdfUrl": diagnostico.pdf_url,
         "viewUrl": diagnostico.view_url
     }
 
+@router.get("/{diagnostico_id}", response_model=schemas.DiagnosticoFeriaResponse)
+async def obtener_diagnostico_feria(diagnostico_id: str, db: Session = Depends(get_db)):
+    """
+    Obtiene un diagnóstico específico por su ID.
+    No requiere autenticación.
+    """
+    diagnostico = db.query(models.DiagnosticoFeria).filter(models.DiagnosticoFeria.id == diagnostico_id).first()
+    if not diagnostico:
+        diagnostico = next(iter(archivo_frio.leer(db, "diagnosticos_feria", diagnostico_id)), None)
+    
+    if not diagnostico:
+        raise HTTPException(status_code=404, detail="Diagnóstico no encontrado")
+    
+    return responder("obtener_diagnostico_feria", _respuesta_diagnostico(diagnostico))
+
 @router.get("/codigo/{access_code}", response_model=schemas.DiagnosticoFeriaResponse)
 async def obtener_diagnostico_por_codigo(access_code: str, db: Session = Depends(get_db)):
     """
@@ -408,71 +312,13 @@ async def obtener_diagnostico_por_codigo(access_code: str, db: Session = Depends
     No requiere autenticación.
     """
     diagnostico = db.query(models.DiagnosticoFeria).filter(models.DiagnosticoFeria.access_code == access_code).first()
+    if not diagnostico:
+        diagnostico = next(iter(archivo_frio.leer(db, "diagnosticos_feria", codigo=access_code)), None)
     
     if not diagnostico:
         raise HTTPException(status_code=404, detail="Diagnóstico no encontrado")
     
-    # Inicializar campos faltantes con valores por defecto si están en estado CONTACTO_INICIADO
-    if diagnostico.estado == 'CONTACTO_INICIADO':
-        # Proporcionar valores predeterminados para los campos requeridos
-        default_background = {"hasPreviousAudits": False, "mainInterest": ""}
-        default_production = {"productType": "", "exportProducts": False, "processesOfInterest": []}
-        default_equipment = {"mostIntensiveEquipment": "", "energyConsumption": 0.0}
-        default_renewable = {"interestedInRenewable": False, "electricTariff": "", "penaltiesReceived": False}
-        default_volume = {"annualProduction": 0.0, "productionUnit": "", "energyCosts": {"electricity": 0.0, "fuel": 0.0}, "energyCostPercentage": 0.0}
-        default_results = {
-            "intensidadEnergetica": 0.0,
-            "costoEnergiaAnual": 0.0,
-            "potencialAhorro": 0.0,
-            "puntuacionEficiencia": 0.0,
-            "comparacionSector": {
-                "consumoPromedioSector": 0.0,
-                "diferenciaPorcentual": 0.0,
-                "eficienciaReferencia": 0.0
-            }
-        }
-        
-        # Asignar valores por defecto si son None
-        background = diagnostico.background or default_background
-        production = diagnostico.production or default_production
-        equipment = diagnostico.equipment or default_equipment
-        renewable = diagnostico.renewable or default_renewable
-        volume = diagnostico.volume or default_volume
-        resultados = default_results
-        recomendaciones = diagnostico.recomendaciones or []
-    else:
-        # Para diagnósticos completos, usar los datos existentes
-        background = diagnostico.background
-        production = diagnostico.production
-        equipment = diagnostico.equipment
-        renewable = diagnostico.renewable
-        volume = diagnostico.volume
-        
-        # Convertir datos almacenados al formato de respuesta
-        resultados = {
-            "intensidadEnergetica": diagnostico.intensidad_energetica,
-            "costoEnergiaAnual": diagnostico.costo_energia_anual,
-            "potencialAhorro": diagnostico.potencial_ahorro,
-            "puntuacionEficiencia": diagnostico.puntuacion_eficiencia,
-            "comparacionSector": diagnostico.comparacion_sector
-        }
-        recomendaciones = diagnostico.recomendaciones
-    
-    return {
-        "id": diagnostico.id,
-        "createdAt": diagnostico.created_at.isoformat(),
-        "accessCode": diagnostico.access_code,
-        "contactInfo": diagnostico.contact_info,
-        "background": background,
-        "production": production,
-        "equipment": equipment,
-        "renewable": renewable,
-        "volume": volume,
-        "results": resultados,
-        "recomendaciones": recomendaciones or [], # Asegurar que nunca sea None
-        "pdfUrl": diagnostico.pdf_url,
-        "viewUrl": diagnostico.view_url
-    }
+    return responder("obtener_diagnostico_por_codigo", _respuesta_diagnostico(diagnostico))
 
 @router.post("/iniciar-contacto/", response_model=schemas.DiagnosticoFeriaIniciarContactoResponse, summary="Iniciar Diagnóstico - Captura de Contacto")
 async def iniciar_diagnostico_feria_contacto(
@@ -499,6 +345,7 @@ async def iniciar_diagnostico_feria_contacto(
         db.add(nuevo_diagnostico_parcial)
         db.commit()
         db.refresh(nuevo_diagnostico_parcial)
+        metrics.DIAGNOSTICOS_CREADOS.labels(tipo="feria_contacto").inc()
         
         return schemas.DiagnosticoFeriaIniciarContactoResponse(
             id=nuevo_diagnostico_parcial.id,
@@ -567,6 +414,9 @@ async def completar_diagnostico_feria(
             current_equipment_data.energyConsumption,
             current_volume_data.annualProduction
         )
+        percentil = obtener_percentil(db, METRICA_FERIA, grupo_feria(current_production_data.productType), intensidad_energetica)
+        if percentil is not None:
+            comparacion_sector["percentilSector"] = percentil
         
         datos_para_recomendaciones_dict = {
             "contactInfo": diagnostico_existente.contact_info,
@@ -606,30 +456,9 @@ async def completar_diagnostico_feria(
         db.add(diagnostico_existente)
         db.commit()
         db.refresh(diagnostico_existente)
+        metrics.DIAGNOSTICOS_CREADOS.labels(tipo="feria_completado").inc()
         
-        response_results = {
-            "intensidadEnergetica": diagnostico_existente.intensidad_energetica,
-            "costoEnergiaAnual": diagnostico_existente.costo_energia_anual,
-            "potencialAhorro": diagnostico_existente.potencial_ahorro,
-            "puntuacionEficiencia": diagnostico_existente.puntuacion_eficiencia,
-            "comparacionSector": diagnostico_existente.comparacion_sector
-        }
-
-        return schemas.DiagnosticoFeriaResponse(
-            id=diagnostico_existente.id,
-            createdAt=diagnostico_existente.created_at.isoformat(),
-            accessCode=diagnostico_existente.access_code,
-            contactInfo=diagnostico_existente.contact_info,
-            background=diagnostico_existente.background,
-            production=diagnostico_existente.production,
-            equipment=diagnostico_existente.equipment,
-            renewable=diagnostico_existente.renewable,
-            volume=diagnostico_existente.volume,
-            results=response_results,
-            recomendaciones=diagnostico_existente.recomendaciones,
-            pdfUrl=diagnostico_existente.pdf_url,
-            viewUrl=diagnostico_existente.view_url
-        )
+        return responder("completar_diagnostico_feria", _respuesta_diagnostico(diagnostico_existente))
 
     except Exception as e:
         logger.error(f"Error al completar diagnóstico {access_code}: {str(e)}")
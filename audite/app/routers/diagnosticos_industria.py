@@ -10,13 +10,13 @@ import uuid
 from datetime import datetime
 
 from ..database import get_db
-from .. import crud, schemas
+from .. import crud, schemas, metrics
 from ..utils.conditional_logic import (
-    filtrar_preguntas_visibles, 
     validar_respuestas_condicionales,
     procesar_respuestas_con_otro
 )
 from ..utils.sugerencias_industria import generar_sugerencias_industria, generar_plan_implementacion
+from ..utils.catalogo_formularios import obtener_catalogo, recargar_catalogo
 
 router = APIRouter(prefix="/api", tags=["Diagnósticos por Industria"])
 
@@ -31,7 +31,7 @@ async def listar_categorias_industria(
     Listar todas las categorías de industria disponibles para diagnóstico.
     Solo retorna categorías activas ordenadas por orden de visualización.
     """
-    categorias = crud.get_categorias_industria(db, skip=skip, limit=limit, solo_activas=True)
+    categorias = obtener_catalogo(db).categorias[skip:skip + limit]
     total = len(categorias)  # Para paginación futura
     
     return schemas.CategoriaIndustriaListResponse(
@@ -50,6 +50,11 @@ async def obtener_formularios_por_categoria(
     """
     Obtener formularios disponibles para una categoría específica de industria.
     """
+    # Categoría activa: formularios ya validados desde el catálogo en memoria
+    catalogo = obtener_catalogo(db)
+    if categoria_id in catalogo.categorias_por_id:
+        return list(catalogo.formularios_por_categoria.get(categoria_id, ())[skip:skip + limit])
+    
     # Validar que la categoría existe y está activa
     categoria = crud.get_categoria_by_id(db, categoria_id)
     if not categoria:
@@ -89,22 +94,26 @@ async def obtener_preguntas_formulario(
         formulario_id: ID del formulario
         respuestas_actuales: JSON string con respuestas actuales para evaluar condiciones
     """
-    # Validar que el formulario existe y está activo
-    formulario = crud.get_formulario_by_id(db, formulario_id, incluir_preguntas=False)
-    if not formulario:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Formulario no encontrado"
-        )
-    
-    if not formulario.activo:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Formulario no está activo"
-        )
-    
-    # Obtener todas las preguntas activas
-    preguntas = crud.get_preguntas_by_formulario(db, formulario_id, solo_activas=True)
+    # Los formularios activos tienen su lógica condicional ya compilada en el catálogo
+    programa = obtener_catalogo(db).programas.get(formulario_id)
+    if programa is None:
+        # Validar que el formulario existe y está activo
+        formulario = crud.get_formulario_by_id(db, formulario_id, incluir_preguntas=False)
+        if not formulario:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Formulario no encontrado"
+            )
+        
+        if not formulario.activo:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Formulario no está activo"
+            )
+        
+        # Activado desde otro worker después del último sondeo del catálogo
+        recargar_catalogo(db, forzar=True)
+        programa = obtener_catalogo(db).programas[formulario_id]
     
     # Si hay respuestas actuales, filtrar preguntas según lógica condicional
     if respuestas_actuales:
@@ -112,15 +121,13 @@ async def obtener_preguntas_formulario(
             import json
             respuestas_dict = json.loads(respuestas_actuales)
             respuestas_procesadas = procesar_respuestas_con_otro(respuestas_dict)
-            preguntas = filtrar_preguntas_visibles(preguntas, respuestas_procesadas)
+            return programa.visibles(respuestas_procesadas)
         except (json.JSONDecodeError, Exception):
             # Si hay error en el procesamiento, devolver todas las preguntas base
-            preguntas = [p for p in preguntas if not p.pregunta_padre_id]
-    else:
-        # Sin respuestas, solo mostrar preguntas base (sin dependencias)
-        preguntas = [p for p in preguntas if not p.pregunta_padre_id]
+            return programa.preguntas_base
     
-    return preguntas
+    # Sin respuestas, solo mostrar preguntas base (sin dependencias)
+    return programa.preguntas_base
 
 
 @router.post("/formulario/responder")
@@ -165,6 +172,7 @@ async def enviar_respuestas_formulario(
     # Guardar respuestas en la base de datos
     try:
         respuestas_guardadas = crud.save_respuestas_batch(db, request.session_id, request.respuestas)
+        metrics.FORMULARIOS_ENVIADOS.labels(formulario="industria").inc()
         
         return {
             "success": True,
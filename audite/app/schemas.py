@@ -431,6 +431,7 @@ class ComparacionSector(BaseModel):
     consumoPromedioSector: float
     diferenciaPorcentual: float
     eficienciaReferencia: float
+    percentilSector: Optional[float] = None
 
 class ResultadosDiagnostico(BaseModel):
     intensidadEnergetica: float
@@ -0,0 +1,304 @@
+"""
+Archivo frío: sesiones y diagnósticos antiguos movidos a archivos Parquet.
+
+Las sesiones de respuestas (formularios y autodiagnóstico) sin actividad desde
+hace más de ARCHIVE_RETENTION_DAYS, y los diagnósticos de feria de esa edad, casi
+no se leen pero engordan las tablas, sus índices y los respaldos. `archivar` los
+copia por lotes a archivos Parquet comprimidos con zstd en ARCHIVE_DIR y los
+borra de la base.
+
+Cada lote se confirma por separado: las filas se leen bloqueadas (FOR UPDATE),
+se descartan las sesiones que volvieron a recibir respuestas, el archivo se
+escribe completo (temporal + fsync + rename) y después, en la misma transacción,
+se registran sus claves en archivo_frio y se borran exactamente las filas
+escritas. Si el proceso se interrumpe entre ambos pasos queda un archivo sin
+registrar, que la siguiente ejecución elimina (`limpiar_huerfanos`) antes de
+seguir con los lotes pendientes. Las claves se recorren por keyset sobre la
+columna que agrupa (con su índice): cada lote sigue donde terminó el anterior.
+
+`leer` es el camino de lectura: los endpoints buscan la sesión o el diagnóstico
+también en archivo_frio y reconstruyen las filas desde el Parquet como
+instancias transitorias del modelo (no se reinsertan), con las mismas fechas que
+devolvía la base. Una sesión archivada que después recibió respuestas nuevas
+queda repartida entre el archivo y la base; `combinar` une ambas partes.
+
+pyarrow se importa solo al escribir o leer un archivo: sin archivo frío la API no
+lo necesita.
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import Boolean, DateTime, Float, Integer, JSON, func, text
+from sqlalchemy.orm import Session
+import json
+import logging
+import os
+import uuid
+
+from .. import models
+
+logger = logging.getLogger(__name__)
+
+DIRECTORIO = os.getenv("ARCHIVE_DIR", "archivo")
+RETENCION_DIAS = int(os.getenv("ARCHIVE_RETENTION_DAYS", "365"))
+# Sesiones (o diagnósticos) por lote: un archivo Parquet y una transacción por lote
+TAMANO_LOTE = int(os.getenv("ARCHIVE_BATCH_SIZE", "1000"))
+NIVEL_COMPRESION = int(os.getenv("ARCHIVE_ZSTD_LEVEL", "9"))
+
+# tabla: (modelo, columna que agrupa las filas de una sesión o diagnóstico)
+TABLAS = {
+    "respuestas_formulario": (models.RespuestaFormulario, "session_id"),
+    "autodiagnostico_respuestas": (models.AutodiagnosticoRespuesta, "session_id"),
+    "diagnosticos_feria": (models.DiagnosticoFeria, "id"),
+}
+
+# Cerrojo consultivo en PostgreSQL: un solo archivador a la vez
+_CERROJO = 4_902_050
+# Ids por sentencia DELETE (límite de parámetros por consulta)
+_IDS_POR_BORRADO = 1000
+
+
+def _columnas(modelo: Any) -> list:
+    """Columnas que se guardan: las generadas se recalculan y no se archivan"""
+    return [c for c in modelo.__table__.columns if c.computed is None]
+
+
+def _tipo_arrow(tipo: Any):
+    import pyarrow as pa
+
+    if isinstance(tipo, JSON):
+        return pa.string()
+    if isinstance(tipo, DateTime):
+        # Las columnas sin zona se guardan tal cual, sin interpretarlas como UTC
+        return pa.timestamp("us", tz="UTC") if tipo.timezone else pa.timestamp("us")
+    if isinstance(tipo, Boolean):
+        return pa.bool_()
+    if isinstance(tipo, Integer):
+        return pa.int64()
+    if isinstance(tipo, Float):
+        return pa.float64()
+    return pa.string()
+
+
+def _a_fila(objeto: Any, columnas: list) -> Dict[str, Any]:
+    fila = {}
+    for columna in columnas:
+        valor = getattr(objeto, columna.key)
+        if isinstance(columna.type, JSON) and valor is not None:
+            valor = json.dumps(valor, ensure_ascii=False)
+        fila[columna.name] = valor
+    return fila
+
+
+def _desde_fila(modelo: Any, fila: Dict[str, Any], con_zona: bool) -> Any:
+    """
+    Instancia del modelo desde una fila del Parquet. `con_zona` indica si el motor
+    devuelve las columnas DateTime(timezone=True) con zona (PostgreSQL) o como
+    hora UTC sin zona (SQLite); se devuelven igual que las devolvería la base.
+    """
+    valores = {}
+    for columna in _columnas(modelo):
+        valor = fila.get(columna.name)
+        if valor is not None:
+            if isinstance(columna.type, JSON):
+                valor = json.loads(valor)
+            elif isinstance(columna.type, DateTime) and columna.type.timezone and not con_zona:
+                valor = valor.replace(tzinfo=None)
+        valores[columna.key] = valor
+    return modelo(**valores)
+
+
+def _escribir(ruta: str, modelo: Any, filas: List[Dict[str, Any]]) -> None:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    esquema = pa.schema([(c.name, _tipo_arrow(c.type)) for c in _columnas(modelo)])
+    datos = pa.Table.from_pylist(filas, schema=esquema)
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    temporal = f"{ruta}.tmp"
+    with open(temporal, "wb") as archivo:
+        pq.write_table(datos, archivo, compression="zstd", compression_level=NIVEL_COMPRESION)
+        archivo.flush()
+        os.fsync(archivo.fileno())
+    os.replace(temporal, ruta)
+
+
+# ========================================
+# ESCRITURA
+# ========================================
+
+def _claves_vencidas(db: Session, tabla: str, corte: datetime, limite: int,
+                     desde: Optional[str] = None) -> List[str]:
+    """
+    Hasta `limite` claves vencidas posteriores a `desde`, en orden de clave. El
+    keyset sobre la columna indexada permite cortar apenas aparecen `limite`
+    claves: ordenar por max(created_at) obligaría a agregar toda la tabla en cada lote.
+    """
+    modelo, campo = TABLAS[tabla]
+    columna = getattr(modelo, campo)
+    consulta = db.query(columna)
+    if desde is not None:
+        consulta = consulta.filter(columna > desde)
+    if campo == "session_id":
+        # Sesiones cuya última respuesta es anterior al corte
+        consulta = consulta.group_by(columna).having(func.max(modelo.created_at) < corte)
+    else:
+        consulta = consulta.filter(modelo.created_at < corte)
+    return [clave for (clave,) in consulta.order_by(columna).limit(limite)]
+
+
+def archivar_lote(db: Session, tabla: str, corte: datetime, limite: int = TAMANO_LOTE,
+                  desde: Optional[str] = None) -> Tuple[int, Optional[str]]:
+    """
+    Mueve al archivo frío hasta `limite` sesiones (o diagnósticos) de `tabla`
+    anteriores a `corte`, a partir de la clave `desde`. Devuelve cuántas movió y
+    la última clave revisada, desde donde sigue el lote siguiente (None cuando no
+    quedan).
+    """
+    modelo, campo = TABLAS[tabla]
+    claves = _claves_vencidas(db, tabla, corte, limite, desde)
+    if not claves:
+        return 0, None
+
+    columna = getattr(modelo, campo)
+    # Filas bloqueadas hasta el commit: no cambian entre escribirlas y borrarlas
+    objetos = db.query(modelo).filter(columna.in_(claves)).with_for_update().all()
+    if campo == "session_id":
+        # Sesiones que recibieron respuestas después de elegirlas: siguen activas
+        activas = {
+            clave for (clave,) in
+            db.query(columna).filter(columna.in_(claves), modelo.created_at >= corte).distinct()
+        }
+        objetos = [o for o in objetos if getattr(o, campo) not in activas]
+    if not objetos:
+        db.rollback()
+        return 0, claves[-1]
+
+    relativo = os.path.join(tabla, f"{datetime.utcnow():%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}.parquet")
+    ruta = os.path.join(DIRECTORIO, relativo)
+    try:
+        _escribir(ruta, modelo, [_a_fila(o, _columnas(modelo)) for o in objetos])
+    except Exception:
+        db.rollback()
+        raise
+
+    try:
+        filas_por_clave: Dict[str, int] = {}
+        codigos: Dict[str, Optional[str]] = {}
+        for objeto in objetos:
+            clave = getattr(objeto, campo)
+            filas_por_clave[clave] = filas_por_clave.get(clave, 0) + 1
+            codigos[clave] = getattr(objeto, "access_code", None)
+        db.add_all([
+            models.ArchivoFrio(tabla=tabla, clave=clave, codigo=codigos[clave], archivo=relativo, filas=filas)
+            for clave, filas in filas_por_clave.items()
+        ])
+        # Solo las filas escritas en el archivo; las que lleguen después quedan en la base
+        ids = [o.id for o in objetos]
+        for i in range(0, len(ids), _IDS_POR_BORRADO):
+            db.query(modelo)\
+                .filter(modelo.id.in_(ids[i:i + _IDS_POR_BORRADO]), modelo.created_at < corte)\
+                .delete(synchronize_session=False)
+        db.commit()
+    except Exception:
+        db.rollback()
+        os.remove(ruta)
+        raise
+    return len(filas_por_clave), claves[-1]
+
+
+def limpiar_huerfanos(db: Session) -> List[str]:
+    """Elimina archivos que no llegaron a registrarse (lote interrumpido)"""
+    registrados = {archivo for (archivo,) in db.query(models.ArchivoFrio.archivo).distinct()}
+    eliminados = []
+    for tabla in TABLAS:
+        carpeta = os.path.join(DIRECTORIO, tabla)
+        if not os.path.isdir(carpeta):
+            continue
+        for nombre in os.listdir(carpeta):
+            relativo = os.path.join(tabla, nombre)
+            if nombre.endswith(".tmp") or (nombre.endswith(".parquet") and relativo not in registrados):
+                os.remove(os.path.join(DIRECTORIO, relativo))
+                eliminados.append(relativo)
+    return eliminados
+
+
+def archivar(db: Session, tablas: Iterable[str] = TABLAS, dias: int = RETENCION_DIAS,
+             limite: int = TAMANO_LOTE, max_lotes: Optional[int] = None) -> Dict[str, int]:
+    """
+    Archiva por lotes las sesiones y diagnósticos con más de `dias` de antigüedad.
+    Devuelve cuántos se movieron por tabla. Se puede interrumpir y volver a
+    ejecutar: continúa con lo que quedó en la base.
+    """
+    cerrojo = None
+    if db.get_bind().dialect.name == "postgresql":
+        # Conexión propia: la sesión devuelve la suya al pool en cada commit
+        cerrojo = db.get_bind().connect().execution_options(isolation_level="AUTOCOMMIT")
+        if not cerrojo.execute(text("SELECT pg_try_advisory_lock(:clave)"), {"clave": _CERROJO}).scalar():
+            cerrojo.close()
+            logger.warning("Otro proceso está archivando; no se hace nada")
+            return {}
+
+    try:
+        huerfanos = limpiar_huerfanos(db)
+        if huerfanos:
+            logger.info(f"Eliminados {len(huerfanos)} archivos de lotes interrumpidos")
+
+        corte = datetime.now(timezone.utc) - timedelta(days=dias)
+        resumen = {}
+        for tabla in tablas:
+            total, lotes, desde = 0, 0, None
+            while max_lotes is None or lotes < max_lotes:
+                movidas, desde = archivar_lote(db, tabla, corte, limite, desde)
+                if desde is None:
+                    break
+                total += movidas
+                lotes += 1
+                logger.info(f"{tabla}: lote {lotes} archivado ({movidas}, {total} en total)")
+            resumen[tabla] = total
+        return resumen
+    finally:
+        if cerrojo is not None:
+            cerrojo.execute(text("SELECT pg_advisory_unlock(:clave)"), {"clave": _CERROJO})
+            cerrojo.close()
+
+
+# ========================================
+# LECTURA
+# ========================================
+
+def leer(db: Session, tabla: str, clave: Optional[str] = None, codigo: Optional[str] = None) -> List[Any]:
+    """
+    Filas archivadas de una sesión o diagnóstico (por clave, o por código de
+    acceso), como instancias transitorias del modelo, en orden (created_at, id).
+    Lista vacía si no está en el archivo frío; en ese caso no se abre ningún archivo.
+    """
+    consulta = db.query(models.ArchivoFrio).filter(models.ArchivoFrio.tabla == tabla)
+    if codigo is not None:
+        consulta = consulta.filter(models.ArchivoFrio.codigo == codigo)
+    else:
+        consulta = consulta.filter(models.ArchivoFrio.clave == clave)
+    registros = consulta.all()
+    if not registros:
+        return []
+
+    import pyarrow.parquet as pq
+
+    modelo, campo = TABLAS[tabla]
+    con_zona = db.get_bind().dialect.name != "sqlite"
+    objetos = []
+    for registro in registros:
+        datos = pq.read_table(os.path.join(DIRECTORIO, registro.archivo), filters=[(campo, "=", registro.clave)])
+        objetos += [_desde_fila(modelo, fila, con_zona) for fila in datos.to_pylist()]
+    objetos.sort(key=lambda o: (o.created_at, o.id))
+    return objetos
+
+
+def combinar(vivas: List[Any], archivadas: List[Any]) -> List[Any]:
+    """Filas de una sesión en la base más las archivadas, en orden (created_at, id)"""
+    if not archivadas:
+        return vivas
+    ids = {o.id for o in vivas}
+    filas = vivas + [o for o in archivadas if o.id not in ids]
+    filas.sort(key=lambda o: (o.created_at, o.id))
+    return filas
@@ -0,0 +1,317 @@
+"""
+Módulo de benchmarking percentil sobre la población real de auditorías.
+Mantiene sketches de cuantiles mergeables (buckets logarítmicos estilo DDSketch)
+por sector / tipo de cultivo / tipo de producto, los persiste en la tabla
+benchmark_sketches y responde el percentil de un valor en O(log n) sin
+recorrer las tablas de auditorías.
+"""
+
+from typing import Dict, Any, Optional, Tuple, Iterable
+from sqlalchemy.orm import Session
+from sqlalchemy import func
+from bisect import bisect_right
+from datetime import datetime, timedelta
+import asyncio
+import logging
+import math
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Precisión relativa de los buckets (1% de error en el valor reconstruido)
+PRECISION_RELATIVA = 0.01
+GRUPO_GLOBAL = "*"
+# Mínimo de observaciones para usar el sketch de un grupo en lugar del global
+MINIMO_OBSERVACIONES = int(os.getenv("BENCHMARK_MIN_OBSERVACIONES", "5"))
+# Intervalo de recálculo de los sketches y de recarga de la caché en memoria
+INTERVALO_RECALCULO = int(os.getenv("BENCHMARK_REFRESH_SECONDS", "3600"))
+INTERVALO_RECARGA = int(os.getenv("BENCHMARK_CACHE_SECONDS", "300"))
+
+METRICA_AGRO = "agro_kpi_por_area"
+METRICA_BASICA = "basica_intensidad_energetica"
+METRICA_FERIA = "feria_intensidad_energetica"
+
+
+class QuantileSketch:
+    """
+    Sketch de cuantiles con buckets logarítmicos. Cada valor positivo x cae en el
+    bucket ceil(log_gamma(x)); los valores <= 0 se cuentan aparte. Dos sketches
+    con la misma precisión se combinan sumando conteos.
+    """
+
+    __slots__ = ("precision", "_log_gamma", "buckets", "ceros", "total")
+
+    def __init__(self, precision: float = PRECISION_RELATIVA):
+        self.precision = precision
+        gamma = (1 + precision) / (1 - precision)
+        self._log_gamma = math.log(gamma)
+        self.buckets: Dict[int, int] = {}
+        self.ceros = 0
+        self.total = 0
+
+    def _clave(self, valor: float) -> int:
+        return int(math.ceil(math.log(valor) / self._log_gamma))
+
+    def agregar(self, valor: float, conteo: int = 1) -> None:
+        if valor is None or (isinstance(valor, float) and math.isnan(valor)):
+            return
+        if valor <= 0:
+            self.ceros += conteo
+        else:
+            clave = self._clave(valor)
+            self.buckets[clave] = self.buckets.get(clave, 0) + conteo
+        self.total += conteo
+
+    def combinar(self, otro: "QuantileSketch") -> None:
+        if otro.precision != self.precision:
+            raise ValueError("Solo se pueden combinar sketches con la misma precisión")
+        for clave, conteo in otro.buckets.items():
+            self.buckets[clave] = self.buckets.get(clave, 0) + conteo
+        self.ceros += otro.ceros
+        self.total += otro.total
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialización compacta para la columna JSON"""
+        claves = sorted(self.buckets)
+        return {
+            "p": self.precision,
+            "z": self.ceros,
+            "k": claves,
+            "c": [self.buckets[k] for k in claves],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "QuantileSketch":
+        sketch = cls(data.get("p", PRECISION_RELATIVA))
+        sketch.ceros = data.get("z", 0)
+        sketch.buckets = dict(zip(data.get("k", []), data.get("c", [])))
+        sketch.total = sketch.ceros + sum(sketch.buckets.values())
+        return sketch
+
+
+class IndicePercentil:
+    """Vista inmutable de un sketch con conteos acumulados para búsqueda binaria"""
+
+    __slots__ = ("_log_gamma", "_claves", "_acumulados", "_ceros", "total")
+
+    def __init__(self, sketch: QuantileSketch):
+        self._log_gamma = sketch._log_gamma
+        self._claves = sorted(sketch.buckets)
+        acumulado = sketch.ceros
+        self._acumulados = []
+        for clave in self._claves:
+            acumulado += sketch.buckets[clave]
+            self._acumulados.append(acumulado)
+        self._ceros = sketch.ceros
+        self.total = sketch.total
+
+    def percentil(self, valor: float) -> Optional[float]:
+        """Porcentaje de la población con un valor menor o igual (0-100)"""
+        if not self.total or valor is None:
+            return None
+        if valor <= 0:
+            rango = self._ceros
+        else:
+            clave = int(math.ceil(math.log(valor) / self._log_gamma))
+            posicion = bisect_right(self._claves, clave)
+            rango = self._acumulados[posicion - 1] if posicion else self._ceros
+        return round(100.0 * rango / self.total, 1)
+
+
+# ========================================
+# NORMALIZACIÓN DE GRUPOS
+# ========================================
+
+def grupo_agro(tipo_cultivo: Optional[str]) -> str:
+    return (tipo_cultivo or "otros").strip().lower()
+
+
+def grupo_basica(sector: Optional[str]) -> str:
+    return (sector or "otros").strip().lower()
+
+
+def grupo_feria(tipo_producto: Optional[str]) -> str:
+    tipo = (tipo_producto or "").strip().lower()
+    if not tipo or tipo.startswith("otro:"):
+        return "default"
+    return tipo
+
+
+# ========================================
+# CONSTRUCCIÓN Y PERSISTENCIA
+# ========================================
+
+def _construir(pares: Iterable[Tuple[str, Optional[float]]]) -> Dict[str, QuantileSketch]:
+    sketches: Dict[str, QuantileSketch] = {GRUPO_GLOBAL: QuantileSketch()}
+    for grupo, valor in pares:
+        if valor is None:
+            continue
+        sketches.setdefault(grupo, QuantileSketch()).agregar(valor)
+        sketches[GRUPO_GLOBAL].agregar(valor)
+    return sketches
+
+
+def _pares_agro(db: Session):
+    from ..models import AuditoriaAgro
+    filas = db.query(AuditoriaAgro.tipo_cultivo, AuditoriaAgro.kpi_por_area)\
+        .filter(AuditoriaAgro.kpi_por_area.isnot(None))\
+        .yield_per(1000)
+    for tipo_cultivo, valor in filas:
+        yield grupo_agro(tipo_cultivo), valor
+
+
+def _pares_basica(db: Session):
+    from ..models import AuditoriaBasica
+    filas = db.query(AuditoriaBasica.sector, AuditoriaBasica.intensidad_energetica)\
+        .filter(AuditoriaBasica.intensidad_energetica.isnot(None))\
+        .yield_per(1000)
+    for sector, valor in filas:
+        yield grupo_basica(sector), valor
+
+
+def _pares_feria(db: Session):
+    from ..models import DiagnosticoFeria
+    # tipo_producto es la columna generada desde production: no trae ni parsea el JSON
+    filas = db.query(DiagnosticoFeria.tipo_producto, DiagnosticoFeria.intensidad_energetica)\
+        .filter(DiagnosticoFeria.intensidad_energetica.isnot(None))\
+        .yield_per(1000)
+    for tipo_producto, valor in filas:
+        yield grupo_feria(tipo_producto), valor
+
+
+FUENTES = {
+    METRICA_AGRO: _pares_agro,
+    METRICA_BASICA: _pares_basica,
+    METRICA_FERIA: _pares_feria,
+}
+
+
+def recalcular_sketches(db: Session) -> Dict[str, int]:
+    """
+    Recalcula todos los sketches desde las tablas de auditorías y los guarda.
+    Es la única operación que recorre las tablas; se ejecuta periódicamente.
+    """
+    from ..models import BenchmarkSketch
+
+    resumen = {}
+    ahora = datetime.utcnow()
+    for metrica, fuente in FUENTES.items():
+        sketches = _construir(fuente(db))
+        existentes = {
+            s.grupo: s for s in db.query(BenchmarkSketch).filter(BenchmarkSketch.metrica == metrica).all()
+        }
+        for grupo, sketch in sketches.items():
+            fila = existentes.pop(grupo, None)
+            if fila is None:
+                fila = BenchmarkSketch(metrica=metrica, grupo=grupo)
+                db.add(fila)
+            fila.sketch = sketch.to_dict()
+            fila.total = sketch.total
+            fila.updated_at = ahora
+        # Grupos que ya no tienen auditorías
+        for fila in existentes.values():
+            db.delete(fila)
+        resumen[metrica] = sketches[GRUPO_GLOBAL].total
+
+    db.commit()
+    _cache.invalidar()
+    logger.info(f"Sketches de benchmarking recalculados: {resumen}")
+    return resumen
+
+
+# ========================================
+# CACHÉ EN MEMORIA Y CONSULTA
+# ========================================
+
+class _CacheSketches:
+    """Índices de percentil cargados desde benchmark_sketches, recargados por TTL"""
+
+    def __init__(self):
+        self._indices: Dict[Tuple[str, str], IndicePercentil] = {}
+        self._cargado_en: Optional[datetime] = None
+        self._lock = threading.Lock()
+
+    def invalidar(self) -> None:
+        self._cargado_en = None
+
+    def _vigente(self) -> bool:
+        return self._cargado_en is not None and \
+            datetime.utcnow() - self._cargado_en < timedelta(seconds=INTERVALO_RECARGA)
+
+    def obtener(self, db: Session, metrica: str, grupo: str) -> Optional[IndicePercentil]:
+        if not self._vigente():
+            self._recargar(db)
+        indice = self._indices.get((metrica, grupo))
+        if indice is None or indice.total < MINIMO_OBSERVACIONES:
+            indice = self._indices.get((metrica, GRUPO_GLOBAL))
+        return indice
+
+    def _recargar(self, db: Session) -> None:
+        from ..models import BenchmarkSketch
+        with self._lock:
+            if self._vigente():
+                return
+            # SAVEPOINT: si la carga falla, la transacción de la petición sigue usable
+            with db.begin_nested():
+                filas = db.query(BenchmarkSketch.metrica, BenchmarkSketch.grupo, BenchmarkSketch.sketch).all()
+            indices = {}
+            for fila in filas:
+                indices[(fila.metrica, fila.grupo)] = IndicePercentil(QuantileSketch.from_dict(fila.sketch))
+            self._indices = indices
+            self._cargado_en = datetime.utcnow()
+
+
+_cache = _CacheSketches()
+
+
+def precargar_sketches(db: Session) -> int:
+    """Carga los índices de percentil ahora (calentamiento); devuelve cuántos hay"""
+    _cache.invalidar()
+    _cache._recargar(db)
+    return len(_cache._indices)
+
+
+def obtener_percentil(db: Session, metrica: str, grupo: str, valor: Optional[float]) -> Optional[float]:
+    """
+    Devuelve el percentil (0-100) del valor dentro de su grupo, o None si aún no
+    hay población suficiente. No falla la petición si los sketches no están disponibles.
+    """
+    if valor is None:
+        return None
+    try:
+        indice = _cache.obtener(db, metrica, grupo)
+    except Exception as e:
+        logger.warning(f"No se pudieron cargar los sketches de benchmarking: {e}")
+        return None
+    return indice.percentil(valor) if indice else None
+
+
+# ========================================
+# TAREA PERIÓDICA
+# ========================================
+
+def _recalcular_si_vencido() -> None:
+    """Recalcula solo si los sketches guardados son más antiguos que el intervalo,
+    de modo que varios workers no repitan el mismo trabajo."""
+    from ..database import SessionLocal
+    from ..models import BenchmarkSketch
+
+    db = SessionLocal()
+    try:
+        ultima = db.query(func.max(BenchmarkSketch.updated_at)).scalar()
+        if ultima is None or datetime.utcnow() - ultima >= timedelta(seconds=INTERVALO_RECALCULO):
+            recalcular_sketches(db)
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error recalculando sketches de benchmarking: {e}")
+    finally:
+        db.close()
+
+
+async def tarea_periodica_sketches() -> None:
+    """Bucle de fondo que mantiene los sketches actualizados"""
+    loop = asyncio.get_running_loop()
+    while True:
+        await loop.run_in_executor(None, _recalcular_si_vencido)
+        await asyncio.sleep(INTERVALO_RECALCULO)
@@ -0,0 +1,124 @@
+"""
+Calentamiento del worker después del arranque.
+Abre las conexiones del pool, carga parámetros, plantillas, sketches de
+benchmarking y el catálogo de formularios (con su lógica condicional
+compilada) y termina de construir los modelos de respuesta y el esquema
+OpenAPI, para que las primeras peticiones no paguen esos costos.
+
+Mientras corre, el worker está vivo (/livez) pero no listo (/readyz): el
+balanceador solo le envía tráfico cuando terminó.
+"""
+
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional, get_args
+import logging
+import os
+import time
+
+from fastapi import FastAPI
+from fastapi.routing import APIRoute
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+HABILITADO = os.getenv("WARMUP_ENABLED", "true").lower() == "true"
+
+
+class EstadoCalentamiento:
+    def __init__(self):
+        self.listo = False
+        self.inicio: Optional[datetime] = None
+        self.fin: Optional[datetime] = None
+        self.pasos: Dict[str, Dict[str, Any]] = {}
+
+    def a_dict(self) -> Dict[str, Any]:
+        return {
+            "listo": self.listo,
+            "inicio": self.inicio.isoformat() if self.inicio else None,
+            "fin": self.fin.isoformat() if self.fin else None,
+            "pasos": self.pasos,
+        }
+
+
+estado = EstadoCalentamiento()
+
+
+def _paso(nombre: str, funcion: Callable[[], Any]) -> None:
+    inicio = time.perf_counter()
+    try:
+        resultado = funcion()
+        estado.pasos[nombre] = {"ok": True, "resultado": resultado}
+    except Exception as e:
+        logger.warning(f"Calentamiento: paso '{nombre}' falló: {e}")
+        estado.pasos[nombre] = {"ok": False, "error": str(e)}
+    estado.pasos[nombre]["ms"] = round((time.perf_counter() - inicio) * 1000, 1)
+
+
+def _modelos_de(tipo: Any):
+    """Modelos Pydantic contenidos en una anotación (List[Modelo], Optional[Modelo], ...)"""
+    if isinstance(tipo, type) and issubclass(tipo, BaseModel):
+        yield tipo
+    for argumento in get_args(tipo):
+        yield from _modelos_de(argumento)
+
+
+def _rutas_api(rutas):
+    for ruta in rutas:
+        if isinstance(ruta, APIRoute):
+            yield ruta
+        # Versiones recientes de FastAPI guardan los routers incluidos sin aplanar
+        # y resuelven sus rutas efectivas en la primera petición
+        incluido = getattr(ruta, "original_router", None)
+        if incluido is not None:
+            resolver = getattr(ruta, "effective_candidates", None)
+            if callable(resolver):
+                resolver()
+            yield from _rutas_api(incluido.routes)
+
+
+def precompilar_modelos_respuesta(app: FastAPI) -> int:
+    """Resuelve los modelos de respuesta pendientes y genera el esquema OpenAPI"""
+    modelos = set()
+    for ruta in _rutas_api(app.routes):
+        if ruta.response_model is not None:
+            modelos.update(_modelos_de(ruta.response_model))
+    for modelo in modelos:
+        if not modelo.__pydantic_complete__:
+            modelo.model_rebuild()
+    app.openapi()
+    return len(modelos)
+
+
+def calentar(app: FastAPI) -> None:
+    """Ejecuta todos los pasos; los errores se registran sin detener el arranque"""
+    from ..database import SessionLocal, calentar_pool
+    from .parametros import recargar_parametros
+    from .reglas import recargar_plantillas
+    from .reglas_feria import obtener_motor
+    from .recomendaciones import precompilar_conjuntos
+    from .benchmarking import precargar_sketches
+    from .catalogo_formularios import recargar_catalogo
+
+    estado.inicio = datetime.utcnow()
+    _paso("pool", calentar_pool)
+
+    db = SessionLocal()
+    try:
+        _paso("parametros", lambda: recargar_parametros(db, forzar=True))
+        _paso("plantillas", lambda: recargar_plantillas(db, forzar=True))
+        _paso("reglas", lambda: (obtener_motor(), precompilar_conjuntos())[1])
+        _paso("benchmarks", lambda: precargar_sketches(db))
+        _paso("catalogo_formularios", lambda: recargar_catalogo(db, forzar=True))
+    finally:
+        db.close()
+
+    _paso("modelos_respuesta", lambda: precompilar_modelos_respuesta(app))
+
+    estado.fin = datetime.utcnow()
+    estado.listo = True
+    total_ms = (estado.fin - estado.inicio).total_seconds() * 1000
+    logger.info(f"Calentamiento completo en {total_ms:.0f} ms", extra={"calentamiento": estado.pasos})
+
+
+def marcar_listo_sin_calentar() -> None:
+    estado.listo = True
@@ -0,0 +1,187 @@
+"""
+Catálogo en memoria de los formularios por industria activos.
+Guarda categorías, formularios y preguntas activas ya validados como modelos de
+respuesta, junto con la lógica condicional compilada de cada formulario
+(ProgramaFormulario), de modo que los endpoints públicos del formulario no
+consultan la base ni reinterpretan las condiciones en cada petición.
+
+Las escrituras hechas en este worker invalidan el catálogo al confirmar la
+transacción; los cambios hechos desde otros workers se detectan sondeando la
+versión de las tablas cada CATALOGO_POLL_SECONDS.
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session
+import asyncio
+import logging
+import os
+import threading
+
+from .. import schemas
+from ..models import CategoriaIndustria, FormularioIndustria, PreguntaFormulario
+from .conditional_logic import ProgramaFormulario
+
+logger = logging.getLogger(__name__)
+
+INTERVALO_SONDEO = int(os.getenv("CATALOGO_POLL_SECONDS", "30"))
+
+_MODELOS_CATALOGO = (CategoriaIndustria, FormularioIndustria, PreguntaFormulario)
+
+
+@dataclass(frozen=True)
+class Catalogo:
+    categorias: Tuple[schemas.CategoriaIndustriaResponse, ...] = ()
+    categorias_por_id: Dict[int, schemas.CategoriaIndustriaResponse] = field(default_factory=dict)
+    formularios_por_categoria: Dict[int, Tuple[schemas.FormularioIndustriaResponse, ...]] = field(default_factory=dict)
+    programas: Dict[int, ProgramaFormulario] = field(default_factory=dict)
+
+
+def _version_tablas(db: Session) -> Tuple[Any, ...]:
+    columnas = []
+    for modelo in _MODELOS_CATALOGO:
+        columnas.append(select(func.count(modelo.id)).scalar_subquery())
+        columnas.append(select(func.max(modelo.updated_at)).scalar_subquery())
+    return tuple(db.execute(select(*columnas)).one())
+
+
+def _construir(db: Session) -> Catalogo:
+    categorias = db.query(CategoriaIndustria)\
+        .filter(CategoriaIndustria.activa == True)\
+        .order_by(CategoriaIndustria.orden, CategoriaIndustria.nombre)\
+        .all()
+    categorias_resp = tuple(schemas.CategoriaIndustriaResponse.model_validate(c) for c in categorias)
+    categorias_por_id = {c.id: c for c in categorias_resp}
+
+    formularios = db.query(FormularioIndustria)\
+        .filter(FormularioIndustria.activo == True)\
+        .order_by(FormularioIndustria.orden, FormularioIndustria.nombre)\
+        .all()
+    por_categoria: Dict[int, List[schemas.FormularioIndustriaResponse]] = {}
+    for formulario in formularios:
+        categoria = categorias_por_id.get(formulario.categoria_id)
+        if categoria is None:
+            # Formularios de categorías inactivas no se listan (el endpoint responde 400)
+            continue
+        datos = schemas.FormularioIndustriaBase.model_validate(formulario, from_attributes=True).model_dump()
+        por_categoria.setdefault(categoria.id, []).append(schemas.FormularioIndustriaResponse(
+            **datos, id=formulario.id, created_at=formulario.created_at,
+            updated_at=formulario.updated_at, categoria=categoria
+        ))
+
+    ids_formularios = [f.id for f in formularios]
+    preguntas_por_formulario: Dict[int, List[schemas.PreguntaFormularioResponse]] = {i: [] for i in ids_formularios}
+    if ids_formularios:
+        preguntas = db.query(PreguntaFormulario)\
+            .filter(PreguntaFormulario.formulario_id.in_(ids_formularios),
+                    PreguntaFormulario.activa == True)\
+            .order_by(PreguntaFormulario.orden)\
+            .all()
+        for pregunta in preguntas:
+            preguntas_por_formulario[pregunta.formulario_id].append(
+                schemas.PreguntaFormularioResponse.model_validate(pregunta)
+            )
+
+    return Catalogo(
+        categorias=categorias_resp,
+        categorias_por_id=categorias_por_id,
+        formularios_por_categoria={c: tuple(f) for c, f in por_categoria.items()},
+        programas={f: ProgramaFormulario(p) for f, p in preguntas_por_formulario.items()},
+    )
+
+
+class _CacheCatalogo:
+    def __init__(self):
+        self._catalogo: Optional[Catalogo] = None
+        self._version_tabla: Optional[Tuple[Any, ...]] = None
+        self._lock = threading.Lock()
+
+    @property
+    def cargado(self) -> bool:
+        return self._catalogo is not None
+
+    def invalidar(self) -> None:
+        self._catalogo = None
+
+    def obtener(self, db: Session) -> Catalogo:
+        catalogo = self._catalogo
+        if catalogo is None:
+            self.recargar(db, forzar=True)
+            catalogo = self._catalogo
+        return catalogo
+
+    def recargar(self, db: Session, forzar: bool = False) -> bool:
+        version = _version_tablas(db)
+        if not forzar and self._catalogo is not None and version == self._version_tabla:
+            return False
+
+        with self._lock:
+            catalogo = _construir(db)
+            self._catalogo = catalogo
+            self._version_tabla = version
+
+        logger.info(
+            f"Catálogo de formularios cargado: {len(catalogo.categorias)} categorías, "
+            f"{len(catalogo.programas)} formularios"
+        )
+        return True
+
+
+_cache = _CacheCatalogo()
+
+
+def obtener_catalogo(db: Session) -> Catalogo:
+    """Catálogo vigente; solo consulta la base si fue invalidado o aún no se cargó"""
+    return _cache.obtener(db)
+
+
+def recargar_catalogo(db: Session, forzar: bool = False) -> bool:
+    return _cache.recargar(db, forzar=forzar)
+
+
+# ========================================
+# INVALIDACIÓN POR ESCRITURAS LOCALES
+# ========================================
+
+@event.listens_for(Session, "after_flush")
+def _marcar_cambios(session, flush_context):
+    for objeto in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(objeto, _MODELOS_CATALOGO):
+            session.info["catalogo_modificado"] = True
+            return
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidar_si_hubo_cambios(session):
+    if session.info.pop("catalogo_modificado", False):
+        _cache.invalidar()
+
+
+@event.listens_for(Session, "after_rollback")
+def _descartar_marca(session):
+    session.info.pop("catalogo_modificado", None)
+
+
+# ========================================
+# TAREA PERIÓDICA
+# ========================================
+
+def _sondear() -> None:
+    from ..database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        _cache.recargar(db)
+    except Exception as e:
+        logger.error(f"Error recargando el catálogo de formularios: {e}")
+    finally:
+        db.close()
+
+
+async def tarea_periodica_catalogo() -> None:
+    """Sondea la versión de las tablas del catálogo para aplicar cambios hechos por otros workers"""
+    loop = asyncio.get_running_loop()
+    while True:
+        await asyncio.sleep(INTERVALO_SONDEO)
+        await loop.run_in_executor(None, _sondear)
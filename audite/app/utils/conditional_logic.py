@@ -4,11 +4,45 @@ Maneja la evaluación de condiciones, filtrado de preguntas visibles,
 y validación de dependencias entre preguntas.
 """
 
-from typing import List, Dict, Any, Optional
+from typing import Callable, List, Dict, Any, Optional
 from sqlalchemy.orm import Session
 import json
 
 
+def compilar_condicion(pregunta: Any) -> Callable[[Dict[Any, Any]], bool]:
+    """
+    Convierte la condición de una pregunta en una función respuestas -> bool,
+    resolviendo una sola vez la pregunta padre, el valor esperado y el operador.
+    """
+    padre_id = pregunta.pregunta_padre_id
+    # Si no tiene pregunta padre, siempre mostrar
+    if not padre_id:
+        return _mostrar_siempre
+    
+    # Si no tiene condición configurada, mostrar por defecto (si el padre fue respondido)
+    if not pregunta.condicion_valor or not pregunta.condicion_operador:
+        return lambda respuestas: padre_id in respuestas
+    
+    # Obtener valor de la condición
+    valor_esperado = pregunta.condicion_valor.get("valor") if isinstance(pregunta.condicion_valor, dict) else pregunta.condicion_valor
+    comparar, negar = _OPERADORES.get(pregunta.condicion_operador, (None, False))
+    # Operador no soportado, mostrar por defecto
+    if comparar is None:
+        return lambda respuestas: padre_id in respuestas
+    
+    clave_otro = f"{padre_id}_otro"
+    
+    def condicion(respuestas: Dict[Any, Any]) -> bool:
+        # Si no hay respuesta del padre, no mostrar
+        if padre_id not in respuestas:
+            return False
+        # Manejar campo "Otro" - si existe valor_otro en respuestas
+        resultado = comparar(respuestas[padre_id], valor_esperado, respuestas.get(clave_otro))
+        return not resultado if negar else resultado
+    
+    return condicion
+
+
 def evaluar_condicion(pregunta: Any, respuestas_anteriores: Dict[int, Any]) -> bool:
     """
     Evalúa si una pregunta condicional debe mostrarse basándose en respuestas anteriores.
@@ -20,39 +54,11 @@ def evaluar_condicion(pregunta: Any, respuestas_anteriores: Dict[int, Any]) -> b
     Returns:
         bool: True si la pregunta debe mostrarse, False en caso contrario
     """
-    # Si no tiene pregunta padre, siempre mostrar
-    if not pregunta.pregunta_padre_id:
-        return True
-    
-    # Si no hay respuesta del padre, no mostrar
-    if pregunta.pregunta_padre_id not in respuestas_anteriores:
-        return False
-    
-    respuesta_padre = respuestas_anteriores[pregunta.pregunta_padre_id]
-    
-    # Si no tiene condición configurada, mostrar por defecto
-    if not pregunta.condicion_valor or not pregunta.condicion_operador:
-        return True
-    
-    # Obtener valor de la condición
-    valor_esperado = pregunta.condicion_valor.get("valor") if isinstance(pregunta.condicion_valor, dict) else pregunta.condicion_valor
-    operador = pregunta.condicion_operador
-    
-    # Manejar campo "Otro" - si existe valor_otro en respuestas_anteriores
-    respuesta_otro = respuestas_anteriores.get(f"{pregunta.pregunta_padre_id}_otro")
-    
-    # Evaluar según operador
-    if operador == "=":
-        return _comparar_igual(respuesta_padre, valor_esperado, respuesta_otro)
-    elif operador == "!=":
-        return not _comparar_igual(respuesta_padre, valor_esperado, respuesta_otro)
-    elif operador == "includes":
-        return _comparar_incluye(respuesta_padre, valor_esperado, respuesta_otro)
-    elif operador == "not_includes":
-        return not _comparar_incluye(respuesta_padre, valor_esperado, respuesta_otro)
-    else:
-        # Operador no soportado, mostrar por defecto
-        return True
+    return compilar_condicion(pregunta)(respuestas_anteriores)
+
+
+def _mostrar_siempre(_respuestas: Dict[Any, Any]) -> bool:
+    return True
 
 
 def _comparar_igual(respuesta: Any, valor_esperado: Any, respuesta_otro: Optional[str] = None) -> bool:
@@ -82,6 +88,31 @@ def _comparar_incluye(respuesta: Any, valor_esperado: Any, respuesta_otro: Optio
     return str(valor_esperado).lower() in str(respuesta).lower()
 
 
+# Operador -> (comparación, negar resultado)
+_OPERADORES = {
+    "=": (_comparar_igual, False),
+    "!=": (_comparar_igual, True),
+    "includes": (_comparar_incluye, False),
+    "not_includes": (_comparar_incluye, True),
+}
+
+
+class ProgramaFormulario:
+    """
+    Preguntas activas de un formulario ya ordenadas, con sus condiciones
+    compiladas. Se construye una vez por versión del catálogo; evaluar la
+    visibilidad es recorrer funciones sin reinterpretar la configuración.
+    """
+
+    def __init__(self, preguntas: List[Any]):
+        self.preguntas = sorted(preguntas, key=lambda p: p.orden)
+        self._condiciones = [(p, compilar_condicion(p)) for p in self.preguntas]
+        self.preguntas_base = [p for p in self.preguntas if not p.pregunta_padre_id]
+
+    def visibles(self, respuestas: Dict[Any, Any]) -> List[Any]:
+        return [pregunta for pregunta, condicion in self._condiciones if condicion(respuestas)]
+
+
 def filtrar_preguntas_visibles(preguntas: List[Any], respuestas: Dict[int, Any]) -> List[Any]:
     """
     Filtra la lista de preguntas para mostrar solo las que cumplen sus condiciones.
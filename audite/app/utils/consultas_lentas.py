@@ -0,0 +1,197 @@
+"""
+Detector de consultas lentas.
+Las sentencias que superan SLOW_QUERY_MS se registran en un buffer circular con
+su huella (SQL normalizado), la forma de los parámetros, la ruta que la originó
+y, en PostgreSQL, una muestra de EXPLAIN (ANALYZE, BUFFERS). El EXPLAIN se
+ejecuta en un hilo aparte con su propia conexión, solo para SELECT y como mucho
+una vez por huella cada SLOW_QUERY_EXPLAIN_INTERVAL segundos.
+"""
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .instrumentacion import metricas_actuales
+
+logger = logging.getLogger(__name__)
+
+HABILITADO = os.getenv("SLOW_QUERY_LOG_ENABLED", "true").lower() == "true"
+UMBRAL_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+TAMANO_BUFFER = int(os.getenv("SLOW_QUERY_BUFFER", "200"))
+EXPLAIN_HABILITADO = os.getenv("SLOW_QUERY_EXPLAIN", "true").lower() == "true"
+INTERVALO_EXPLAIN = float(os.getenv("SLOW_QUERY_EXPLAIN_INTERVAL", "300"))
+
+_ESPACIOS = re.compile(r"\s+")
+_CADENAS = re.compile(r"'(?:[^']|'')*'")
+_NUMEROS = re.compile(r"\b\d+(?:\.\d+)?\b")
+_LISTAS = re.compile(r"\(\s*(?:\?|%\([^)]+\)s|%s|:\w+)(?:\s*,\s*(?:\?|%\([^)]+\)s|%s|:\w+))+\s*\)")
+_POSTCOMPILE = re.compile(r"__\[POSTCOMPILE_\w+\]")
+
+
+def normalizar_sql(sql: str) -> str:
+    """SQL sin literales ni listas de parámetros variables, para agrupar sentencias iguales"""
+    sql = _ESPACIOS.sub(" ", sql).strip()
+    sql = _CADENAS.sub("?", sql)
+    sql = _NUMEROS.sub("?", sql)
+    sql = _POSTCOMPILE.sub("(...)", sql)
+    return _LISTAS.sub("(...)", sql)
+
+
+def huella(sql_normalizado: str) -> str:
+    return hashlib.md5(sql_normalizado.encode("utf-8")).hexdigest()[:12]
+
+
+def _tipo(valor: Any) -> str:
+    return "null" if valor is None else type(valor).__name__
+
+
+def forma_parametros(parametros: Any, executemany: bool) -> Any:
+    """Tipos de los parámetros (nunca sus valores)"""
+    if executemany and isinstance(parametros, (list, tuple)):
+        return {"filas": len(parametros), "forma": forma_parametros(parametros[0], False) if parametros else None}
+    if isinstance(parametros, dict):
+        return {clave: _tipo(valor) for clave, valor in parametros.items()}
+    if isinstance(parametros, (list, tuple)):
+        return [_tipo(valor) for valor in parametros]
+    return _tipo(parametros)
+
+
+class RegistroConsultasLentas:
+    def __init__(self, tamano: int = TAMANO_BUFFER):
+        self._entradas: deque = deque(maxlen=tamano)
+        self._ultimo_explain: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="explain")
+        self._engine: Optional[Engine] = None
+
+    def instalar(self, engine: Engine) -> None:
+        self._engine = engine
+        if not event.contains(engine, "before_cursor_execute", _antes_de_ejecutar):
+            event.listen(engine, "before_cursor_execute", _antes_de_ejecutar)
+            event.listen(engine, "after_cursor_execute", _despues_de_ejecutar)
+
+    def registrar(self, sql: str, parametros: Any, executemany: bool, duracion_ms: float) -> None:
+        normalizado = normalizar_sql(sql)
+        clave = huella(normalizado)
+        ruta, metodo = None, None
+        peticion = metricas_actuales()
+        if peticion is not None and peticion.scope is not None:
+            ruta_obj = peticion.scope.get("route")
+            ruta = getattr(ruta_obj, "path", None) or peticion.scope.get("path")
+            metodo = peticion.scope.get("method")
+
+        entrada = {
+            "huella": clave,
+            "sql": normalizado,
+            "parametros": forma_parametros(parametros, executemany),
+            "duracion_ms": round(duracion_ms, 1),
+            "ruta": ruta,
+            "metodo": metodo,
+            "timestamp": datetime.utcnow().isoformat(),
+            "explain": None,
+        }
+        with self._lock:
+            self._entradas.append(entrada)
+        logger.warning(f"Consulta lenta {clave} ({duracion_ms:.0f} ms) en {metodo} {ruta}: {normalizado[:200]}")
+
+        if self._debe_explicar(clave, sql, executemany):
+            self._executor.submit(self._explicar, entrada, sql, parametros)
+
+    def _debe_explicar(self, clave: str, sql: str, executemany: bool) -> bool:
+        if not EXPLAIN_HABILITADO or executemany or self._engine is None:
+            return False
+        if self._engine.dialect.name != "postgresql":
+            return False
+        # EXPLAIN ANALYZE ejecuta la sentencia: solo lecturas
+        if not sql.lstrip().upper().startswith(("SELECT", "WITH")):
+            return False
+        ahora = time.monotonic()
+        with self._lock:
+            if ahora - self._ultimo_explain.get(clave, -INTERVALO_EXPLAIN) < INTERVALO_EXPLAIN:
+                return False
+            self._ultimo_explain[clave] = ahora
+        return True
+
+    def _explicar(self, entrada: Dict[str, Any], sql: str, parametros: Any) -> None:
+        try:
+            with self._engine.connect() as conn:
+                # Cursor DBAPI directo: no dispara los eventos del engine
+                cursor = conn.connection.cursor()
+                try:
+                    cursor.execute("EXPLAIN (ANALYZE, BUFFERS) " + sql, parametros)
+                    entrada["explain"] = "\n".join(fila[0] for fila in cursor.fetchall())
+                finally:
+                    cursor.close()
+                conn.rollback()
+        except Exception as e:
+            entrada["explain"] = f"Error al obtener EXPLAIN: {e}"
+
+    def entradas(self, huella_filtro: Optional[str] = None, limite: int = 50) -> List[Dict[str, Any]]:
+        with self._lock:
+            entradas = list(self._entradas)
+        if huella_filtro:
+            entradas = [e for e in entradas if e["huella"] == huella_filtro]
+        return list(reversed(entradas))[:limite]
+
+    def resumen(self) -> List[Dict[str, Any]]:
+        """Agregado por huella, ordenado por tiempo total"""
+        grupos: Dict[str, Dict[str, Any]] = {}
+        with self._lock:
+            entradas = list(self._entradas)
+        for e in entradas:
+            g = grupos.setdefault(e["huella"], {
+                "huella": e["huella"], "sql": e["sql"], "rutas": set(),
+                "cantidad": 0, "total_ms": 0.0, "max_ms": 0.0,
+            })
+            g["cantidad"] += 1
+            g["total_ms"] += e["duracion_ms"]
+            g["max_ms"] = max(g["max_ms"], e["duracion_ms"])
+            if e["ruta"]:
+                g["rutas"].add(e["ruta"])
+        resultado = []
+        for g in grupos.values():
+            g["rutas"] = sorted(g["rutas"])
+            g["promedio_ms"] = round(g["total_ms"] / g["cantidad"], 1)
+            g["total_ms"] = round(g["total_ms"], 1)
+            resultado.append(g)
+        return sorted(resultado, key=lambda g: g["total_ms"], reverse=True)
+
+    def limpiar(self) -> None:
+        with self._lock:
+            self._entradas.clear()
+            self._ultimo_explain.clear()
+
+
+registro = RegistroConsultasLentas()
+
+
+def _antes_de_ejecutar(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("inicio_consulta", []).append(time.perf_counter())
+
+
+def _despues_de_ejecutar(conn, cursor, statement, parameters, context, executemany):
+    inicios = conn.info.get("inicio_consulta")
+    if not inicios:
+        return
+    duracion_ms = (time.perf_counter() - inicios.pop()) * 1000
+    if duracion_ms >= UMBRAL_MS:
+        try:
+            registro.registrar(statement, parameters, executemany, duracion_ms)
+        except Exception as e:
+            logger.error(f"Error registrando consulta lenta: {e}")
+
+
+def instalar_detector(engine: Engine) -> None:
+    """Activa el detector sobre el engine si SLOW_QUERY_LOG_ENABLED"""
+    if HABILITADO:
+        registro.instalar(engine)
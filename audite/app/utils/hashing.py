@@ -0,0 +1,97 @@
+"""
+Pool acotado para el hashing y la verificación de contraseñas con bcrypt.
+bcrypt tarda 100-300 ms por operación; ejecutarlo dentro de un handler async
+bloquea el event loop. Aquí se ejecuta en un pool de hilos dedicado (bcrypt
+libera el GIL) con una cola limitada: si el pool está saturado se rechaza la
+operación en lugar de acumular esperas, y el endpoint responde 429.
+"""
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict
+import asyncio
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+HILOS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Operaciones que pueden esperar turno además de las que se están ejecutando
+MAXIMO_EN_COLA = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "32"))
+# Segundos sugeridos al cliente en Retry-After cuando se rechaza por saturación
+REINTENTAR_EN = int(os.getenv("PASSWORD_HASH_RETRY_AFTER", "2"))
+
+
+class PoolSaturado(Exception):
+    """El pool de hashing no admite más operaciones en este momento"""
+
+
+class _PoolHashing:
+    def __init__(self, hilos: int, maximo_en_cola: int):
+        self._executor = ThreadPoolExecutor(max_workers=hilos, thread_name_prefix="bcrypt")
+        self.hilos = hilos
+        self.capacidad = hilos + maximo_en_cola
+        self._pendientes = 0
+        self._rechazadas = 0
+        self._completadas = 0
+        self._fallidas = 0
+        self._lock = threading.Lock()
+
+    def _reservar(self) -> None:
+        with self._lock:
+            if self._pendientes >= self.capacidad:
+                self._rechazadas += 1
+                raise PoolSaturado()
+            self._pendientes += 1
+
+    def _liberar(self, futuro: Future) -> None:
+        with self._lock:
+            self._pendientes -= 1
+            if futuro.cancelled():
+                return
+            if futuro.exception() is not None:
+                self._fallidas += 1
+            else:
+                self._completadas += 1
+
+    async def ejecutar(self, funcion: Callable[..., Any], *args: Any) -> Any:
+        self._reservar()
+        try:
+            futuro = self._executor.submit(funcion, *args)
+        except BaseException:
+            with self._lock:
+                self._pendientes -= 1
+            raise
+        # El turno se libera cuando termina el hilo, no cuando deja de esperarlo la
+        # petición: si el cliente se desconecta, bcrypt sigue ocupando el hilo
+        futuro.add_done_callback(self._liberar)
+        return await asyncio.wrap_future(futuro)
+
+    def estadisticas(self) -> Dict[str, int]:
+        with self._lock:
+            pendientes = self._pendientes
+            return {
+                "hilos": self.hilos,
+                "capacidad": self.capacidad,
+                "pendientes": pendientes,
+                "en_cola": max(0, pendientes - self.hilos),
+                "completadas": self._completadas,
+                "fallidas": self._fallidas,
+                "rechazadas": self._rechazadas,
+            }
+
+
+_pool = _PoolHashing(HILOS, MAXIMO_EN_COLA)
+
+
+async def ejecutar_hash(funcion: Callable[..., Any], *args: Any) -> Any:
+    """
+    Ejecuta una operación de hashing/verificación en el pool dedicado.
+    Lanza PoolSaturado si ya hay demasiadas operaciones pendientes.
+    """
+    return await _pool.ejecutar(funcion, *args)
+
+
+def estadisticas_hashing() -> Dict[str, int]:
+    """Profundidad de cola y contadores del pool de hashing"""
+    return _pool.estadisticas()
@@ -0,0 +1,157 @@
+"""
+Instrumentación por petición: tiempo total, tiempo en base de datos, cantidad
+de sentencias SQL y filas devueltas. Los eventos de cursor de SQLAlchemy
+acumulan en un objeto de la petición en curso (ContextVar, que se propaga a los
+hilos donde corren los endpoints síncronos); el middleware lo publica como
+cabecera Server-Timing y como una línea de log estructurada.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+import logging
+import os
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger("app.peticiones")
+
+HABILITADO = os.getenv("REQUEST_TIMING_ENABLED", "true").lower() == "true"
+CABECERA_HABILITADA = os.getenv("SERVER_TIMING_ENABLED", "true").lower() == "true"
+# Umbrales a partir de los cuales la línea de log sube a WARNING
+UMBRAL_LENTO_MS = float(os.getenv("SLOW_REQUEST_MS", "1000"))
+UMBRAL_SENTENCIAS = int(os.getenv("REQUEST_QUERY_WARN", "50"))
+
+
+class MetricasPeticion:
+    __slots__ = ("inicio", "tiempo_db", "sentencias", "filas", "scope")
+
+    def __init__(self, scope: Optional[Dict[str, Any]] = None):
+        self.scope = scope  # El enrutador completa scope["route"] al resolver la ruta
+        self.inicio = time.perf_counter()
+        self.tiempo_db = 0.0
+        self.sentencias = 0
+        self.filas = 0
+
+    def total_ms(self) -> float:
+        return (time.perf_counter() - self.inicio) * 1000
+
+    def db_ms(self) -> float:
+        return self.tiempo_db * 1000
+
+
+_peticion_actual: ContextVar[Optional[MetricasPeticion]] = ContextVar("metricas_peticion", default=None)
+
+
+def iniciar_peticion(scope: Optional[Dict[str, Any]] = None) -> MetricasPeticion:
+    metricas = MetricasPeticion(scope)
+    _peticion_actual.set(metricas)
+    return metricas
+
+
+def metricas_actuales() -> Optional[MetricasPeticion]:
+    return _peticion_actual.get()
+
+
+# ========================================
+# EVENTOS DE CURSOR
+# ========================================
+
+def _antes_de_ejecutar(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._inicio_sql = time.perf_counter()
+
+
+def _despues_de_ejecutar(conn, cursor, statement, parameters, context, executemany):
+    metricas = _peticion_actual.get()
+    if metricas is None or context is None:
+        return
+    inicio = getattr(context, "_inicio_sql", None)
+    if inicio is not None:
+        metricas.tiempo_db += time.perf_counter() - inicio
+    metricas.sentencias += 1
+    # rowcount es -1 en drivers que no lo informan para SELECT (p.ej. sqlite)
+    filas = getattr(cursor, "rowcount", -1)
+    if filas and filas > 0:
+        metricas.filas += filas
+
+
+def instrumentar_engine(engine: Engine) -> None:
+    """Registra los eventos de cursor en el engine (idempotente)"""
+    if not event.contains(engine, "before_cursor_execute", _antes_de_ejecutar):
+        event.listen(engine, "before_cursor_execute", _antes_de_ejecutar)
+        event.listen(engine, "after_cursor_execute", _despues_de_ejecutar)
+
+
+class ConteoSentencias:
+    """Sentencias SQL ejecutadas dentro de un bloque `contar_sentencias`"""
+
+    def __init__(self):
+        self.sentencias: List[str] = []
+
+    @property
+    def total(self) -> int:
+        return len(self.sentencias)
+
+    def detalle(self) -> str:
+        return "\n".join(f"{i}. {sql}" for i, sql in enumerate(self.sentencias, 1))
+
+
+@contextmanager
+def contar_sentencias(engine: Engine) -> Iterator[ConteoSentencias]:
+    """
+    Cuenta las sentencias que el engine ejecuta dentro del bloque, en cualquier
+    hilo (los endpoints síncronos corren en el threadpool). Pensado para tests
+    de presupuesto de consultas y diagnóstico puntual, no para producción.
+    """
+    conteo = ConteoSentencias()
+
+    def _registrar(conn, cursor, statement, parameters, context, executemany):
+        conteo.sentencias.append(statement)
+
+    event.listen(engine, "before_cursor_execute", _registrar)
+    try:
+        yield conteo
+    finally:
+        event.remove(engine, "before_cursor_execute", _registrar)
+
+
+# ========================================
+# PUBLICACIÓN
+# ========================================
+
+def cabecera_server_timing(metricas: MetricasPeticion, total_ms: float) -> str:
+    return (
+        f'app;dur={total_ms:.1f}, '
+        f'db;dur={metricas.db_ms():.1f};desc="sentencias={metricas.sentencias}"'
+    )
+
+
+def registrar_peticion(metodo: str, ruta: str, estado: int, metricas: MetricasPeticion,
+                       total_ms: float) -> Dict[str, Any]:
+    datos = {
+        "metodo": metodo,
+        "ruta": ruta,
+        "estado": estado,
+        "total_ms": round(total_ms, 1),
+        "db_ms": round(metricas.db_ms(), 1),
+        "sentencias": metricas.sentencias,
+        "filas": metricas.filas,
+    }
+    nivel = logging.INFO
+    if total_ms >= UMBRAL_LENTO_MS or metricas.sentencias >= UMBRAL_SENTENCIAS:
+        nivel = logging.WARNING
+    logger.log(
+        nivel,
+        " ".join(f"{clave}={valor}" for clave, valor in datos.items()),
+        extra={"peticion": datos},
+    )
+    return datos
+
+
+def plantilla_ruta(scope: Dict[str, Any]) -> str:
+    """Ruta con parámetros sin expandir (/auditoria-agro/{auditoria_id}) para agrupar"""
+    ruta = scope.get("route")
+    return getattr(ruta, "path", None) or scope.get("path", "")
@@ -0,0 +1,139 @@
+"""
+Paginación por cursor (keyset) sobre (created_at, id).
+
+En lugar de OFFSET, cada página filtra por la posición de la última fila de la
+anterior: `WHERE (created_at, id) > (:c, :i) ORDER BY created_at, id LIMIT n`.
+Con el índice (created_at, id) una página profunda cuesta lo mismo que la
+primera. El cursor es opaco para el cliente (base64 de la posición).
+
+El OFFSET (skip/offset) se mantiene para los clientes existentes y solo se aplica
+cuando no se envía cursor. Los totales exactos (count) recorren toda la tabla;
+`total_tabla` usa la estimación de pg_class.reltuples en PostgreSQL.
+
+created_at no puede ser NULL en las tablas paginadas: un cursor (NULL, id) no
+compara con nada y corta el recorrido. `ahora` es su server_default para las
+filas que se insertan fuera del ORM.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+import base64
+import json
+
+from fastapi import Response
+from sqlalchemy import DateTime, func, text, tuple_
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Query, Session
+from sqlalchemy.sql.functions import FunctionElement
+
+CABECERA_SIGUIENTE = "X-Next-Cursor"
+CABECERA_TOTAL = "X-Total-Count"
+CABECERA_TOTAL_APROXIMADO = "X-Total-Count-Approximate"
+
+
+class ahora(FunctionElement):
+    """
+    Hora actual para server_default de created_at. En SQLite se escribe con el
+    formato de texto con que DateTime guarda los valores (microsegundos
+    incluidos): CURRENT_TIMESTAMP no los tiene y las filas con la misma hora
+    quedarían fuera de la comparación (created_at, id) > cursor.
+    """
+    type = DateTime()
+    name = "ahora"
+    inherit_cache = True
+
+
+@compiles(ahora)
+def _ahora(elemento, compilador, **kw):
+    return "CURRENT_TIMESTAMP"
+
+
+@compiles(ahora, "sqlite")
+def _ahora_sqlite(elemento, compilador, **kw):
+    return "(strftime('%Y-%m-%d %H:%M:%f000', 'now'))"
+
+
+class CursorInvalido(ValueError):
+    """El cursor recibido no fue emitido por esta API (o está corrupto)"""
+
+
+@dataclass(frozen=True)
+class Pagina:
+    filas: List[Any]
+    siguiente: Optional[str] = None
+
+
+def codificar_cursor(creado: Optional[datetime], id_: Any) -> str:
+    datos = json.dumps([creado.isoformat() if creado else None, id_], separators=(",", ":"))
+    return base64.urlsafe_b64encode(datos.encode()).decode().rstrip("=")
+
+
+def decodificar_cursor(cursor: str) -> Tuple[Optional[datetime], Any]:
+    try:
+        relleno = "=" * (-len(cursor) % 4)
+        creado, id_ = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+        return (datetime.fromisoformat(creado) if creado else None), id_
+    except (ValueError, TypeError) as e:
+        raise CursorInvalido(f"Cursor inválido: {cursor!r}") from e
+
+
+def paginar(query: Query, modelo: Any, limite: int, cursor: Optional[str] = None,
+            offset: int = 0, descendente: bool = False) -> Pagina:
+    """
+    Página de `query` ordenada por (created_at, id). Trae una fila de más para
+    saber si hay página siguiente sin contar.
+    """
+    if limite <= 0:
+        return Pagina(filas=[])
+    creado, id_ = modelo.created_at, modelo.id
+    if cursor:
+        posicion = tuple_(creado, id_)
+        valores = tuple_(*decodificar_cursor(cursor))
+        query = query.filter(posicion < valores if descendente else posicion > valores)
+    elif offset:
+        query = query.offset(offset)
+
+    orden = (creado.desc(), id_.desc()) if descendente else (creado, id_)
+    filas = query.order_by(*orden).limit(limite + 1).all()
+
+    siguiente = None
+    if len(filas) > limite:
+        filas = filas[:limite]
+        ultima = filas[-1]
+        siguiente = codificar_cursor(ultima.created_at, ultima.id)
+    return Pagina(filas=filas, siguiente=siguiente)
+
+
+def total_tabla(db: Session, modelo: Any, aproximado: bool = True) -> Tuple[int, bool]:
+    """
+    Filas de la tabla de `modelo` y si el número es una estimación. En PostgreSQL
+    usa reltuples (actualizado por ANALYZE/autovacuum); en una tabla particionada,
+    la suma de sus particiones. Si la tabla nunca se analizó, o en otros motores,
+    cuenta.
+    """
+    if aproximado and db.get_bind().dialect.name == "postgresql":
+        estimado = db.execute(
+            text("""
+                SELECT CASE WHEN p.relkind = 'p' THEN (
+                    SELECT sum(c.reltuples) FILTER (WHERE c.reltuples >= 0)::bigint
+                    FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+                    WHERE i.inhparent = p.oid
+                ) ELSE p.reltuples::bigint END
+                FROM pg_class p WHERE p.oid = to_regclass(:tabla)
+            """),
+            {"tabla": modelo.__table__.fullname},
+        ).scalar()
+        if estimado is not None and estimado >= 0:
+            return int(estimado), True
+    return db.query(func.count(modelo.id)).scalar(), False
+
+
+def cabeceras_pagina(response: Response, pagina: Pagina,
+                     total: Optional[Tuple[int, bool]] = None) -> None:
+    """Cursor de la página siguiente (y total) para endpoints que responden una lista"""
+    if pagina.siguiente:
+        response.headers[CABECERA_SIGUIENTE] = pagina.siguiente
+    if total is not None:
+        response.headers[CABECERA_TOTAL] = str(total[0])
+        response.headers[CABECERA_TOTAL_APROXIMADO] = "true" if total[1] else "false"
@@ -0,0 +1,131 @@
+"""
+Caché de parámetros del sistema para los calculadores.
+Carga los valores de ParametrosSistema en un objeto tipado e inmutable al
+arrancar, y lo reemplaza cuando cambia la versión de la tabla (sondeo periódico
+de count + max(updated_at)), de modo que el hot path solo lee memoria.
+"""
+
+from dataclasses import dataclass, fields, replace
+from typing import Any, Dict, Optional, Tuple
+from sqlalchemy.orm import Session
+from sqlalchemy import func
+import asyncio
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+INTERVALO_SONDEO = int(os.getenv("PARAMETROS_POLL_SECONDS", "30"))
+
+
+@dataclass(frozen=True)
+class ParametrosCalculo:
+    """
+    Parámetros usados por los calculadores. El nombre de cada campo coincide con
+    ParametrosSistema.nombre; valor se guarda como {"valor": <número>}.
+    """
+    # Factores de emisión
+    factor_emision_electricidad: float = 0.4  # kgCO2e/kWh
+    factor_emision_combustible: float = 2.7  # kgCO2e/litro
+
+    # Costos unitarios
+    costo_kwh: float = 0.12  # $/kWh
+    costo_combustible_litro: float = 1.2  # $/litro
+    kwh_por_litro_combustible: float = 10.0  # kWh/litro
+
+    # Potencial de ahorro (fracciones)
+    ahorro_base_agro: float = 0.15
+    ahorro_maximo_agro: float = 0.40
+    ahorro_base_basica: float = 0.15
+    ahorro_maximo_basica: float = 0.35
+    ahorro_base_feria: float = 0.15
+
+    # Estimaciones del diagnóstico de feria
+    fraccion_consumo_combustible_feria: float = 0.3
+    fraccion_costo_multas_feria: float = 0.05  # por multa recibida
+    fraccion_costo_iluminacion_feria: float = 0.15
+
+
+_CAMPOS = {f.name for f in fields(ParametrosCalculo)}
+
+
+def _extraer_valor(valor: Any) -> Optional[float]:
+    if isinstance(valor, dict):
+        valor = valor.get("valor")
+    try:
+        return float(valor)
+    except (TypeError, ValueError):
+        return None
+
+
+class _CacheParametros:
+    def __init__(self):
+        self._actual = ParametrosCalculo()
+        self._version: Optional[Tuple[int, Any]] = None
+        self._lock = threading.Lock()
+
+    @property
+    def actual(self) -> ParametrosCalculo:
+        return self._actual
+
+    def _version_tabla(self, db: Session) -> Tuple[int, Any]:
+        from ..models import ParametrosSistema
+        return db.query(func.count(ParametrosSistema.id), func.max(ParametrosSistema.updated_at)).one()
+
+    def recargar(self, db: Session, forzar: bool = False) -> bool:
+        """Recarga desde la tabla si cambió su versión. Devuelve True si hubo cambios."""
+        from ..models import ParametrosSistema
+
+        version = tuple(self._version_tabla(db))
+        if not forzar and version == self._version:
+            return False
+
+        with self._lock:
+            valores: Dict[str, float] = {}
+            filas = db.query(ParametrosSistema.nombre, ParametrosSistema.valor)\
+                .filter(ParametrosSistema.nombre.in_(_CAMPOS))\
+                .all()
+            for nombre, valor in filas:
+                numero = _extraer_valor(valor)
+                if numero is None:
+                    logger.warning(f"Parámetro '{nombre}' ignorado: valor no numérico {valor!r}")
+                    continue
+                valores[nombre] = numero
+            self._actual = replace(ParametrosCalculo(), **valores)
+            self._version = version
+
+        logger.info(f"Parámetros del sistema cargados ({len(valores)} desde base de datos)")
+        return True
+
+
+_cache = _CacheParametros()
+
+
+def get_parametros() -> ParametrosCalculo:
+    """Parámetros vigentes; lectura en memoria sin acceso a base de datos."""
+    return _cache.actual
+
+
+def recargar_parametros(db: Session, forzar: bool = False) -> bool:
+    return _cache.recargar(db, forzar=forzar)
+
+
+def _sondear() -> None:
+    from ..database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        _cache.recargar(db)
+    except Exception as e:
+        logger.error(f"Error recargando parámetros del sistema: {e}")
+    finally:
+        db.close()
+
+
+async def tarea_periodica_parametros() -> None:
+    """Sondea la versión de parametros_sistema para aplicar cambios hechos por otros workers"""
+    loop = asyncio.get_running_loop()
+    while True:
+        await loop.run_in_executor(None, _sondear)
+        await asyncio.sleep(INTERVALO_SONDEO)
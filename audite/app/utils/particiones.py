@@ -0,0 +1,190 @@
+"""
+Particionado mensual por created_at de las tablas de respuestas (solo PostgreSQL).
+
+La migración 008 convierte respuestas_formulario y autodiagnostico_respuestas en
+tablas particionadas por rango de created_at, con una partición por mes
+(`<tabla>_pYYYYMM`) más una DEFAULT que recibe lo que no tenga partición. Esta
+tarea las mantiene: crea por adelantado las particiones de los próximos meses y
+elimina (DETACH + DROP) las que quedaron fuera de la retención, pero solo cuando
+el archivo frío (utils/archivo_frio.py) ya movió todas sus filas a Parquet: una
+partición vencida con filas se conserva, porque los endpoints de sesión y el
+archivador solo leen la tabla y el archivo frío.
+
+Las consultas con rango de created_at (estadísticas mensuales, paginación por
+cursor) solo recorren las particiones del rango; las búsquedas por sesión usan
+el índice (session_id, created_at) de cada partición, que es pequeño.
+
+En SQLite (desarrollo y tests) las tablas no se particionan y la tarea no hace nada.
+"""
+
+from datetime import date, datetime, timezone
+from typing import Dict, List, Optional
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+import asyncio
+import logging
+import os
+import re
+
+logger = logging.getLogger(__name__)
+
+TABLAS = ("respuestas_formulario", "autodiagnostico_respuestas")
+# Meses futuros con partición creada (además del actual)
+MESES_ADELANTE = int(os.getenv("PARTITION_MONTHS_AHEAD", "3"))
+# Meses completos que se conservan en la tabla; 0 = no eliminar nunca
+RETENCION_MESES = int(os.getenv("PARTITION_RETENTION_MONTHS", "0"))
+INTERVALO_MANTENCION = int(os.getenv("PARTITION_MAINTENANCE_SECONDS", "21600"))
+
+# Cerrojo consultivo: un solo worker ejecuta la mantención a la vez
+_CERROJO = 4_902_049
+_PATRON_PARTICION = re.compile(r"_p(\d{4})(\d{2})$")
+
+
+def inicio_mes(fecha: date) -> date:
+    return date(fecha.year, fecha.month, 1)
+
+
+def sumar_meses(mes: date, meses: int) -> date:
+    indice = mes.year * 12 + mes.month - 1 + meses
+    return date(indice // 12, indice % 12 + 1, 1)
+
+
+def nombre_particion(tabla: str, mes: date) -> str:
+    return f"{tabla}_p{mes:%Y%m}"
+
+
+def mes_de_particion(nombre: str) -> Optional[date]:
+    """Mes que cubre una partición mensual por su nombre (None para la DEFAULT)"""
+    coincidencia = _PATRON_PARTICION.search(nombre)
+    if not coincidencia:
+        return None
+    return date(int(coincidencia.group(1)), int(coincidencia.group(2)), 1)
+
+
+def esta_particionada(db: Session, tabla: str) -> bool:
+    if db.get_bind().dialect.name != "postgresql":
+        return False
+    return db.execute(
+        text("SELECT relkind = 'p' FROM pg_class WHERE oid = to_regclass(:tabla)"), {"tabla": tabla}
+    ).scalar() is True
+
+
+def particiones(db: Session, tabla: str) -> List[str]:
+    """Nombres de las particiones adjuntas a `tabla`"""
+    filas = db.execute(text("""
+        SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = to_regclass(:tabla) ORDER BY c.relname
+    """), {"tabla": tabla})
+    return [nombre for (nombre,) in filas]
+
+
+def crear_particion(db: Session, tabla: str, mes: date) -> str:
+    """
+    Crea la partición del mes y la adjunta. Si la DEFAULT ya recibió filas de ese
+    mes (la mantención no corrió a tiempo) las mueve antes de adjuntarla, que de
+    otro modo fallaría.
+    """
+    nombre = nombre_particion(tabla, mes)
+    desde = f"{mes.isoformat()} 00:00:00+00"
+    hasta = f"{sumar_meses(mes, 1).isoformat()} 00:00:00+00"
+    db.execute(text(f"CREATE TABLE {nombre} (LIKE {tabla} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    db.execute(text(f"""
+        WITH movidas AS (
+            DELETE FROM {tabla}_default
+            WHERE created_at >= '{desde}' AND created_at < '{hasta}'
+            RETURNING *
+        )
+        INSERT INTO {nombre} SELECT * FROM movidas
+    """))
+    db.execute(text(f"ALTER TABLE {tabla} ATTACH PARTITION {nombre} FOR VALUES FROM ('{desde}') TO ('{hasta}')"))
+    return nombre
+
+
+def eliminar_particion(db: Session, tabla: str, nombre: str) -> bool:
+    """
+    Separa y borra la partición si ya no tiene filas (el archivo frío las movió).
+    Devuelve False, sin tocarla, si aún tiene filas.
+    """
+    # SHARE bloquea escrituras en la partición hasta el commit: nadie la llena
+    # entre la comprobación y el DETACH
+    db.execute(text(f"LOCK TABLE {nombre} IN SHARE MODE"))
+    if db.execute(text(f"SELECT EXISTS (SELECT 1 FROM {nombre})")).scalar():
+        return False
+    db.execute(text(f"ALTER TABLE {tabla} DETACH PARTITION {nombre}"))
+    db.execute(text(f"DROP TABLE {nombre}"))
+    return True
+
+
+def mantener_particiones(db: Session, hoy: Optional[date] = None) -> Dict[str, Dict[str, List[str]]]:
+    """
+    Crea las particiones que falten hasta MESES_ADELANTE y elimina las anteriores a
+    la retención que el archivo frío ya vació. Devuelve, por tabla, las creadas,
+    las eliminadas y las vencidas que se conservan por tener filas. No hace nada si
+    otro worker tiene el cerrojo o las tablas no están particionadas.
+    """
+    if db.get_bind().dialect.name != "postgresql":
+        return {}
+    if not db.execute(text("SELECT pg_try_advisory_xact_lock(:clave)"), {"clave": _CERROJO}).scalar():
+        return {}
+
+    mes_actual = inicio_mes(hoy or datetime.now(timezone.utc).date())
+    limite = sumar_meses(mes_actual, -RETENCION_MESES) if RETENCION_MESES > 0 else None
+    resumen = {}
+    for tabla in TABLAS:
+        if not esta_particionada(db, tabla):
+            continue
+        existentes = set(particiones(db, tabla))
+        creadas, eliminadas, con_filas = [], [], []
+        for i in range(MESES_ADELANTE + 1):
+            mes = sumar_meses(mes_actual, i)
+            if nombre_particion(tabla, mes) not in existentes:
+                creadas.append(crear_particion(db, tabla, mes))
+        if limite is not None:
+            for nombre in sorted(existentes):
+                mes = mes_de_particion(nombre)
+                if mes is not None and mes < limite:
+                    (eliminadas if eliminar_particion(db, tabla, nombre) else con_filas).append(nombre)
+        resumen[tabla] = {"creadas": creadas, "eliminadas": eliminadas, "con_filas": con_filas}
+    db.commit()
+    return resumen
+
+
+# ========================================
+# TAREA PERIÓDICA
+# ========================================
+
+def _mantener() -> None:
+    from ..database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        for tabla, cambios in mantener_particiones(db).items():
+            if cambios["creadas"] or cambios["eliminadas"]:
+                logger.info(
+                    f"Particiones de {tabla}: creadas {cambios['creadas']}, eliminadas {cambios['eliminadas']}"
+                )
+            if cambios["con_filas"]:
+                logger.info(
+                    f"Particiones vencidas de {tabla} que se conservan hasta que el archivo frío "
+                    f"mueva sus filas: {cambios['con_filas']}"
+                )
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error en la mantención de particiones: {e}")
+    finally:
+        db.close()
+
+
+async def tarea_periodica_particiones() -> None:
+    """Bucle de fondo que mantiene creadas las particiones futuras y elimina las vencidas ya archivadas"""
+    from .archivo_frio import RETENCION_DIAS
+
+    if 0 < RETENCION_MESES * 31 < RETENCION_DIAS:
+        logger.warning(
+            f"PARTITION_RETENTION_MONTHS={RETENCION_MESES} es menor que ARCHIVE_RETENTION_DAYS="
+            f"{RETENCION_DIAS}: las particiones vencidas se eliminarán recién cuando el archivo frío las vacíe"
+        )
+    loop = asyncio.get_running_loop()
+    while True:
+        await loop.run_in_executor(None, _mantener)
+        await asyncio.sleep(INTERVALO_MANTENCION)
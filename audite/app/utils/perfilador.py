@@ -0,0 +1,155 @@
+"""
+Perfilador por muestreo de pilas, en proceso.
+Un hilo lee sys._current_frames() cada PROFILER_INTERVAL_MS y cuenta las pilas
+de los demás hilos; el resultado se entrega en formato "collapsed stack"
+(raíz;...;hoja cantidad), que leen directamente flamegraph.pl y speedscope.
+No instrumenta funciones, así que el costo sobre el worker es el del muestreo.
+Solo se permite una sesión de muestreo a la vez por worker.
+"""
+
+from collections import Counter, OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional, Tuple
+import os
+import sys
+import threading
+import time
+import uuid
+
+INTERVALO_MS = float(os.getenv("PROFILER_INTERVAL_MS", "5"))
+# Las peticiones individuales duran milisegundos: se muestrean más seguido
+INTERVALO_PETICION_MS = float(os.getenv("PROFILER_REQUEST_INTERVAL_MS", "1"))
+DURACION_MAXIMA = float(os.getenv("PROFILER_MAX_SECONDS", "60"))
+CABECERA_HABILITADA = os.getenv("PROFILER_HEADER_ENABLED", "true").lower() == "true"
+PERFILES_GUARDADOS = int(os.getenv("PROFILER_KEEP", "20"))
+PROFUNDIDAD_MAXIMA = 128
+
+# Cabecera con un token de administrador que activa el perfilado de una petición
+CABECERA_PERFIL = "X-Profile"
+CABECERA_ID_PERFIL = "X-Profile-Id"
+
+# Hojas de pila de hilos ociosos (esperando trabajo o E/S), que solo agregan ruido
+_ESPERAS = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"),
+    ("selectors.py", "select"),
+    ("thread.py", "_worker"),
+}
+
+
+class PerfiladorOcupado(Exception):
+    """Ya hay una sesión de muestreo en curso en este worker"""
+
+
+def _marco(frame) -> str:
+    codigo = frame.f_code
+    modulo = frame.f_globals.get("__name__") or os.path.basename(codigo.co_filename)
+    return f"{modulo}:{codigo.co_name}:{codigo.co_firstlineno}"
+
+
+def _ociosa(frame) -> bool:
+    codigo = frame.f_code
+    return (os.path.basename(codigo.co_filename), codigo.co_name) in _ESPERAS
+
+
+class MuestreadorPilas:
+    def __init__(self, intervalo_ms: float = INTERVALO_MS, incluir_ociosos: bool = False,
+                 excluir_hilos: Iterable[int] = ()):
+        self.intervalo = max(intervalo_ms, 1.0) / 1000
+        self.incluir_ociosos = incluir_ociosos
+        self.excluir_hilos = set(excluir_hilos)
+        self.muestras: Counter = Counter()
+        self.total_muestras = 0
+        self._detener = threading.Event()
+        self._hilo: Optional[threading.Thread] = None
+        self._inicio = 0.0
+        self.duracion = 0.0
+
+    def iniciar(self) -> None:
+        if not _sesion.acquire(blocking=False):
+            raise PerfiladorOcupado()
+        self._inicio = time.perf_counter()
+        self._hilo = threading.Thread(target=self._muestrear, name="perfilador", daemon=True)
+        self._hilo.start()
+
+    def detener(self) -> None:
+        if self._hilo is None:
+            return
+        self._detener.set()
+        self._hilo.join()
+        self._hilo = None
+        self.duracion = time.perf_counter() - self._inicio
+        _sesion.release()
+
+    def _muestrear(self) -> None:
+        excluidos = self.excluir_hilos | {threading.get_ident()}
+        while True:
+            nombres = {hilo.ident: hilo.name for hilo in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident in excluidos:
+                    continue
+                if not self.incluir_ociosos and _ociosa(frame):
+                    continue
+                pila = []
+                while frame is not None and len(pila) < PROFUNDIDAD_MAXIMA:
+                    pila.append(_marco(frame))
+                    frame = frame.f_back
+                pila.append(nombres.get(ident, str(ident)))
+                self.muestras[";".join(reversed(pila))] += 1
+            self.total_muestras += 1
+            if self._detener.wait(self.intervalo):
+                break
+
+    def colapsado(self) -> str:
+        """Pilas en formato collapsed, de más a menos frecuentes"""
+        return "".join(f"{pila} {cantidad}\n" for pila, cantidad in self.muestras.most_common())
+
+
+def perfilar(segundos: float, intervalo_ms: float = INTERVALO_MS,
+             incluir_ociosos: bool = False) -> MuestreadorPilas:
+    """Muestrea el proceso durante `segundos` (bloquea el hilo que llama, que no se muestrea)"""
+    muestreador = MuestreadorPilas(intervalo_ms, incluir_ociosos, excluir_hilos=[threading.get_ident()])
+    muestreador.iniciar()
+    try:
+        time.sleep(min(segundos, DURACION_MAXIMA))
+    finally:
+        muestreador.detener()
+    return muestreador
+
+
+class PerfilesRecientes:
+    """Perfiles de peticiones individuales, consultables por id durante un tiempo"""
+
+    def __init__(self, tamano: int = PERFILES_GUARDADOS):
+        self.tamano = tamano
+        self._perfiles: "OrderedDict[str, Tuple[Dict[str, Any], str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def guardar(self, muestreador: MuestreadorPilas, metodo: str, ruta: str) -> str:
+        perfil_id = uuid.uuid4().hex[:16]
+        info = {
+            "id": perfil_id,
+            "metodo": metodo,
+            "ruta": ruta,
+            "duracion_ms": round(muestreador.duracion * 1000, 1),
+            "muestras": muestreador.total_muestras,
+            "timestamp": datetime.utcnow().isoformat(),
+        }
+        with self._lock:
+            self._perfiles[perfil_id] = (info, muestreador.colapsado())
+            while len(self._perfiles) > self.tamano:
+                self._perfiles.popitem(last=False)
+        return perfil_id
+
+    def obtener(self, perfil_id: str) -> Optional[Tuple[Dict[str, Any], str]]:
+        with self._lock:
+            return self._perfiles.get(perfil_id)
+
+    def listar(self) -> list:
+        with self._lock:
+            return [info for info, _ in reversed(self._perfiles.values())]
+
+
+_sesion = threading.Lock()
+perfiles = PerfilesRecientes()
@@ -0,0 +1,354 @@
+"""
+Módulo de recálculo masivo de resultados almacenados.
+Cuando cambian factores de emisión, costos o benchmarks, recorre las tablas de
+auditorías en bloques ordenados por id (keyset), recalcula los campos derivados
+con los calculadores del modelo y los escribe con un UPDATE masivo por bloque.
+El avance se guarda en recalculo_checkpoints para poder reanudar, y el trabajo
+se puede repartir entre procesos por rangos de id.
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from sqlalchemy.orm import Session
+from sqlalchemy import JSON, bindparam, func, text, update
+from datetime import datetime, timedelta
+import json
+import logging
+import os
+
+from .. import models, schemas
+from . import recomendaciones
+from .benchmarking import (
+    obtener_percentil, grupo_agro, grupo_basica, grupo_feria,
+    METRICA_AGRO, METRICA_BASICA, METRICA_FERIA
+)
+
+logger = logging.getLogger(__name__)
+
+TAMANO_BLOQUE = 500
+
+ESTADO_EN_PROGRESO = "en_progreso"
+ESTADO_COMPLETADO = "completado"
+ESTADO_ERROR = "error"
+
+# Un checkpoint en progreso sin avance durante este tiempo se da por abandonado
+# (el proceso murió) y ya no impide lanzar otro recálculo
+INACTIVIDAD_MAXIMA = int(os.getenv("RECALCULO_STALE_SECONDS", "900"))
+
+
+# ========================================
+# CALCULADORES POR TABLA
+# ========================================
+
+def _recalcular_agro(db: Session, auditoria: models.AuditoriaAgro) -> Dict[str, Any]:
+    comparacion = auditoria.get_benchmark_sector()
+    kpi_por_area = auditoria.calcular_kpi_area()
+    percentil = obtener_percentil(db, METRICA_AGRO, grupo_agro(auditoria.tipo_cultivo), kpi_por_area)
+    if percentil is not None:
+        comparacion["percentil_sector"] = percentil
+    return {
+        "consumo_total": auditoria.calcular_consumo_total(),
+        "kpi_por_produccion": auditoria.calcular_kpi_produccion(),
+        "kpi_por_area": kpi_por_area,
+        "distribucion_consumo": auditoria.calcular_distribucion_consumo(),
+        "potencial_ahorro": auditoria.calcular_potencial_ahorro() * 100,
+        "puntuacion_eficiencia": auditoria.calcular_puntuacion_eficiencia(),
+        "huella_carbono": auditoria.calcular_huella_carbono(),
+        "eficiencia_riego": auditoria.calcular_eficiencia_riego(),
+        "costo_energia_por_produccion": auditoria.calcular_costo_energia_por_produccion(),
+        "comparacion_benchmark": comparacion,
+    }
+
+
+def _recalcular_basica(db: Session, auditoria: models.AuditoriaBasica) -> Dict[str, Any]:
+    comparacion = auditoria.get_benchmark_sector()
+    intensidad = auditoria.calcular_intensidad_energetica()
+    percentil = obtener_percentil(db, METRICA_BASICA, grupo_basica(auditoria.sector), intensidad)
+    if percentil is not None:
+        comparacion["percentil_sector"] = percentil
+    return {
+        "intensidad_energetica": intensidad,
+        "consumo_por_empleado": auditoria.calcular_consumo_por_empleado(),
+        "costo_por_empleado": auditoria.calcular_costo_por_empleado(),
+        "potencial_ahorro": auditoria.calcular_potencial_ahorro() * 100,
+        "puntuacion_eficiencia": auditoria.calcular_puntuacion_eficiencia(),
+        "distribucion_consumo": auditoria.calcular_distribucion_consumo(),
+        "comparacion_benchmark": comparacion,
+    }
+
+
+def _recalcular_feria(db: Session, diagnostico: models.DiagnosticoFeria) -> Optional[Dict[str, Any]]:
+    from ..routers import diagnostico_feria as feria
+
+    # Diagnósticos que solo tienen datos de contacto no tienen resultados
+    if not all([diagnostico.background, diagnostico.production, diagnostico.equipment,
+                diagnostico.renewable, diagnostico.volume]):
+        return None
+
+    datos = schemas.DiagnosticoFeriaCreate(
+        contactInfo=diagnostico.contact_info,
+        background=diagnostico.background,
+        production=diagnostico.production,
+        equipment=diagnostico.equipment,
+        renewable=diagnostico.renewable,
+        volume=diagnostico.volume,
+        metadata=diagnostico.meta_data or {"browser": "", "deviceType": ""}
+    )
+    intensidad = feria.calcular_intensidad_energetica(
+        datos.equipment.energyConsumption, datos.volume.annualProduction
+    )
+    costo_anual = feria.calcular_costo_energia_anual(
+        datos.equipment.energyConsumption,
+        datos.volume.energyCosts.electricity,
+        datos.volume.energyCosts.fuel
+    )
+    potencial = feria.calcular_potencial_ahorro(
+        datos.equipment.mostIntensiveEquipment, datos.renewable.penaltiesReceived, costo_anual
+    )
+    comparacion = feria.calcular_comparacion_sector(
+        datos.production.productType, datos.equipment.energyConsumption, datos.volume.annualProduction
+    )
+    percentil = obtener_percentil(db, METRICA_FERIA, grupo_feria(datos.production.productType), intensidad)
+    if percentil is not None:
+        comparacion["percentilSector"] = percentil
+    return {
+        "intensidad_energetica": intensidad,
+        "costo_energia_anual": costo_anual,
+        "potencial_ahorro": potencial,
+        "puntuacion_eficiencia": feria.calcular_puntuacion_eficiencia(
+            datos.renewable.interestedInRenewable,
+            datos.background.hasPreviousAudits,
+            datos.renewable.penaltiesReceived,
+            datos.renewable.penaltyCount,
+            datos.volume.energyCostPercentage
+        ),
+        "comparacion_sector": comparacion,
+        "recomendaciones": feria.generar_recomendaciones(datos, potencial, costo_anual),
+    }
+
+
+TABLAS: Dict[str, Tuple[Any, Callable[[Session, Any], Optional[Dict[str, Any]]]]] = {
+    "agro": (models.AuditoriaAgro, _recalcular_agro),
+    "basica": (models.AuditoriaBasica, _recalcular_basica),
+    "feria": (models.DiagnosticoFeria, _recalcular_feria),
+}
+
+
+# ========================================
+# ESCRITURA MASIVA
+# ========================================
+
+def _escribir_bloque(db: Session, modelo: Any, filas: List[Dict[str, Any]]) -> None:
+    """Escribe un bloque de resultados con una sola sentencia."""
+    if not filas:
+        return
+
+    tabla = modelo.__table__
+    columnas = [c for c in filas[0] if c != "id"]
+
+    if db.bind.dialect.name != "postgresql":
+        # SQLite/otros: executemany sobre un UPDATE parametrizado
+        stmt = update(tabla).where(tabla.c.id == bindparam("_id")).values(
+            {c: bindparam(c) for c in columnas}
+        )
+        db.execute(stmt, [{**{c: f[c] for c in columnas}, "_id": f["id"]} for f in filas])
+        return
+
+    # PostgreSQL: UPDATE ... FROM (VALUES ...) con un único round-trip
+    tipo_id = "varchar" if modelo is models.DiagnosticoFeria else "integer"
+    parametros: Dict[str, Any] = {}
+    valores = []
+    for i, fila in enumerate(filas):
+        partes = [f"CAST(:id_{i} AS {tipo_id})"]
+        parametros[f"id_{i}"] = fila["id"]
+        for j, columna in enumerate(columnas):
+            nombre = f"v{j}_{i}"
+            tipo = tabla.c[columna].type
+            if isinstance(tipo, JSON):
+                # json o jsonb según la columna
+                partes.append(f"CAST(:{nombre} AS {tipo.compile(dialect=db.bind.dialect)})")
+                parametros[nombre] = json.dumps(fila[columna]) if fila[columna] is not None else None
+            else:
+                partes.append(f"CAST(:{nombre} AS double precision)")
+                parametros[nombre] = fila[columna]
+        valores.append(f"({', '.join(partes)})")
+
+    asignaciones = ", ".join(f"{c} = v.{c}" for c in columnas)
+    sql = (
+        f"UPDATE {tabla.name} AS t SET {asignaciones} "
+        f"FROM (VALUES {', '.join(valores)}) AS v(id, {', '.join(columnas)}) "
+        f"WHERE t.id = v.id"
+    )
+    db.execute(text(sql), parametros)
+
+
+def _regenerar_recomendaciones(db: Session, tabla: str, bloque: List[Any]) -> None:
+    """Reemplaza las recomendaciones del bloque con una evaluación en lote"""
+    columna = getattr(models.Recomendacion, recomendaciones.COLUMNA_AUDITORIA[tabla])
+    db.query(models.Recomendacion)\
+        .filter(columna.in_([a.id for a in bloque]))\
+        .delete(synchronize_session=False)
+    recomendaciones.guardar_recomendaciones(db, tabla, bloque)
+
+
+# ========================================
+# CHECKPOINTS Y RANGOS
+# ========================================
+
+def _obtener_checkpoint(db: Session, trabajo: str, tabla: str,
+                        desde: Optional[Any], hasta: Optional[Any]) -> models.RecalculoCheckpoint:
+    desde_str = None if desde is None else str(desde)
+    hasta_str = None if hasta is None else str(hasta)
+    checkpoint = db.query(models.RecalculoCheckpoint).filter(
+        models.RecalculoCheckpoint.trabajo == trabajo,
+        models.RecalculoCheckpoint.tabla == tabla,
+        models.RecalculoCheckpoint.desde_id == desde_str,
+        models.RecalculoCheckpoint.hasta_id == hasta_str,
+    ).first()
+    if checkpoint is None:
+        checkpoint = models.RecalculoCheckpoint(
+            trabajo=trabajo, tabla=tabla, desde_id=desde_str, hasta_id=hasta_str,
+            procesados=0, estado=ESTADO_EN_PROGRESO
+        )
+        db.add(checkpoint)
+        db.commit()
+    return checkpoint
+
+
+def trabajo_en_curso(db: Session) -> Optional[str]:
+    """Trabajo con algún checkpoint en progreso y con avance reciente, o None"""
+    limite = datetime.utcnow() - timedelta(seconds=INACTIVIDAD_MAXIMA)
+    return db.query(models.RecalculoCheckpoint.trabajo).filter(
+        models.RecalculoCheckpoint.estado == ESTADO_EN_PROGRESO,
+        models.RecalculoCheckpoint.updated_at >= limite,
+    ).order_by(models.RecalculoCheckpoint.updated_at.desc()).limit(1).scalar()
+
+
+def reservar_trabajo(db: Session, trabajo: str, tablas: List[str]) -> None:
+    """
+    Crea o reactiva los checkpoints del trabajo antes de lanzarlo en segundo plano,
+    para que trabajo_en_curso lo vea desde ya y rechace un segundo lanzamiento.
+    """
+    for tabla in tablas:
+        checkpoint = _obtener_checkpoint(db, trabajo, tabla, None, None)
+        if checkpoint.estado != ESTADO_COMPLETADO:
+            checkpoint.estado = ESTADO_EN_PROGRESO
+            checkpoint.updated_at = datetime.utcnow()
+    db.commit()
+
+
+def dividir_rangos(db: Session, tabla: str, partes: int) -> List[Tuple[Optional[Any], Optional[Any]]]:
+    """
+    Divide la tabla en rangos [desde, hasta) de id para repartir entre procesos.
+    Los ids enteros se reparten por valor; los UUID de diagnósticos de feria por
+    su primer carácter hexadecimal.
+    """
+    partes = max(1, partes)
+    modelo, _ = TABLAS[tabla]
+    if partes == 1:
+        return [(None, None)]
+
+    if modelo is models.DiagnosticoFeria:
+        hexadecimales = "0123456789abcdef"
+        cortes = [hexadecimales[(len(hexadecimales) * i) // partes] for i in range(1, partes)]
+        limites = [None] + cortes + [None]
+        return [(limites[i], limites[i + 1]) for i in range(partes)]
+
+    minimo, maximo = db.query(func.min(modelo.id), func.max(modelo.id)).one()
+    if minimo is None:
+        return [(None, None)]
+    paso = max(1, (maximo - minimo + 1) // partes)
+    rangos = []
+    for i in range(partes):
+        desde = minimo + i * paso
+        hasta = None if i == partes - 1 else minimo + (i + 1) * paso
+        rangos.append((desde, hasta))
+    return rangos
+
+
+# ========================================
+# EJECUCIÓN
+# ========================================
+
+def recalcular_tabla(db: Session, trabajo: str, tabla: str,
+                     desde: Optional[Any] = None, hasta: Optional[Any] = None,
+                     tamano_bloque: int = TAMANO_BLOQUE) -> Dict[str, Any]:
+    """
+    Recalcula los resultados de una tabla ('agro', 'basica' o 'feria') en el rango
+    de ids [desde, hasta), reanudando desde el checkpoint si existe.
+    """
+    if tabla not in TABLAS:
+        raise ValueError(f"Tabla desconocida: {tabla}")
+    modelo, calcular = TABLAS[tabla]
+
+    checkpoint = _obtener_checkpoint(db, trabajo, tabla, desde, hasta)
+    if checkpoint.estado == ESTADO_COMPLETADO:
+        return {"tabla": tabla, "desde": desde, "hasta": hasta,
+                "procesados": checkpoint.procesados, "estado": checkpoint.estado}
+
+    ultimo_id: Optional[Any] = checkpoint.ultimo_id
+    if ultimo_id is not None and modelo is not models.DiagnosticoFeria:
+        ultimo_id = int(ultimo_id)
+
+    try:
+        while True:
+            query = db.query(modelo)
+            if ultimo_id is not None:
+                query = query.filter(modelo.id > ultimo_id)
+            elif desde is not None:
+                query = query.filter(modelo.id >= desde)
+            if hasta is not None:
+                query = query.filter(modelo.id < hasta)
+            bloque = query.order_by(modelo.id).limit(tamano_bloque).all()
+            if not bloque:
+                break
+
+            filas = []
+            for registro in bloque:
+                valores = calcular(db, registro)
+                if valores is not None:
+                    filas.append({"id": registro.id, **valores})
+            ultimo_id = bloque[-1].id
+            # Los objetos cargados no se escriben por el ORM
+            db.expunge_all()
+
+            _escribir_bloque(db, modelo, filas)
+            if tabla in recomendaciones.COLUMNA_AUDITORIA:
+                _regenerar_recomendaciones(db, tabla, bloque)
+            db.query(models.RecalculoCheckpoint)\
+                .filter(models.RecalculoCheckpoint.id == checkpoint.id)\
+                .update({
+                    "ultimo_id": str(ultimo_id),
+                    "procesados": models.RecalculoCheckpoint.procesados + len(filas),
+                    "updated_at": datetime.utcnow(),
+                }, synchronize_session=False)
+            db.commit()
+
+        db.query(models.RecalculoCheckpoint)\
+            .filter(models.RecalculoCheckpoint.id == checkpoint.id)\
+            .update({"estado": ESTADO_COMPLETADO, "updated_at": datetime.utcnow()},
+                    synchronize_session=False)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        db.query(models.RecalculoCheckpoint)\
+            .filter(models.RecalculoCheckpoint.id == checkpoint.id)\
+            .update({"estado": ESTADO_ERROR, "error": str(e), "updated_at": datetime.utcnow()},
+                    synchronize_session=False)
+        db.commit()
+        logger.error(f"Error en recálculo {trabajo}/{tabla} [{desde}, {hasta}): {e}")
+        raise
+
+    procesados = db.query(models.RecalculoCheckpoint.procesados)\
+        .filter(models.RecalculoCheckpoint.id == checkpoint.id).scalar()
+    logger.info(f"Recálculo {trabajo}/{tabla} [{desde}, {hasta}) completado: {procesados} filas")
+    return {"tabla": tabla, "desde": desde, "hasta": hasta,
+            "procesados": procesados, "estado": ESTADO_COMPLETADO}
+
+
+def recalcular_todo(db: Session, trabajo: str, tablas: Optional[List[str]] = None,
+                    tamano_bloque: int = TAMANO_BLOQUE) -> List[Dict[str, Any]]:
+    """Recalcula las tablas indicadas (todas por defecto) en un solo proceso."""
+    return [
+        recalcular_tabla(db, trabajo, tabla, tamano_bloque=tamano_bloque)
+        for tabla in (tablas or list(TABLAS))
+    ]
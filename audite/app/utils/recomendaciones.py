@@ -0,0 +1,206 @@
+"""
+Generación de recomendaciones para auditorías agro y básicas.
+Las reglas fijas del sistema y las plantillas configurables de
+PlantillaRecomendacion se combinan en un único conjunto compilado por ámbito,
+que se aplica en una pasada a una auditoría o a un lote, e inserta las filas
+de Recomendacion resultantes con un solo INSERT masivo.
+"""
+
+from typing import Any, Dict, Iterable, List, Tuple
+from sqlalchemy.orm import Session
+import threading
+
+from .. import crud
+from .reglas import PlantillaCompilada, compilar_condiciones, obtener_plantillas, version_plantillas
+
+
+def _fija(condicion, categoria: str, titulo: str, descripcion: str, ahorro_estimado: float,
+          costo_implementacion: str, periodo_retorno: float, prioridad: int) -> PlantillaCompilada:
+    """Regla del sistema; la condición puede ser un dict de condiciones o un predicado"""
+    if isinstance(condicion, dict):
+        condicion = compilar_condiciones(condicion)
+    return PlantillaCompilada(
+        id=0,
+        categoria=categoria,
+        titulo=titulo,
+        descripcion=descripcion,
+        ahorro_estimado=ahorro_estimado,
+        costo_implementacion=costo_implementacion,
+        periodo_retorno=periodo_retorno,
+        prioridad=prioridad,
+        condicion=condicion,
+    )
+
+
+REGLAS_AGRO: Tuple[PlantillaCompilada, ...] = (
+    _fija(
+        {"sistemas_riego.tipo": ["gravedad", "aspersores"]},
+        categoria="Riego",
+        titulo="Modernización del sistema de riego",
+        descripcion="Implementar un sistema de riego por goteo para mejorar la eficiencia",
+        ahorro_estimado=30.0,
+        costo_implementacion="Alto",
+        periodo_retorno=24.0,
+        prioridad=1
+    ),
+    _fija(
+        lambda a: bool(a.equipos) and not a.tiene_mantenimiento,
+        categoria="Equipos",
+        titulo="Programa de mantenimiento preventivo",
+        descripcion="Implementar un programa de mantenimiento para optimizar el consumo de combustible",
+        ahorro_estimado=15.0,
+        costo_implementacion="Medio",
+        periodo_retorno=12.0,
+        prioridad=2
+    ),
+    _fija(
+        {"tiene_automatizacion": False, "area_total": ">50"},
+        categoria="Automatización",
+        titulo="Sistema de control automático",
+        descripcion="Implementar sistemas de control y monitoreo automático para optimizar el consumo",
+        ahorro_estimado=20.0,
+        costo_implementacion="Alto",
+        periodo_retorno=36.0,
+        prioridad=3
+    ),
+    _fija(
+        {"consumo_electrico": ">100000"},
+        categoria="Energía Renovable",
+        titulo="Sistema fotovoltaico",
+        descripcion="Instalar sistema de energía solar para reducir consumo eléctrico",
+        ahorro_estimado=25.0,
+        costo_implementacion="Alto",
+        periodo_retorno=48.0,
+        prioridad=2
+    ),
+    _fija(
+        lambda a: a.calcular_kpi_area() > a.get_benchmark_sector()["consumo_promedio_sector"],
+        categoria="Eficiencia Energética",
+        titulo="Auditoría energética detallada",
+        descripcion="Realizar una auditoría energética detallada para identificar oportunidades de mejora",
+        ahorro_estimado=20.0,
+        costo_implementacion="Medio",
+        periodo_retorno=12.0,
+        prioridad=1
+    ),
+)
+
+REGLAS_BASICA: Tuple[PlantillaCompilada, ...] = (
+    _fija(
+        {"consumo_anual": ">100000"},
+        categoria="Energías Renovables",
+        titulo="Instalación de sistemas de energía renovable",
+        descripcion="Considerar la instalación de paneles solares u otros sistemas de energía renovable para reducir el consumo de la red",
+        ahorro_estimado=30.0,
+        costo_implementacion="Alto",
+        periodo_retorno=48.0,
+        prioridad=2
+    ),
+    _fija(
+        {"fuentes_energia": "electricidad"},
+        categoria="Iluminación",
+        titulo="Cambio a iluminación LED",
+        descripcion="Reemplazar las luminarias existentes por tecnología LED de alta eficiencia",
+        ahorro_estimado=15.0,
+        costo_implementacion="Medio",
+        periodo_retorno=24.0,
+        prioridad=1
+    ),
+    _fija(
+        {"fuentes_energia": "electricidad"},
+        categoria="Control",
+        titulo="Instalación de sensores de movimiento",
+        descripcion="Implementar sensores de movimiento para control automático de iluminación",
+        ahorro_estimado=10.0,
+        costo_implementacion="Bajo",
+        periodo_retorno=12.0,
+        prioridad=1
+    ),
+    _fija(
+        {"tamano_instalacion": ">500"},
+        categoria="Gestión",
+        titulo="Sistema de gestión energética",
+        descripcion="Implementar un sistema de gestión energética para monitoreo y control del consumo",
+        ahorro_estimado=20.0,
+        costo_implementacion="Medio",
+        periodo_retorno=36.0,
+        prioridad=2
+    ),
+)
+
+REGLAS_POR_AMBITO = {
+    "agro": REGLAS_AGRO,
+    "basica": REGLAS_BASICA,
+}
+
+COLUMNA_AUDITORIA = {
+    "agro": "auditoria_agro_id",
+    "basica": "auditoria_basica_id",
+}
+
+
+class _CacheConjuntos:
+    """Reglas del sistema + plantillas configurables, recompuestas al cambiar la versión"""
+
+    def __init__(self):
+        self._conjuntos: Dict[str, Tuple[Tuple[Any, Dict[str, Any]], ...]] = {}
+        self._version = -1
+        self._lock = threading.Lock()
+
+    def obtener(self, ambito: str) -> Tuple[Tuple[Any, Dict[str, Any]], ...]:
+        version = version_plantillas()
+        if version != self._version:
+            with self._lock:
+                if version != self._version:
+                    self._conjuntos = {
+                        a: tuple(
+                            (p.condicion, {
+                                "categoria": p.categoria,
+                                "titulo": p.titulo,
+                                "descripcion": p.descripcion,
+                                "ahorro_estimado": p.ahorro_estimado,
+                                "costo_implementacion": p.costo_implementacion,
+                                "periodo_retorno": p.periodo_retorno,
+                                "prioridad": p.prioridad,
+                            })
+                            for p in reglas + obtener_plantillas(a)
+                        )
+                        for a, reglas in REGLAS_POR_AMBITO.items()
+                    }
+                    self._version = version
+        return self._conjuntos[ambito]
+
+
+_cache = _CacheConjuntos()
+
+
+def precompilar_conjuntos() -> int:
+    """Compone los conjuntos de reglas de todos los ámbitos (calentamiento)"""
+    return sum(len(_cache.obtener(ambito)) for ambito in REGLAS_POR_AMBITO)
+
+
+def evaluar(ambito: str, auditoria: Any) -> List[Dict[str, Any]]:
+    """Campos de las recomendaciones que aplican a la auditoría (sin ids)"""
+    return [campos for condicion, campos in _cache.obtener(ambito) if condicion(auditoria)]
+
+
+def filas_recomendaciones(ambito: str, auditorias: Iterable[Any]) -> List[Dict[str, Any]]:
+    """Aplica el conjunto de reglas a un lote de auditorías ya persistidas"""
+    conjunto = _cache.obtener(ambito)
+    columna = COLUMNA_AUDITORIA[ambito]
+    filas = []
+    for auditoria in auditorias:
+        for condicion, campos in conjunto:
+            if condicion(auditoria):
+                filas.append({**campos, columna: auditoria.id})
+    return filas
+
+
+def guardar_recomendaciones(db: Session, ambito: str, auditorias: Iterable[Any]) -> int:
+    """
+    Genera e inserta las recomendaciones de un lote de auditorías con un solo
+    INSERT masivo. No hace commit; devuelve la cantidad de filas insertadas.
+    """
+    filas = filas_recomendaciones(ambito, auditorias)
+    crud.bulk_create_recomendaciones(db, filas)
+    return len(filas)
@@ -0,0 +1,241 @@
+"""
+Compilación de plantillas de recomendación configurables.
+Convierte PlantillaRecomendacion.condiciones_aplicacion en funciones predicado
+una sola vez por versión de la tabla, de modo que evaluar una plantilla en el
+hot path es llamar a una función sin interpretar JSON.
+
+Formato de condiciones_aplicacion (todas las claves deben cumplirse):
+    {"ambito": "feria",                          # o lista; por defecto agro y basica
+     "renewable.interestedInRenewable": true,    # booleano (None cuenta como false)
+     "consumo_anual": ">100000",                 # comparación numérica: > >= < <= = !=
+     "sector": ["industrial", "alimentacion"],   # pertenencia (texto sin mayúsculas)
+     "fuentes_energia": "electricidad"}          # en campos lista/dict: contiene
+Los nombres de campo admiten rutas con punto sobre atributos o diccionarios.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+from sqlalchemy.orm import Session
+from sqlalchemy import func
+import asyncio
+import logging
+import operator
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+INTERVALO_SONDEO = int(os.getenv("PLANTILLAS_POLL_SECONDS", "30"))
+
+AMBITOS_POR_DEFECTO = ("agro", "basica")
+CLAVES_RESERVADAS = {"ambito"}
+
+# El orden importa: los operadores de dos caracteres se prueban primero
+OPERADORES = (
+    (">=", operator.ge),
+    ("<=", operator.le),
+    ("!=", operator.ne),
+    (">", operator.gt),
+    ("<", operator.lt),
+    ("=", operator.eq),
+)
+
+Predicado = Callable[[Any], bool]
+
+
+def _siempre(_objeto: Any) -> bool:
+    return True
+
+
+def compilar_ruta(ruta: str) -> Callable[[Any], Any]:
+    """Devuelve una función que lee la ruta con puntos sobre atributos o claves"""
+    partes = tuple(ruta.split("."))
+
+    def leer(objeto: Any) -> Any:
+        for parte in partes:
+            if objeto is None:
+                return None
+            if isinstance(objeto, dict):
+                objeto = objeto.get(parte)
+            else:
+                objeto = getattr(objeto, parte, None)
+        return objeto
+
+    return leer
+
+
+def _normalizar(valor: Any) -> Any:
+    return valor.strip().lower() if isinstance(valor, str) else valor
+
+
+def compilar_condicion(campo: str, esperado: Any) -> Predicado:
+    """Compila una condición campo/valor a un predicado"""
+    leer = compilar_ruta(campo)
+
+    if isinstance(esperado, str):
+        for simbolo, op in OPERADORES:
+            if esperado.startswith(simbolo):
+                try:
+                    limite = float(esperado[len(simbolo):])
+                except ValueError:
+                    break
+
+                def comparar(objeto: Any, leer=leer, op=op, limite=limite) -> bool:
+                    valor = leer(objeto)
+                    try:
+                        return valor is not None and op(float(valor), limite)
+                    except (TypeError, ValueError):
+                        return False
+
+                return comparar
+
+    if isinstance(esperado, bool):
+        return lambda objeto: bool(leer(objeto)) is esperado
+
+    if isinstance(esperado, (list, tuple)):
+        opciones = frozenset(_normalizar(v) for v in esperado)
+    else:
+        opciones = frozenset((_normalizar(esperado),))
+
+    def pertenece(objeto: Any) -> bool:
+        valor = leer(objeto)
+        # Campos lista o diccionario (p.ej. fuentes_energia): basta con que contengan una opción
+        if isinstance(valor, (list, tuple, set, dict)):
+            return any(_normalizar(v) in opciones for v in valor)
+        return _normalizar(valor) in opciones
+
+    return pertenece
+
+
+def compilar_condiciones(condiciones: Optional[Dict[str, Any]]) -> Predicado:
+    """Compila todas las condiciones de una plantilla a un único predicado (AND)"""
+    predicados = tuple(
+        compilar_condicion(campo, esperado)
+        for campo, esperado in (condiciones or {}).items()
+        if campo not in CLAVES_RESERVADAS
+    )
+    if not predicados:
+        return _siempre
+    if len(predicados) == 1:
+        return predicados[0]
+    return lambda objeto: all(p(objeto) for p in predicados)
+
+
+def ambitos_de(condiciones: Optional[Dict[str, Any]]) -> Tuple[str, ...]:
+    ambito = (condiciones or {}).get("ambito")
+    if not ambito:
+        return AMBITOS_POR_DEFECTO
+    if isinstance(ambito, str):
+        return (ambito.strip().lower(),)
+    return tuple(a.strip().lower() for a in ambito)
+
+
+@dataclass(frozen=True)
+class PlantillaCompilada:
+    """Plantilla de recomendación lista para evaluarse"""
+    id: int
+    categoria: str
+    titulo: str
+    descripcion: str
+    ahorro_estimado: float  # Promedio de min y max, en porcentaje
+    costo_implementacion: str
+    periodo_retorno: Optional[float]
+    prioridad: int
+    condicion: Predicado
+
+
+def compilar_plantilla(plantilla: Any) -> PlantillaCompilada:
+    minimo = plantilla.ahorro_estimado_min or 0.0
+    maximo = plantilla.ahorro_estimado_max if plantilla.ahorro_estimado_max is not None else minimo
+    return PlantillaCompilada(
+        id=plantilla.id,
+        categoria=plantilla.categoria or "",
+        titulo=plantilla.titulo or "",
+        descripcion=plantilla.descripcion or "",
+        ahorro_estimado=(minimo + maximo) / 2,
+        costo_implementacion=plantilla.costo_implementacion or "",
+        periodo_retorno=plantilla.periodo_retorno_tipico,
+        prioridad=plantilla.prioridad or 5,
+        condicion=compilar_condiciones(plantilla.condiciones_aplicacion),
+    )
+
+
+# ========================================
+# CACHÉ POR VERSIÓN DE LA TABLA
+# ========================================
+
+class _CachePlantillas:
+    def __init__(self):
+        self._por_ambito: Dict[str, Tuple[PlantillaCompilada, ...]] = {}
+        self._version_tabla: Optional[Tuple[int, Any]] = None
+        # Se incrementa en cada recarga; los consumidores lo usan para recompilar lo suyo
+        self.version = 0
+        self._lock = threading.Lock()
+
+    def plantillas(self, ambito: str) -> Tuple[PlantillaCompilada, ...]:
+        return self._por_ambito.get(ambito, ())
+
+    def recargar(self, db: Session, forzar: bool = False) -> bool:
+        from ..models import PlantillaRecomendacion
+
+        version = tuple(db.query(
+            func.count(PlantillaRecomendacion.id), func.max(PlantillaRecomendacion.updated_at)
+        ).one())
+        if not forzar and version == self._version_tabla:
+            return False
+
+        with self._lock:
+            por_ambito: Dict[str, list] = {}
+            filas = db.query(PlantillaRecomendacion)\
+                .order_by(PlantillaRecomendacion.prioridad, PlantillaRecomendacion.id)\
+                .all()
+            for fila in filas:
+                try:
+                    compilada = compilar_plantilla(fila)
+                except Exception as e:
+                    logger.warning(f"Plantilla de recomendación {fila.id} ignorada: {e}")
+                    continue
+                for ambito in ambitos_de(fila.condiciones_aplicacion):
+                    por_ambito.setdefault(ambito, []).append(compilada)
+            self._por_ambito = {a: tuple(p) for a, p in por_ambito.items()}
+            self._version_tabla = version
+            self.version += 1
+
+        logger.info(f"Plantillas de recomendación compiladas: {len(filas)}")
+        return True
+
+
+_cache = _CachePlantillas()
+
+
+def obtener_plantillas(ambito: str) -> Tuple[PlantillaCompilada, ...]:
+    """Plantillas compiladas del ámbito ('agro', 'basica', 'feria'); lectura en memoria"""
+    return _cache.plantillas(ambito)
+
+
+def version_plantillas() -> int:
+    return _cache.version
+
+
+def recargar_plantillas(db: Session, forzar: bool = False) -> bool:
+    return _cache.recargar(db, forzar=forzar)
+
+
+def _sondear() -> None:
+    from ..database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        _cache.recargar(db)
+    except Exception as e:
+        logger.error(f"Error recargando plantillas de recomendación: {e}")
+    finally:
+        db.close()
+
+
+async def tarea_periodica_plantillas() -> None:
+    """Sondea la versión de plantillas_recomendaciones para aplicar cambios hechos por otros workers"""
+    loop = asyncio.get_running_loop()
+    while True:
+        await loop.run_in_executor(None, _sondear)
+        await asyncio.sleep(INTERVALO_SONDEO)
@@ -0,0 +1,258 @@
+"""
+Motor de reglas de recomendaciones para el diagnóstico de feria.
+La tabla declarativa REGLAS_FERIA (más las plantillas con ámbito 'feria' de
+PlantillaRecomendacion) se compila en tuplas de predicados y plantillas
+precalculadas; generar recomendaciones es evaluar unos pocos predicados y
+crear un diccionario por recomendación con su monto.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import threading
+
+from .parametros import get_parametros
+from .reglas import obtener_plantillas, version_plantillas
+
+# Bases de cálculo del monto: el ahorro es base * factor de la plantilla
+BASE_COSTO = 0  # Costo energético anual
+BASE_MULTAS = 1  # Costo estimado de multas por factor de potencia
+BASE_ILUMINACION = 2  # Costo estimado de iluminación
+
+MAXIMO_CON_RESPALDO = 5  # Las reglas de respaldo solo se agregan por debajo de este total
+MINIMO_RECOMENDACIONES = 3
+
+
+@dataclass(frozen=True)
+class PlantillaFeria:
+    titulo: str
+    descripcion: str
+    factor: float  # Fracción de la base que se ahorra
+    costo_implementacion: str
+    periodo_retorno: float
+    prioridad: int
+
+
+@dataclass(frozen=True)
+class ReglaFeria:
+    categoria: str
+    plantillas: Tuple[PlantillaFeria, ...]
+    condicion: Optional[Callable[[Any], bool]] = None  # None: solo respaldo o relleno
+    base: int = BASE_COSTO
+    respaldo: bool = False  # Incluir la primera plantilla si la categoría no apareció
+
+
+# Tabla declarativa; el orden define el orden de evaluación y de relleno
+REGLAS_FERIA: Tuple[ReglaFeria, ...] = (
+    ReglaFeria(
+        categoria="equipos",
+        respaldo=True,
+        plantillas=(
+            PlantillaFeria(
+                titulo="Actualización de sistemas de refrigeración",
+                descripcion="Reemplazar equipos de refrigeración antiguos por modelos eficientes con tecnología inverter puede reducir el consumo hasta un 40%.",
+                factor=0.25,
+                costo_implementacion="alto",
+                periodo_retorno=24,
+                prioridad=4
+            ),
+            PlantillaFeria(
+                titulo="Mantenimiento preventivo de equipos críticos",
+                descripcion="Implementar un programa de mantenimiento preventivo para equipos con alto consumo energético para optimizar su eficiencia.",
+                factor=0.12,
+                costo_implementacion="bajo",
+                periodo_retorno=6,
+                prioridad=5
+            ),
+        ),
+    ),
+    ReglaFeria(
+        categoria="gestion",
+        respaldo=True,
+        plantillas=(
+            PlantillaFeria(
+                titulo="Sistema de monitoreo energético",
+                descripcion="Implementar un sistema de monitoreo energético en tiempo real para identificar consumos anómalos y oportunidades de ahorro.",
+                factor=0.15,
+                costo_implementacion="medio",
+                periodo_retorno=12,
+                prioridad=4
+            ),
+            PlantillaFeria(
+                titulo="Capacitación del personal en eficiencia energética",
+                descripcion="Programa de capacitación para operadores y personal sobre buenas prácticas de uso energético y optimización de procesos.",
+                factor=0.08,
+                costo_implementacion="bajo",
+                periodo_retorno=3,
+                prioridad=5
+            ),
+        ),
+    ),
+    ReglaFeria(
+        categoria="renovables",
+        condicion=lambda datos: bool(datos.renewable.interestedInRenewable),
+        plantillas=(
+            PlantillaFeria(
+                titulo="Instalación de sistema fotovoltaico",
+                descripcion="Implementar un sistema solar fotovoltaico para autoconsumo que cubra parcialmente la demanda energética.",
+                factor=0.30,
+                costo_implementacion="alto",
+                periodo_retorno=48,
+                prioridad=3
+            ),
+            PlantillaFeria(
+                titulo="Calentamiento solar de agua para procesos",
+                descripcion="Sistema de colectores solares térmicos para precalentar agua en procesos industriales.",
+                factor=0.20,
+                costo_implementacion="medio",
+                periodo_retorno=24,
+                prioridad=4
+            ),
+        ),
+    ),
+    ReglaFeria(
+        categoria="iluminacion",
+        condicion=lambda datos: datos.equipment.mostIntensiveEquipment == "Sistemas de iluminación",
+        base=BASE_ILUMINACION,
+        plantillas=(
+            PlantillaFeria(
+                titulo="Reemplazo por iluminación LED",
+                descripcion="Sustituir sistemas de iluminación convencionales por tecnología LED de alta eficiencia.",
+                factor=0.70,  # 70% del consumo en iluminación
+                costo_implementacion="bajo",
+                periodo_retorno=8,
+                prioridad=5
+            ),
+        ),
+    ),
+    ReglaFeria(
+        categoria="factor_potencia",
+        condicion=lambda datos: bool(datos.renewable.penaltiesReceived),
+        base=BASE_MULTAS,
+        plantillas=(
+            PlantillaFeria(
+                titulo="Corrección de factor de potencia",
+                descripcion="Instalar banco de capacitores para corregir el factor de potencia y eliminar las multas por este concepto.",
+                factor=1.0,  # 100% de las multas
+                costo_implementacion="medio",
+                periodo_retorno=12,
+                prioridad=5
+            ),
+        ),
+    ),
+)
+
+# Orden en que se evalúan las reglas condicionales (compatibilidad con la salida anterior)
+ORDEN_CONDICIONALES = ("renovables", "factor_potencia", "iluminacion")
+
+
+# Plantilla precalculada: (campos fijos de la respuesta, base, factor)
+_Compilada = Tuple[Dict[str, Any], int, float]
+
+
+def _compilar_plantilla(id_: str, categoria: str, plantilla: PlantillaFeria, base: int) -> _Compilada:
+    fijos = {
+        "id": id_,
+        "categoria": categoria,
+        "titulo": plantilla.titulo,
+        "descripcion": plantilla.descripcion,
+        "costoImplementacion": plantilla.costo_implementacion,
+        "periodoRetorno": plantilla.periodo_retorno,
+        "prioridad": plantilla.prioridad,
+    }
+    return fijos, base, plantilla.factor
+
+
+class MotorRecomendacionesFeria:
+    """Reglas compiladas; inmutable una vez construido"""
+
+    def __init__(self, reglas: Tuple[ReglaFeria, ...], plantillas_configurables=()):
+        por_categoria = {r.categoria: r for r in reglas}
+
+        def compilar(regla: ReglaFeria) -> Tuple[_Compilada, ...]:
+            return tuple(
+                _compilar_plantilla(f"{regla.categoria}-{i}", regla.categoria, p, regla.base)
+                for i, p in enumerate(regla.plantillas, start=1)
+            )
+
+        condicionales = [por_categoria[c] for c in ORDEN_CONDICIONALES if c in por_categoria]
+        condicionales += [r for r in reglas if r.condicion and r.categoria not in ORDEN_CONDICIONALES]
+        self._condicionales = tuple((r.condicion, r.categoria, compilar(r)) for r in condicionales)
+
+        # Plantillas cargadas desde PlantillaRecomendacion (ahorro en porcentaje del costo anual)
+        self._configurables = tuple(
+            (
+                p.condicion,
+                p.categoria,
+                ((_compilar_plantilla(
+                    f"plantilla-{p.id}", p.categoria,
+                    PlantillaFeria(p.titulo, p.descripcion, p.ahorro_estimado / 100,
+                                   p.costo_implementacion, p.periodo_retorno or 0, p.prioridad),
+                    BASE_COSTO
+                ),)),
+            )
+            for p in plantillas_configurables
+        )
+
+        self._respaldo = tuple(
+            (r.categoria, compilar(r)[0]) for r in reglas if r.respaldo and r.plantillas
+        )
+        self._relleno = tuple(
+            (r.categoria, compilar(r)[0]) for r in reglas if r.plantillas
+        )
+
+    def generar(self, datos: Any, costo_anual: float) -> List[Dict[str, Any]]:
+        parametros = get_parametros()
+        penalizaciones = datos.renewable.penaltyCount or 1
+        bases = (
+            costo_anual,
+            costo_anual * parametros.fraccion_costo_multas_feria * penalizaciones,
+            costo_anual * parametros.fraccion_costo_iluminacion_feria,
+        )
+
+        recomendaciones: List[Dict[str, Any]] = []
+        categorias_usadas = set()
+
+        for grupo in (self._condicionales, self._configurables):
+            for condicion, categoria, plantillas in grupo:
+                if not condicion(datos):
+                    continue
+                for fijos, base, factor in plantillas:
+                    recomendaciones.append({**fijos, "ahorroEstimado": bases[base] * factor})
+                categorias_usadas.add(categoria)
+
+        for categoria, (fijos, base, factor) in self._respaldo:
+            if categoria not in categorias_usadas and len(recomendaciones) < MAXIMO_CON_RESPALDO:
+                recomendaciones.append({**fijos, "ahorroEstimado": bases[base] * factor})
+                categorias_usadas.add(categoria)
+
+        for categoria, (fijos, base, factor) in self._relleno:
+            if len(recomendaciones) >= MINIMO_RECOMENDACIONES:
+                break
+            if categoria not in categorias_usadas:
+                recomendaciones.append({**fijos, "ahorroEstimado": bases[base] * factor})
+                categorias_usadas.add(categoria)
+
+        return recomendaciones
+
+
+class _CacheMotor:
+    def __init__(self):
+        self._motor = MotorRecomendacionesFeria(REGLAS_FERIA)
+        self._version = 0
+        self._lock = threading.Lock()
+
+    def obtener(self) -> MotorRecomendacionesFeria:
+        version = version_plantillas()
+        if version != self._version:
+            with self._lock:
+                if version != self._version:
+                    self._motor = MotorRecomendacionesFeria(REGLAS_FERIA, obtener_plantillas("feria"))
+                    self._version = version
+        return self._motor
+
+
+_cache = _CacheMotor()
+
+
+def obtener_motor() -> MotorRecomendacionesFeria:
+    return _cache.obtener()
@@ -0,0 +1,99 @@
+"""
+Serialización JSON con orjson para respuestas grandes y camino rápido para
+respuestas construidas con datos confiables.
+
+Los endpoints con response_model ya se serializan a bytes con Pydantic (camino
+rápido de FastAPI), así que esta clase NO se usa como default_response_class:
+hacerlo desactivaría ese camino. Es para los endpoints que devuelven dicts o
+filas ORM sin response_model, que FastAPI pasaría por jsonable_encoder (recorrido
+recursivo en Python) antes de json.dumps. Esos endpoints arman los dicts con
+`fila_a_dict` y devuelven `RespuestaJSON` directamente, sin pasar por el encoder.
+
+Los endpoints con response_model cuyos datos ya fueron validados (al escribirse
+en la base o al construir el modelo en el handler) usan `responder`: con el
+camino rápido activo se serializan tal cual y FastAPI no los vuelve a validar.
+FAST_RESPONSE_ENABLED=false o FAST_RESPONSE_DISABLED_ENDPOINTS vuelven a la
+validación completa, globalmente o por endpoint.
+"""
+
+from decimal import Decimal
+from typing import Any, Dict, Iterable
+
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel
+from sqlalchemy import inspect
+import orjson
+import os
+
+_OPCIONES = orjson.OPT_NON_STR_KEYS
+
+# Camino rápido: respuestas armadas con datos ya validados se serializan sin
+# volver a validarse contra el response_model del endpoint
+RESPUESTA_RAPIDA = os.getenv("FAST_RESPONSE_ENABLED", "true").lower() == "true"
+# Endpoints (nombre de la función) que siempre pasan por la validación de FastAPI
+ENDPOINTS_VALIDADOS = {
+    e.strip() for e in os.getenv("FAST_RESPONSE_DISABLED_ENDPOINTS", "").split(",") if e.strip()
+}
+
+
+def _por_defecto(valor: Any) -> Any:
+    """Tipos que orjson no conoce (datetime, date, UUID y Enum los maneja nativamente)"""
+    if isinstance(valor, BaseModel):
+        return valor.model_dump(mode="json")
+    if isinstance(valor, Decimal):
+        # Igual que jsonable_encoder: entero si no tiene decimales
+        return int(valor) if valor == valor.to_integral_value() else float(valor)
+    if isinstance(valor, (set, frozenset)):
+        return list(valor)
+    if isinstance(valor, bytes):
+        return valor.decode()
+    raise TypeError(f"Tipo no serializable a JSON: {type(valor).__name__}")
+
+
+def serializar(contenido: Any) -> bytes:
+    return orjson.dumps(contenido, default=_por_defecto, option=_OPCIONES)
+
+
+class RespuestaJSON(JSONResponse):
+    """JSONResponse serializada con orjson"""
+
+    def render(self, content: Any) -> bytes:
+        return serializar(content)
+
+
+def fila_a_dict(objeto: Any, relaciones: Iterable[str] = ()) -> Dict[str, Any]:
+    """
+    Columnas de una fila ORM como dict (lo mismo que produce jsonable_encoder),
+    más las relaciones indicadas, que deben venir ya cargadas.
+    """
+    mapeo = inspect(objeto).mapper
+    datos = {atributo.key: getattr(objeto, atributo.key) for atributo in mapeo.column_attrs}
+    for relacion in relaciones:
+        valor = getattr(objeto, relacion)
+        if valor is None:
+            datos[relacion] = None
+        elif isinstance(valor, (list, tuple, set)):
+            datos[relacion] = [fila_a_dict(v) for v in valor]
+        else:
+            datos[relacion] = fila_a_dict(valor)
+    return datos
+
+
+def camino_rapido(endpoint: str) -> bool:
+    return RESPUESTA_RAPIDA and endpoint not in ENDPOINTS_VALIDADOS
+
+
+def responder(endpoint: str, contenido: Any, status_code: int = 200) -> Any:
+    """
+    Respuesta de `endpoint` con datos confiables. Con el camino rápido activo la
+    serializa directamente (un modelo ya validado con model_dump_json, un dict con
+    orjson); si no, devuelve `contenido` para que FastAPI lo valide con response_model.
+    """
+    if not camino_rapido(endpoint):
+        return contenido
+    if isinstance(contenido, BaseModel):
+        return Response(
+            content=contenido.model_dump_json(by_alias=True),
+            status_code=status_code, media_type="application/json"
+        )
+    return RespuestaJSON(contenido, status_code=status_code)
@@ -0,0 +1,45 @@
+"""
+Tipos y expresiones para columnas JSON portables entre PostgreSQL y SQLite.
+
+En PostgreSQL las columnas se guardan como JSONB (binario, sin re-parsear el
+texto en cada acceso, indexable con GIN); en SQLite (desarrollo y tests) siguen
+siendo JSON en texto. `campo_json` extrae una clave como texto con la sintaxis
+de cada motor, para usarla en columnas generadas (Computed) e índices.
+"""
+
+from sqlalchemy import JSON, String
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+from sqlalchemy.sql.visitors import InternalTraversal
+
+# JSON en SQLite, JSONB en PostgreSQL
+JSONBinario = JSON().with_variant(JSONB(), "postgresql")
+
+
+class campo_json(FunctionElement):
+    """`campo_json(columna, "clave")`: valor de la clave de primer nivel como texto"""
+    type = String()
+    name = "campo_json"
+    inherit_cache = True
+    # La clave forma parte de la clave de caché de la sentencia compilada
+    _traverse_internals = FunctionElement._traverse_internals + [("clave", InternalTraversal.dp_string)]
+
+    def __init__(self, columna, clave: str):
+        self.clave = clave
+        super().__init__(columna)
+
+
+def _columna(elemento, compilador, **kw) -> str:
+    columna = list(elemento.clauses)[0]
+    return compilador.process(columna, **kw)
+
+
+@compiles(campo_json)
+def _campo_json_sqlite(elemento, compilador, **kw):
+    return f"json_extract({_columna(elemento, compilador, **kw)}, '$.{elemento.clave}')"
+
+
+@compiles(campo_json, "postgresql")
+def _campo_json_postgresql(elemento, compilador, **kw):
+    return f"({_columna(elemento, compilador, **kw)} ->> '{elemento.clave}')"
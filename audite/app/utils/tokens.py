@@ -0,0 +1,170 @@
+"""
+Caché de tokens JWT ya verificados.
+Guarda, por firma del token, los datos del usuario autenticado hasta el `exp`
+del token (acotado por TOKEN_CACHE_TTL), de modo que las peticiones repetidas
+con el mismo token no vuelven a verificar el HMAC ni a consultar la tabla users.
+La desactivación de un usuario invalida sus entradas en este proceso; el TTL
+acota cuánto tarda en verse en los demás workers.
+
+Los tokens llevan el id del usuario (uid) y su versión de token (tv). Un token
+nuevo se valida contra el estado del usuario (token_version, is_active), que
+también se cachea por USER_STATE_TTL; incrementar users.token_version revoca
+todos los tokens emitidos antes.
+"""
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Hashable, Optional, Set, Tuple
+import os
+import threading
+import time
+
+TAMANO_MAXIMO = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+TTL_MAXIMO = int(os.getenv("TOKEN_CACHE_TTL", "300"))
+TTL_ESTADO_USUARIO = int(os.getenv("USER_STATE_TTL", "60"))
+
+
+@dataclass(frozen=True)
+class Principal:
+    """Usuario autenticado, sin sesión de base de datos asociada"""
+    id: int
+    email: str
+    is_active: bool
+
+
+class CacheTokens:
+    """LRU de tokens verificados con expiración por entrada"""
+
+    def __init__(self, tamano_maximo: int = TAMANO_MAXIMO, ttl_maximo: int = TTL_MAXIMO):
+        self.tamano_maximo = tamano_maximo
+        self.ttl_maximo = ttl_maximo
+        # firma -> (token completo, valor, vence_en, dueño)
+        self._entradas: "OrderedDict[str, Tuple[str, Any, float, Optional[Hashable]]]" = OrderedDict()
+        self._por_dueno: Dict[Hashable, Set[str]] = {}
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+
+    @staticmethod
+    def _firma(token: str) -> str:
+        return token.rsplit(".", 1)[-1]
+
+    def obtener(self, token: str) -> Optional[Any]:
+        firma = self._firma(token)
+        with self._lock:
+            entrada = self._entradas.get(firma)
+            # Se compara el token completo: la firma sola no autentica la carga útil
+            if entrada is None or entrada[0] != token:
+                self.fallos += 1
+                return None
+            if entrada[2] <= time.time():
+                self._quitar(firma)
+                self.fallos += 1
+                return None
+            self._entradas.move_to_end(firma)
+            self.aciertos += 1
+            return entrada[1]
+
+    def guardar(self, token: str, valor: Any, exp: Optional[float], dueno: Optional[Hashable] = None) -> None:
+        ahora = time.time()
+        vence_en = ahora + self.ttl_maximo
+        if exp is not None:
+            vence_en = min(vence_en, float(exp))
+        if vence_en <= ahora:
+            return
+        firma = self._firma(token)
+        with self._lock:
+            if firma in self._entradas:
+                self._quitar(firma)
+            self._entradas[firma] = (token, valor, vence_en, dueno)
+            if dueno is not None:
+                self._por_dueno.setdefault(dueno, set()).add(firma)
+            while len(self._entradas) > self.tamano_maximo:
+                self._quitar(next(iter(self._entradas)))
+
+    def _quitar(self, firma: str) -> None:
+        _, _, _, dueno = self._entradas.pop(firma)
+        if dueno is not None:
+            firmas = self._por_dueno.get(dueno)
+            if firmas is not None:
+                firmas.discard(firma)
+                if not firmas:
+                    del self._por_dueno[dueno]
+
+    def invalidar_dueno(self, dueno: Hashable) -> int:
+        """Elimina todas las entradas de un usuario; devuelve cuántas había"""
+        with self._lock:
+            firmas = list(self._por_dueno.get(dueno, ()))
+            for firma in firmas:
+                self._quitar(firma)
+            return len(firmas)
+
+    def limpiar(self) -> None:
+        with self._lock:
+            self._entradas.clear()
+            self._por_dueno.clear()
+
+    def estadisticas(self) -> Dict[str, Any]:
+        with self._lock:
+            consultas = self.aciertos + self.fallos
+            return {
+                "entradas": len(self._entradas),
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+                "tasa_aciertos": round(self.aciertos / consultas, 4) if consultas else 0.0,
+            }
+
+
+class _CacheEstadoUsuarios:
+    """(token_version, is_active) por usuario, leído de la base como mucho cada TTL"""
+
+    def __init__(self, ttl: int = TTL_ESTADO_USUARIO):
+        self.ttl = ttl
+        self._estados: Dict[int, Tuple[int, bool, float]] = {}
+        self._lock = threading.Lock()
+
+    def obtener(self, db, usuario_id: int) -> Optional[Tuple[int, bool]]:
+        ahora = time.time()
+        estado = self._estados.get(usuario_id)
+        if estado is not None and estado[2] > ahora:
+            return estado[0], estado[1]
+
+        from ..models import User
+        fila = db.query(User.token_version, User.is_active).filter(User.id == usuario_id).first()
+        if fila is None:
+            return None
+        version, activo = fila.token_version or 0, bool(fila.is_active)
+        with self._lock:
+            self._estados[usuario_id] = (version, activo, ahora + self.ttl)
+            if len(self._estados) > TAMANO_MAXIMO:
+                self._estados.pop(next(iter(self._estados)))
+        return version, activo
+
+    def invalidar(self, usuario_id: int) -> None:
+        with self._lock:
+            self._estados.pop(usuario_id, None)
+
+
+_estados_usuarios = _CacheEstadoUsuarios()
+
+
+def estado_usuario(db, usuario_id: int) -> Optional[Tuple[int, bool]]:
+    """(token_version, is_active) vigentes del usuario, o None si no existe"""
+    return _estados_usuarios.obtener(db, usuario_id)
+
+
+# Tokens de usuarios (auth.py) y de administrador (admin_auth.py)
+tokens_usuarios = CacheTokens()
+tokens_admin = CacheTokens()
+
+
+def invalidar_usuario(usuario_id: int) -> int:
+    _estados_usuarios.invalidar(usuario_id)
+    return tokens_usuarios.invalidar_dueno(usuario_id)
+
+
+def estadisticas_tokens() -> Dict[str, Dict[str, Any]]:
+    return {
+        "usuarios": tokens_usuarios.estadisticas(),
+        "admin": tokens_admin.estadisticas(),
+    }
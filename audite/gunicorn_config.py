@@ -1,4 +1,5 @@
 import os
+import shutil
 
 # Usar el puerto dinámico asignado por DigitalOcean App Platform
 bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
@@ -12,4 +13,20 @@ timeout = 120
 
 # Otras configuraciones recomendadas
 keepalive = 5
-worker_tmp_dir = "/dev/shm"
\ No newline at end of file
+worker_tmp_dir = "/dev/shm"
+
+# Métricas Prometheus compartidas entre workers (ver app/metrics.py).
+# Debe definirse antes de que los workers importen prometheus_client.
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/dev/shm/audite_metrics")
+
+
+def on_starting(server):
+    # Descartar archivos de métricas de ejecuciones anteriores
+    directorio = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    shutil.rmtree(directorio, ignore_errors=True)
+    os.makedirs(directorio, exist_ok=True)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Script para mover al archivo frío (Parquet + zstd en ARCHIVE_DIR) las sesiones de
+respuestas y los diagnósticos de feria más antiguos que la retención.
+
+Trabaja por lotes que se confirman por separado: si se interrumpe, volver a
+ejecutarlo elimina el archivo del lote a medias y continúa con lo que quedó en
+la base. Pensado para ejecutarse periódicamente (cron) en el host cuyo disco
+guarda ARCHIVE_DIR, que deben ver también los workers de la API para leer las
+sesiones archivadas.
+
+Uso:
+    python scripts/archivar_sesiones.py
+    python scripts/archivar_sesiones.py --tabla diagnosticos_feria --dias 730 --max-lotes 10
+"""
+
+import argparse
+import logging
+import os
+import sys
+
+# Agregar el directorio padre al path para importar la aplicación
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+from app.database import SessionLocal
+from app.utils import archivo_frio
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archivo frío de sesiones y diagnósticos antiguos")
+    parser.add_argument("--tabla", default="todas", choices=list(archivo_frio.TABLAS) + ["todas"])
+    parser.add_argument("--dias", type=int, default=archivo_frio.RETENCION_DIAS,
+                        help="Antigüedad mínima (días desde la última respuesta)")
+    parser.add_argument("--lote", type=int, default=archivo_frio.TAMANO_LOTE,
+                        help="Sesiones o diagnósticos por archivo")
+    parser.add_argument("--max-lotes", type=int, default=None, help="Lotes por tabla en esta ejecución")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    tablas = list(archivo_frio.TABLAS) if args.tabla == "todas" else [args.tabla]
+
+    db = SessionLocal()
+    try:
+        resumen = archivo_frio.archivar(db, tablas, args.dias, args.lote, args.max_lotes)
+    finally:
+        db.close()
+
+    for tabla, movidas in resumen.items():
+        print(f"✅ {tabla}: {movidas} archivadas en {archivo_frio.DIRECTORIO}")
+
+
+if __name__ == "__main__":
+    main()
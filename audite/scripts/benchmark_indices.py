@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Benchmark de índices sobre un conjunto sintético grande (solo PostgreSQL).
+
+Crea un esquema desechable con copias de las tablas de formularios y respuestas
+(CREATE TABLE ... LIKE), las llena con generate_series (10M respuestas por
+defecto) y les crea los índices que existían antes de las migraciones 005 y 006.
+Ejecuta las consultas frecuentes con EXPLAIN (ANALYZE, BUFFERS) y repite después
+de crear los índices que esas migraciones agregan (tomados de los modelos).
+Imprime, por consulta, el plan y el tiempo antes y después.
+
+Requiere que el esquema principal exista (alembic upgrade head). No modifica las
+tablas de la aplicación; el esquema de pruebas se elimina al terminar salvo con
+--conservar.
+
+Uso:
+    python scripts/benchmark_indices.py
+    python scripts/benchmark_indices.py --filas 1000000 --conservar
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+# Agregar el directorio padre al path para importar la aplicación
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+from sqlalchemy import MetaData, text
+
+from app import models
+from app.database import engine
+
+logger = logging.getLogger("benchmark_indices")
+
+ESQUEMA = "bench_indices"
+TABLAS = (models.PreguntaFormulario, models.RespuestaFormulario, models.AutodiagnosticoRespuesta)
+
+# Índices agregados por las migraciones 005_indices_paginacion y 006_indices_consultas
+INDICES_NUEVOS = {
+    "ix_autodiagnostico_respuestas_created_at_id",
+    "ix_respuestas_formulario_session_created",
+    "ix_respuestas_formulario_pregunta_session",
+    "ix_preguntas_formulario_formulario_activa_orden",
+    "ix_preguntas_formulario_pregunta_padre_id",
+    "ix_autodiagnostico_respuestas_pregunta_opcion",
+}
+
+FORMULARIOS = 200
+PREGUNTAS_POR_FORMULARIO = 25
+RESPUESTAS_POR_SESION = 20
+PREGUNTAS_AUTODIAGNOSTICO = 30
+
+# Consultas con la forma de las del código (crud.py, autodiagnostico.py, paginacion.py)
+CONSULTAS = {
+    "respuestas de una sesión": """
+        SELECT * FROM {e}.respuestas_formulario
+        WHERE session_id = 'sesion-123457' ORDER BY created_at
+    """,
+    "respuestas de un formulario (estadísticas)": """
+        SELECT r.* FROM {e}.respuestas_formulario r
+        JOIN {e}.preguntas_formulario p ON p.id = r.pregunta_id
+        WHERE p.formulario_id = 17
+    """,
+    "preguntas activas de un formulario": """
+        SELECT * FROM {e}.preguntas_formulario
+        WHERE formulario_id = 17 AND activa = true ORDER BY orden
+    """,
+    "preguntas hijas de una condicional": """
+        SELECT * FROM {e}.preguntas_formulario WHERE pregunta_padre_id = 420
+    """,
+    "conteo por opción (autodiagnóstico)": """
+        SELECT opcion_seleccionada, count(*) FROM {e}.autodiagnostico_respuestas
+        WHERE pregunta_id = 7 AND opcion_seleccionada IS NOT NULL
+        GROUP BY opcion_seleccionada
+    """,
+    "página profunda por cursor (autodiagnóstico)": """
+        SELECT * FROM {e}.autodiagnostico_respuestas
+        WHERE (created_at, id) < (now() - interval '30 days', 'r-000000000')
+        ORDER BY created_at DESC, id DESC LIMIT 101
+    """,
+}
+
+
+def _crear_tablas(conexion) -> None:
+    conexion.execute(text(f"DROP SCHEMA IF EXISTS {ESQUEMA} CASCADE"))
+    conexion.execute(text(f"CREATE SCHEMA {ESQUEMA}"))
+    for modelo in TABLAS:
+        tabla = modelo.__tablename__
+        # Sin INCLUDING INDEXES: solo columnas y defaults, sin claves ni índices
+        conexion.execute(text(f"CREATE TABLE {ESQUEMA}.{tabla} (LIKE public.{tabla} INCLUDING DEFAULTS)"))
+
+
+def _cargar_datos(conexion, filas: int) -> None:
+    preguntas = FORMULARIOS * PREGUNTAS_POR_FORMULARIO
+    conexion.execute(text(f"""
+        INSERT INTO {ESQUEMA}.preguntas_formulario
+            (id, formulario_id, texto, tipo, orden, requerida, activa, tiene_opcion_otro,
+             pregunta_padre_id, created_at, updated_at)
+        SELECT i, (i - 1) / {PREGUNTAS_POR_FORMULARIO} + 1, 'Pregunta ' || i, 'radio',
+               (i - 1) % {PREGUNTAS_POR_FORMULARIO}, true, i % 10 <> 0, false,
+               CASE WHEN i % 5 = 0 THEN i - 1 END, now(), now()
+        FROM generate_series(1, {preguntas}) AS i
+    """))
+    conexion.execute(text(f"""
+        INSERT INTO {ESQUEMA}.respuestas_formulario
+            (id, session_id, pregunta_id, valor_respuesta, ip_address, user_agent, created_at)
+        SELECT i, 'sesion-' || (i / {RESPUESTAS_POR_SESION}), (i % {preguntas}) + 1,
+               to_json('opcion-' || (i % 4)), '10.0.0.1', 'Mozilla/5.0',
+               now() - make_interval(secs => i)
+        FROM generate_series(1, {filas}) AS i
+    """))
+    conexion.execute(text(f"""
+        INSERT INTO {ESQUEMA}.autodiagnostico_respuestas
+            (id, session_id, pregunta_id, opcion_seleccionada, created_at, updated_at)
+        SELECT 'r-' || lpad(i::text, 9, '0'), 'sesion-' || (i / {RESPUESTAS_POR_SESION}),
+               (i % {PREGUNTAS_AUTODIAGNOSTICO}) + 1,
+               CASE WHEN i % 7 <> 0 THEN 'opcion-' || (i % 5) END,
+               now() - make_interval(secs => i), now()
+        FROM generate_series(1, {filas // 2}) AS i
+    """))
+
+
+def _crear_indices(conexion, nuevos: bool) -> list:
+    """
+    Crea en el esquema de pruebas los índices declarados en los modelos: los que
+    ya existían antes de las migraciones 005/006 (línea base, con las claves
+    primarias y el índice simple de session_id) o los que agregaron.
+    """
+    creados = []
+    if not nuevos:
+        for modelo in TABLAS:
+            conexion.execute(text(f"ALTER TABLE {ESQUEMA}.{modelo.__tablename__} ADD PRIMARY KEY (id)"))
+        conexion.execute(text(f"CREATE INDEX ix_respuestas_formulario_session_id ON {ESQUEMA}.respuestas_formulario (session_id)"))
+        creados.append("ix_respuestas_formulario_session_id")
+    else:
+        conexion.execute(text(f"DROP INDEX {ESQUEMA}.ix_respuestas_formulario_session_id"))
+
+    metadata = MetaData()
+    for modelo in TABLAS:
+        copia = modelo.__table__.to_metadata(metadata, schema=ESQUEMA)
+        for indice in copia.indexes:
+            if (indice.name in INDICES_NUEVOS) == nuevos:
+                indice.create(conexion)
+                creados.append(indice.name)
+    return creados
+
+
+def _resumen_plan(nodo: dict) -> str:
+    partes = []
+    pendientes = [nodo]
+    while pendientes:
+        actual = pendientes.pop(0)
+        descripcion = actual["Node Type"]
+        if actual.get("Index Name"):
+            descripcion += f" ({actual['Index Name']})"
+        partes.append(descripcion)
+        pendientes.extend(actual.get("Plans", []))
+    return " > ".join(partes)
+
+
+def _medir(conexion) -> dict:
+    conexion.execute(text(f"ANALYZE {', '.join(f'{ESQUEMA}.{m.__tablename__}' for m in TABLAS)}"))
+    resultados = {}
+    for nombre, sql in CONSULTAS.items():
+        plan = conexion.execute(
+            text(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql.format(e=ESQUEMA)}")
+        ).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        plan = plan[0]
+        resultados[nombre] = {
+            "ms": plan["Execution Time"],
+            "plan": _resumen_plan(plan["Plan"]),
+            "bloques": plan["Plan"].get("Shared Hit Blocks", 0) + plan["Plan"].get("Shared Read Blocks", 0),
+        }
+    return resultados
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark de índices con datos sintéticos (PostgreSQL)")
+    parser.add_argument("--filas", type=int, default=10_000_000, help="Respuestas de formulario a generar")
+    parser.add_argument("--conservar", action="store_true", help=f"No eliminar el esquema {ESQUEMA}")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    if engine.dialect.name != "postgresql":
+        logger.error("Este benchmark requiere PostgreSQL (DATABASE_URL)")
+        return 1
+
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conexion:
+        try:
+            inicio = time.perf_counter()
+            _crear_tablas(conexion)
+            _cargar_datos(conexion, args.filas)
+            _crear_indices(conexion, nuevos=False)
+            logger.info(f"Datos sintéticos e índices previos cargados en {time.perf_counter() - inicio:.0f} s")
+
+            antes = _medir(conexion)
+            inicio = time.perf_counter()
+            indices = _crear_indices(conexion, nuevos=True)
+            logger.info(f"{len(indices)} índices creados en {time.perf_counter() - inicio:.0f} s")
+            despues = _medir(conexion)
+        finally:
+            if not args.conservar:
+                conexion.execute(text(f"DROP SCHEMA IF EXISTS {ESQUEMA} CASCADE"))
+
+    print(f"\n{args.filas:,} respuestas de formulario, {args.filas // 2:,} de autodiagnóstico\n")
+    for nombre in CONSULTAS:
+        a, d = antes[nombre], despues[nombre]
+        print(f"{nombre}")
+        print(f"  antes:   {a['ms']:10.2f} ms  {a['bloques']:>9} bloques  {a['plan']}")
+        print(f"  después: {d['ms']:10.2f} ms  {d['bloques']:>9} bloques  {d['plan']}")
+        print(f"  aceleración: x{a['ms'] / max(d['ms'], 0.001):.0f}\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
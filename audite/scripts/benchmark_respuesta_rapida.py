@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark del camino rápido de respuestas (utils/respuestas_json.responder).
+
+Mide el costo por respuesta de un diagnóstico de feria completo en tres casos:
+  - validado: FastAPI valida el dict contra DiagnosticoFeriaResponse y lo
+    serializa (lo que hacían obtener_diagnostico_feria y obtener_diagnostico_por_codigo);
+  - modelo en el handler: el handler construye DiagnosticoFeriaResponse y FastAPI
+    lo serializa (lo que hacía completar_diagnostico_feria);
+  - rápido: responder() serializa el dict con orjson, sin validar.
+
+No usa la base de datos: el diagnóstico es una instancia transitoria.
+
+Uso:
+    python scripts/benchmark_respuesta_rapida.py
+    python scripts/benchmark_respuesta_rapida.py --iteraciones 50000
+"""
+
+import argparse
+import os
+import sys
+import timeit
+from datetime import datetime
+
+# Agregar el directorio padre al path para importar la aplicación
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+from pydantic import TypeAdapter
+
+from app import models, schemas
+from app.routers.diagnostico_feria import _respuesta_diagnostico
+from app.utils.respuestas_json import responder
+
+
+def _diagnostico() -> models.DiagnosticoFeria:
+    recomendaciones = [
+        {
+            "id": f"eficiencia-{i}", "categoria": "eficiencia", "titulo": f"Recomendación {i}",
+            "descripcion": "Reemplazar motores por equipos de alta eficiencia con variador de frecuencia",
+            "ahorroEstimado": 1234.5 * i, "costoImplementacion": "Medio",
+            "periodoRetorno": 1.5, "prioridad": i,
+        }
+        for i in range(1, 6)
+    ]
+    return models.DiagnosticoFeria(
+        id="5f0c8a9e-0000-4000-8000-000000000000", access_code="ABC123", estado="DIAGNOSTICO_COMPLETO",
+        created_at=datetime(2026, 1, 1, 12, 0, 0),
+        contact_info={"ubicacion": "Santiago", "cargo": "Gerente", "nombre_completo": "Ana Pérez",
+                      "telefono": None, "email_contacto": None, "nombre_empresa_contacto": None},
+        background={"hasPreviousAudits": False, "mainInterest": "costos"},
+        production={"productType": "frutas", "exportProducts": True, "processesOfInterest": ["frío", "lavado"]},
+        equipment={"mostIntensiveEquipment": "Motores", "energyConsumption": 10000.0, "specificEquipmentMeasured": None},
+        renewable={"interestedInRenewable": True, "electricTariff": "BT1", "penaltiesReceived": True, "penaltyCount": 2},
+        volume={"annualProduction": 100.0, "productionUnit": "t",
+                "energyCosts": {"electricity": 0.1, "fuel": 1.0, "others": None}, "energyCostPercentage": 20.0},
+        intensidad_energetica=100.0, costo_energia_anual=1001.0, potencial_ahorro=250.25,
+        puntuacion_eficiencia=65.0,
+        comparacion_sector={"consumoPromedioSector": 450, "diferenciaPorcentual": -77.8,
+                            "eficienciaReferencia": 0.8, "percentilSector": 35.0},
+        recomendaciones=recomendaciones, pdf_url=None, view_url="/diagnosticos/5f0c8a9e",
+    )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Microbenchmark del camino rápido de respuestas")
+    parser.add_argument("--iteraciones", type=int, default=20000)
+    args = parser.parse_args()
+
+    datos = _respuesta_diagnostico(_diagnostico())
+    # Lo que hace FastAPI con response_model: validar y luego dump_json
+    adaptador = TypeAdapter(schemas.DiagnosticoFeriaResponse)
+
+    casos = [
+        ("validado (response_model)",
+         lambda: adaptador.dump_json(adaptador.validate_python(datos))),
+        ("modelo construido en el handler",
+         lambda: adaptador.dump_json(adaptador.validate_python(schemas.DiagnosticoFeriaResponse(**datos)))),
+        ("rápido (responder)",
+         lambda: responder("benchmark", datos).body),
+    ]
+
+    print(f"DiagnosticoFeriaResponse, {args.iteraciones} iteraciones")
+    tiempos = {}
+    for nombre, funcion in casos:
+        funcion()
+        tiempos[nombre] = timeit.timeit(funcion, number=args.iteraciones) / args.iteraciones * 1e6
+        print(f"  {nombre:<34} {tiempos[nombre]:8.1f} µs/respuesta")
+
+    rapido = tiempos["rápido (responder)"]
+    for nombre, tiempo in tiempos.items():
+        if tiempo != rapido:
+            print(f"  ahorro vs {nombre}: {tiempo - rapido:.1f} µs (x{tiempo / rapido:.1f})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
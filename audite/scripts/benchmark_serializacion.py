@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Benchmark de serialización JSON de respuestas grandes.
+
+Compara, para N filas con columnas JSON anidadas (como las respuestas que
+listan los endpoints de administración):
+  - el camino por defecto de FastAPI para endpoints sin response_model
+    (jsonable_encoder + JSONResponse/json.dumps), con dicts y con filas ORM;
+  - RespuestaJSON (orjson) sobre los mismos datos, con fila_a_dict para las filas ORM.
+
+No usa la base de datos: las filas ORM son instancias transitorias.
+
+Uso:
+    python scripts/benchmark_serializacion.py
+    python scripts/benchmark_serializacion.py --filas 5000 --repeticiones 50
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+# Agregar el directorio padre al path para importar la aplicación
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app import models
+from app.utils.respuestas_json import RespuestaJSON, fila_a_dict
+
+
+def _filas_orm(cantidad: int):
+    base = datetime(2026, 1, 1, 12, 0, 0)
+    pregunta = models.AutodiagnosticoPregunta(
+        id=1, numero_orden=1, pregunta="¿Cuál es su consumo eléctrico mensual?",
+        tipo_respuesta="checkbox", es_obligatoria=True, es_activa=True,
+        ayuda_texto="Revise su boleta", created_at=base, updated_at=base,
+    )
+    filas = []
+    for i in range(cantidad):
+        filas.append(models.AutodiagnosticoRespuesta(
+            id=str(uuid.uuid4()), session_id=str(uuid.uuid4()), pregunta_id=1,
+            respuesta_texto=f"Respuesta libre número {i} con acentos: eficiencia energética",
+            respuesta_numero=i * 1.5,
+            opciones_seleccionadas=["iluminacion", "motores", {"otro": "calderas", "detalle": [i, i + 1]}],
+            opcion_seleccionada=None, ip_address="10.0.0.1", user_agent="Mozilla/5.0",
+            created_at=base + timedelta(seconds=i), updated_at=base + timedelta(seconds=i),
+            pregunta=pregunta,
+        ))
+    return filas
+
+
+def _medir(funcion, repeticiones: int) -> float:
+    funcion()
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tiempos)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark de serialización JSON de respuestas")
+    parser.add_argument("--filas", type=int, default=1000)
+    parser.add_argument("--repeticiones", type=int, default=20)
+    args = parser.parse_args()
+
+    filas = _filas_orm(args.filas)
+    dicts = [fila_a_dict(f, relaciones=("pregunta",)) for f in filas]
+
+    casos = [
+        ("dicts: jsonable_encoder + json.dumps",
+         lambda: JSONResponse(jsonable_encoder({"respuestas": dicts})).body),
+        ("dicts: RespuestaJSON (orjson)",
+         lambda: RespuestaJSON({"respuestas": dicts}).body),
+        ("ORM: jsonable_encoder + json.dumps",
+         lambda: JSONResponse(jsonable_encoder({"respuestas": filas})).body),
+        ("ORM: fila_a_dict + RespuestaJSON",
+         lambda: RespuestaJSON({"respuestas": [fila_a_dict(f, relaciones=("pregunta",)) for f in filas]}).body),
+    ]
+
+    print(f"{args.filas} filas, mediana de {args.repeticiones} repeticiones")
+    resultados = {}
+    for nombre, funcion in casos:
+        resultados[nombre] = _medir(funcion, args.repeticiones)
+        print(f"  {nombre:<40} {resultados[nombre]:9.2f} ms")
+
+    for origen in ("dicts", "ORM"):
+        lento, rapido = [v for k, v in resultados.items() if k.startswith(origen)]
+        print(f"  aceleración {origen}: x{lento / rapido:.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Paso explícito de creación/actualización del esquema de la base de datos.
+La API ya no crea tablas al importarse: este script se ejecuta una vez por
+despliegue (fase release) o al preparar un entorno local, antes de levantar
+los workers.
+
+Por defecto aplica las migraciones de Alembic (`alembic upgrade head`). Las
+bases creadas por el antiguo `create_all` al importar la app tienen las tablas
+pero no la fila de alembic_version: antes de migrar se marcan (una sola vez) con
+la revisión base, equivalente a `alembic stamp 001_initial_clean`, para que la
+migración inicial no intente crear tablas que ya existen. Con --metadata crea
+las tablas que falten directamente desde los modelos, útil para una base SQLite
+local desechable.
+
+Uso:
+    python scripts/crear_esquema.py
+    python scripts/crear_esquema.py --metadata
+"""
+
+import argparse
+import logging
+import os
+import sys
+
+# Agregar el directorio padre al path para importar la aplicación
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+logger = logging.getLogger("crear_esquema")
+
+# Revisión que corresponde al esquema que creaba create_all antes de las migraciones
+REVISION_BASE = "001_initial_clean"
+# Tabla presente en toda base creada por create_all
+TABLA_TESTIGO = "users"
+
+
+def esquema_sin_versionar(engine) -> bool:
+    """Hay tablas de la aplicación pero Alembic no tiene revisión registrada"""
+    from alembic.runtime.migration import MigrationContext
+    from sqlalchemy import inspect
+
+    with engine.connect() as conexion:
+        if not inspect(conexion).has_table(TABLA_TESTIGO):
+            return False
+        return MigrationContext.configure(conexion).get_current_revision() is None
+
+
+def aplicar_migraciones() -> None:
+    from alembic import command
+    from alembic.config import Config
+    from app.database import engine
+
+    config = Config(os.path.join(parent_dir, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(parent_dir, "alembic"))
+    if esquema_sin_versionar(engine):
+        logger.warning(
+            f"Esquema existente sin alembic_version (creado con create_all): "
+            f"se marca con la revisión {REVISION_BASE} antes de migrar"
+        )
+        command.stamp(config, REVISION_BASE)
+    command.upgrade(config, "head")
+
+
+def crear_desde_modelos() -> None:
+    from app import models
+    from app.database import engine
+
+    models.Base.metadata.create_all(bind=engine)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Crear o migrar el esquema de la base de datos")
+    parser.add_argument(
+        "--metadata", action="store_true",
+        help="Crear las tablas desde los modelos (create_all) en lugar de aplicar migraciones"
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    # alembic.ini reconfigura el logger raíz (WARN) al migrar
+    logger.setLevel(logging.INFO)
+
+    try:
+        if args.metadata:
+            logger.info("Creando tablas desde los modelos...")
+            crear_desde_modelos()
+        else:
+            logger.info("Aplicando migraciones (alembic upgrade head)...")
+            aplicar_migraciones()
+    except Exception as e:
+        logger.error(f"Error preparando el esquema: {e}")
+        return 1
+    logger.info("Esquema listo")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Script para recalcular en lote los resultados almacenados de las auditorías
+(agro, básicas y diagnósticos de feria) tras un cambio de factores de emisión,
+costos o benchmarks.
+
+El avance queda registrado en recalculo_checkpoints: si el proceso se interrumpe,
+volver a ejecutarlo con el mismo --trabajo continúa desde el último bloque confirmado.
+
+Uso:
+    python scripts/recalcular_auditorias.py --trabajo factores-2026-10
+    python scripts/recalcular_auditorias.py --trabajo factores-2026-10 --tabla feria --procesos 4
+"""
+
+import argparse
+import logging
+import os
+import sys
+from multiprocessing import Pool
+
+# Agregar el directorio padre al path para importar la aplicación
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+from app.database import SessionLocal, engine
+from app.utils import recalculo
+from app.utils.benchmarking import recalcular_sketches
+from app.utils.parametros import recargar_parametros
+
+
+def _inicializar_proceso():
+    # Las conexiones heredadas del proceso padre no se comparten entre procesos
+    engine.dispose(close=False)
+
+
+def _procesar_rango(args):
+    trabajo, tabla, desde, hasta, tamano_bloque = args
+    db = SessionLocal()
+    try:
+        recargar_parametros(db, forzar=True)
+        return recalculo.recalcular_tabla(db, trabajo, tabla, desde, hasta, tamano_bloque)
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recálculo masivo de resultados de auditorías")
+    parser.add_argument("--trabajo", required=True, help="Nombre del trabajo (clave de reanudación)")
+    parser.add_argument("--tabla", default="todas", choices=list(recalculo.TABLAS) + ["todas"])
+    parser.add_argument("--procesos", type=int, default=1, help="Procesos en paralelo por tabla")
+    parser.add_argument("--bloque", type=int, default=recalculo.TAMANO_BLOQUE, help="Filas por bloque")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    tablas = list(recalculo.TABLAS) if args.tabla == "todas" else [args.tabla]
+
+    db = SessionLocal()
+    try:
+        tareas = [
+            (args.trabajo, tabla, desde, hasta, args.bloque)
+            for tabla in tablas
+            for desde, hasta in recalculo.dividir_rangos(db, tabla, args.procesos)
+        ]
+    finally:
+        db.close()
+
+    if args.procesos > 1:
+        engine.dispose()
+        with Pool(args.procesos, initializer=_inicializar_proceso) as pool:
+            resultados = pool.map(_procesar_rango, tareas)
+    else:
+        resultados = [_procesar_rango(tarea) for tarea in tareas]
+
+    for r in resultados:
+        print(f"✅ {r['tabla']} [{r['desde']}, {r['hasta']}): {r['procesados']} filas ({r['estado']})")
+
+    # Los percentiles dependen de los valores recalculados
+    db = SessionLocal()
+    try:
+        recalcular_sketches(db)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
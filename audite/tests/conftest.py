@@ -0,0 +1,131 @@
+"""
+Fixtures comunes de los tests.
+Por defecto la app corre contra SQLite en memoria; TEST_DATABASE_URL permite
+apuntar a un PostgreSQL local (se crean y eliminan las tablas en cada sesión).
+"""
+
+import copy
+import os
+import uuid
+
+os.environ["DATABASE_URL"] = os.getenv("TEST_DATABASE_URL", "sqlite://")
+os.environ.setdefault("ENVIRONMENT", "test")
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import models
+from app.database import SessionLocal, engine
+from app.main import app
+from app.utils.catalogo_formularios import recargar_catalogo
+from app.utils.instrumentacion import contar_sentencias
+
+# Filas sembradas por colección: suficientes para que un N+1 supere cualquier presupuesto
+FILAS = 5
+
+DIAGNOSTICO_FERIA = {
+    "contactInfo": {"ubicacion": "Santiago", "cargo": "Gerente", "nombre_completo": "Ana Pérez"},
+    "background": {"hasPreviousAudits": False, "mainInterest": "costos"},
+    "production": {"productType": "frutas", "exportProducts": False, "processesOfInterest": []},
+    "equipment": {"mostIntensiveEquipment": "Sistemas de iluminación", "energyConsumption": 10000},
+    "renewable": {"interestedInRenewable": True, "electricTariff": "BT1", "penaltiesReceived": True, "penaltyCount": 2},
+    "volume": {
+        "annualProduction": 100, "productionUnit": "t",
+        "energyCosts": {"electricity": 0.1, "fuel": 1}, "energyCostPercentage": 20
+    },
+    "metadata": {"browser": "pytest", "deviceType": "desktop"},
+}
+
+
+@pytest.fixture(scope="session")
+def client():
+    models.Base.metadata.create_all(bind=engine)
+    # Sin `with`: no se lanzan las tareas periódicas de startup
+    yield TestClient(app)
+    models.Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def db(client):
+    sesion = SessionLocal()
+    try:
+        yield sesion
+    finally:
+        sesion.close()
+
+
+@pytest.fixture
+def sentencias():
+    """`with sentencias() as conteo:` cuenta el SQL ejecutado en el bloque"""
+    return lambda: contar_sentencias(engine)
+
+
+@pytest.fixture(scope="session")
+def datos(client):
+    """Datos de ejemplo compartidos por los tests de solo lectura"""
+    db = SessionLocal()
+    try:
+        ids = {}
+
+        preguntas = []
+        for i in range(FILAS):
+            pregunta = models.AutodiagnosticoPregunta(
+                numero_orden=i + 1, pregunta=f"Pregunta {i}", tipo_respuesta="seleccion_unica"
+            )
+            pregunta.opciones = [
+                models.AutodiagnosticoOpcion(
+                    texto_opcion=f"Opción {j}", valor=f"v{j}", orden=j,
+                    tiene_sugerencia=True, sugerencia=f"Sugerencia {i}-{j}"
+                )
+                for j in range(3)
+            ]
+            preguntas.append(pregunta)
+        db.add_all(preguntas)
+        db.flush()
+        ids["autodiagnostico_sesion"] = str(uuid.uuid4())
+        db.add_all([
+            models.AutodiagnosticoRespuesta(
+                id=str(uuid.uuid4()), session_id=ids["autodiagnostico_sesion"],
+                pregunta_id=pregunta.id, opcion_seleccionada="v1"
+            )
+            for pregunta in preguntas
+        ])
+
+        categoria = models.CategoriaIndustria(nombre="Industrial", orden=1)
+        db.add(categoria)
+        db.flush()
+        formulario = models.FormularioIndustria(categoria_id=categoria.id, nombre="Diagnóstico", tiempo_estimado=10)
+        db.add(formulario)
+        db.flush()
+        preguntas_formulario = [
+            models.PreguntaFormulario(
+                formulario_id=formulario.id, texto=f"Pregunta {i}", tipo="radio",
+                opciones=[{"valor": "si", "texto": "Sí"}, {"valor": "no", "texto": "No"}], orden=i
+            )
+            for i in range(FILAS)
+        ]
+        db.add_all(preguntas_formulario)
+        db.flush()
+        ids["categoria"] = categoria.id
+        ids["formulario"] = formulario.id
+        ids["formulario_sesion"] = str(uuid.uuid4())
+        db.add_all([
+            models.RespuestaFormulario(
+                session_id=ids["formulario_sesion"], pregunta_id=pregunta.id, valor_respuesta="si"
+            )
+            for pregunta in preguntas_formulario
+        ])
+
+        db.commit()
+        # Estado estable de un worker ya calentado
+        recargar_catalogo(db, forzar=True)
+        return ids
+    finally:
+        db.close()
+
+
+@pytest.fixture
+def diagnostico_feria():
+    """Cuerpo válido de POST /api/diagnosticos-feria/"""
+    return copy.deepcopy(DIAGNOSTICO_FERIA)
@@ -0,0 +1,108 @@
+"""
+Las operaciones administrativas que recorren tablas completas o cambian el estado
+de otros usuarios exigen el token de administrador; un token de usuario no basta.
+"""
+
+import uuid
+
+import pytest
+
+from app import models
+from app.routers import admin_sistema
+from app.routers.admin_auth import ADMIN_CREDENTIALS, create_access_token
+from app.routers.auth import create_user_token
+from app.utils import recalculo
+
+
+@pytest.fixture
+def usuario(db):
+    usuario = models.User(email=f"{uuid.uuid4().hex}@example.com", hashed_password="x")
+    db.add(usuario)
+    db.commit()
+    return usuario
+
+
+@pytest.fixture
+def cabeceras_usuario(usuario):
+    return {"Authorization": f"Bearer {create_user_token(usuario)}"}
+
+
+@pytest.fixture
+def cabeceras_admin():
+    token = create_access_token({"sub": ADMIN_CREDENTIALS["username"]})
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_recalculo_percentiles_exige_admin(client, cabeceras_usuario, monkeypatch):
+    llamadas = []
+    monkeypatch.setattr(admin_sistema, "_ejecutar_recalculo_sketches", lambda: llamadas.append(1))
+
+    respuesta = client.post("/api/admin/sistema/benchmarks/percentiles/recalcular", headers=cabeceras_usuario)
+    assert respuesta.status_code in (401, 403)
+    assert llamadas == []
+
+
+def test_recalculo_percentiles_en_segundo_plano(client, cabeceras_admin, monkeypatch):
+    llamadas = []
+    monkeypatch.setattr(admin_sistema, "_ejecutar_recalculo_sketches", lambda: llamadas.append(1))
+
+    respuesta = client.post("/api/admin/sistema/benchmarks/percentiles/recalcular", headers=cabeceras_admin)
+    assert respuesta.status_code == 202
+    # TestClient ejecuta las BackgroundTasks antes de devolver la respuesta
+    assert llamadas == [1]
+
+
+@pytest.fixture
+def sin_recalculos(db):
+    db.query(models.RecalculoCheckpoint).delete()
+    db.commit()
+    yield
+    db.query(models.RecalculoCheckpoint).delete()
+    db.commit()
+
+
+def test_recalculo_exige_admin(client, cabeceras_usuario, sin_recalculos):
+    assert client.post("/api/admin/sistema/recalculo/todas", headers=cabeceras_usuario).status_code in (401, 403)
+    assert client.get("/api/admin/sistema/recalculo/estado", headers=cabeceras_usuario).status_code in (401, 403)
+
+
+def test_recalculo_rechaza_lanzamiento_concurrente(client, cabeceras_admin, sin_recalculos, monkeypatch):
+    monkeypatch.setattr(admin_sistema, "_ejecutar_recalculo", lambda trabajo, tablas: None)
+
+    respuesta = client.post("/api/admin/sistema/recalculo/agro?trabajo=primero", headers=cabeceras_admin)
+    assert respuesta.status_code == 202
+    # El trabajo queda reservado aunque la tarea de fondo aún no haya avanzado
+    respuesta = client.post("/api/admin/sistema/recalculo/todas?trabajo=segundo", headers=cabeceras_admin)
+    assert respuesta.status_code == 409
+
+    # Un trabajo sin avance durante más de RECALCULO_STALE_SECONDS ya no bloquea
+    monkeypatch.setattr(recalculo, "INACTIVIDAD_MAXIMA", -1)
+    respuesta = client.post("/api/admin/sistema/recalculo/todas?trabajo=segundo", headers=cabeceras_admin)
+    assert respuesta.status_code == 202
+
+    estado = client.get("/api/admin/sistema/recalculo/estado?trabajo=segundo", headers=cabeceras_admin).json()
+    assert {c["tabla"] for c in estado} == set(recalculo.TABLAS)
+
+
+def test_desactivar_usuario_exige_admin(client, db, usuario, cabeceras_usuario):
+    otro = models.User(email=f"{uuid.uuid4().hex}@example.com", hashed_password="x")
+    db.add(otro)
+    db.commit()
+
+    for objetivo in (otro.id, usuario.id):
+        respuesta = client.put(f"/api/admin/sistema/usuarios/{objetivo}/desactivar", headers=cabeceras_usuario)
+        assert respuesta.status_code in (401, 403)
+    db.expire_all()
+    assert otro.is_active and usuario.is_active
+
+
+def test_desactivar_usuario_revoca_sus_tokens(client, db, usuario, cabeceras_usuario, cabeceras_admin):
+    # El token queda verificado en caché antes de desactivar
+    assert client.get("/admin/metricas/tokens", headers=cabeceras_usuario).status_code == 200
+
+    respuesta = client.put(f"/api/admin/sistema/usuarios/{usuario.id}/desactivar", headers=cabeceras_admin)
+    assert respuesta.status_code == 200
+    db.expire_all()
+    assert not usuario.is_active
+
+    assert client.get("/admin/metricas/tokens", headers=cabeceras_usuario).status_code == 401
@@ -0,0 +1,166 @@
+"""
+Archivo frío: las sesiones y diagnósticos archivados se siguen leyendo por los
+mismos endpoints, con la misma respuesta que antes de archivarlos.
+"""
+
+import os
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import crud, models
+from app.utils import archivo_frio
+
+ANTIGUA = datetime.utcnow() - timedelta(days=archivo_frio.RETENCION_DIAS + 30)
+
+
+@pytest.fixture
+def directorio(tmp_path, monkeypatch):
+    monkeypatch.setattr(archivo_frio, "DIRECTORIO", str(tmp_path))
+    return tmp_path
+
+
+@pytest.fixture
+def sesion_antigua(db, datos):
+    session_id = str(uuid.uuid4())
+    preguntas = db.query(models.AutodiagnosticoPregunta).order_by(models.AutodiagnosticoPregunta.id).limit(2).all()
+    db.add_all([
+        models.AutodiagnosticoRespuesta(
+            id=str(uuid.uuid4()), session_id=session_id, pregunta_id=p.id, opcion_seleccionada="v1",
+            created_at=ANTIGUA + timedelta(seconds=i), updated_at=ANTIGUA
+        )
+        for i, p in enumerate(preguntas)
+    ])
+    db.add(models.RespuestaFormulario(
+        session_id=session_id, pregunta_id=db.query(models.PreguntaFormulario.id).first()[0],
+        valor_respuesta={"valor": ["si", "no"]}, created_at=ANTIGUA
+    ))
+    db.commit()
+    yield session_id
+    for modelo in (models.AutodiagnosticoRespuesta, models.RespuestaFormulario):
+        db.query(modelo).filter(modelo.session_id == session_id).delete()
+    db.query(models.ArchivoFrio).filter(models.ArchivoFrio.clave == session_id).delete()
+    db.commit()
+
+
+def test_sin_archivo_no_abre_archivos(client, db):
+    # Sin registro en archivo_frio no se importa pyarrow ni se lee el disco
+    assert archivo_frio.leer(db, "autodiagnostico_respuestas", "no-existe") == []
+    assert client.get("/autodiagnostico/sesion/no-existe").status_code == 404
+
+
+def test_sesion_archivada_se_lee_igual(client, db, directorio, sesion_antigua):
+    pytest.importorskip("pyarrow")
+    antes = client.get(f"/autodiagnostico/sesion/{sesion_antigua}").json()
+    formulario_antes = [(r.pregunta_id, r.valor_respuesta) for r in crud.get_respuestas_by_session(db, sesion_antigua)]
+
+    resumen = archivo_frio.archivar(db, ["autodiagnostico_respuestas", "respuestas_formulario"])
+    assert resumen["autodiagnostico_respuestas"] >= 1
+    assert db.query(models.AutodiagnosticoRespuesta)\
+        .filter(models.AutodiagnosticoRespuesta.session_id == sesion_antigua).count() == 0
+    assert list(directorio.glob("autodiagnostico_respuestas/*.parquet"))
+
+    assert client.get(f"/autodiagnostico/sesion/{sesion_antigua}").json() == antes
+    assert [(r.pregunta_id, r.valor_respuesta) for r in crud.get_respuestas_by_session(db, sesion_antigua)] \
+        == formulario_antes
+
+
+def test_diagnostico_feria_archivado(client, db, directorio, diagnostico_feria):
+    pytest.importorskip("pyarrow")
+    creado = client.post("/api/diagnosticos-feria/", json=diagnostico_feria).json()
+    db.query(models.DiagnosticoFeria).filter(models.DiagnosticoFeria.id == creado["id"])\
+        .update({"created_at": ANTIGUA})
+    db.commit()
+    antes = client.get(f"/api/diagnosticos-feria/{creado['id']}").json()
+
+    archivo_frio.archivar(db, ["diagnosticos_feria"])
+    assert db.query(models.DiagnosticoFeria).filter(models.DiagnosticoFeria.id == creado["id"]).first() is None
+
+    por_id = client.get(f"/api/diagnosticos-feria/{creado['id']}").json()
+    por_codigo = client.get(f"/api/diagnosticos-feria/codigo/{creado['accessCode']}").json()
+    assert por_id == antes
+    assert por_codigo == por_id
+    db.query(models.ArchivoFrio).filter(models.ArchivoFrio.clave == creado["id"]).delete()
+    db.commit()
+
+
+def test_sesion_archivada_con_respuestas_nuevas(client, db, directorio, sesion_antigua):
+    pytest.importorskip("pyarrow")
+    archivo_frio.archivar(db, ["autodiagnostico_respuestas"])
+    pregunta = db.query(models.AutodiagnosticoPregunta).order_by(models.AutodiagnosticoPregunta.id.desc()).first()
+    db.add(models.AutodiagnosticoRespuesta(
+        id=str(uuid.uuid4()), session_id=sesion_antigua, pregunta_id=pregunta.id, opcion_seleccionada="v2"
+    ))
+    db.commit()
+
+    # La sesión queda repartida entre el archivo frío y la base: se devuelven ambas partes
+    respuestas = client.get(f"/autodiagnostico/sesion/{sesion_antigua}").json()["respuestas"]
+    assert [r["opcion_seleccionada"] for r in respuestas] == ["v1", "v1", "v2"]
+
+
+def test_filas_que_llegan_durante_el_lote_no_se_borran(db, directorio, sesion_antigua, monkeypatch):
+    pytest.importorskip("pyarrow")
+    corte = datetime.utcnow() - timedelta(days=archivo_frio.RETENCION_DIAS)
+    pregunta_id = db.query(models.PreguntaFormulario.id).first()[0]
+    escribir = archivo_frio._escribir
+
+    def escribir_y_recibir_respuesta(ruta, modelo, filas):
+        # Respuesta insertada después de leer las filas del lote y antes de borrarlas
+        escribir(ruta, modelo, filas)
+        db.add(models.RespuestaFormulario(
+            session_id=sesion_antigua, pregunta_id=pregunta_id, valor_respuesta={"valor": "tarde"}, created_at=ANTIGUA
+        ))
+        db.commit()
+
+    monkeypatch.setattr(archivo_frio, "_escribir", escribir_y_recibir_respuesta)
+    movidas, _ = archivo_frio.archivar_lote(db, "respuestas_formulario", corte)
+    assert movidas >= 1
+    vivas = db.query(models.RespuestaFormulario).filter(models.RespuestaFormulario.session_id == sesion_antigua).all()
+    assert [r.valor_respuesta for r in vivas] == [{"valor": "tarde"}]
+    assert [r.valor_respuesta for r in crud.get_respuestas_by_session(db, sesion_antigua)] \
+        == [{"valor": ["si", "no"]}, {"valor": "tarde"}]
+
+
+def test_sesion_reactivada_no_se_archiva(db, directorio, sesion_antigua, monkeypatch):
+    pytest.importorskip("pyarrow")
+    corte = datetime.utcnow() - timedelta(days=archivo_frio.RETENCION_DIAS)
+    claves_vencidas = archivo_frio._claves_vencidas
+
+    def claves_y_respuesta_nueva(*args, **kwargs):
+        # La sesión recibe una respuesta entre elegir las claves y bloquear sus filas
+        claves = claves_vencidas(*args, **kwargs)
+        pregunta = db.query(models.AutodiagnosticoPregunta).order_by(models.AutodiagnosticoPregunta.id.desc()).first()
+        db.add(models.AutodiagnosticoRespuesta(
+            id=str(uuid.uuid4()), session_id=sesion_antigua, pregunta_id=pregunta.id, opcion_seleccionada="v2"
+        ))
+        db.commit()
+        return claves
+
+    monkeypatch.setattr(archivo_frio, "_claves_vencidas", claves_y_respuesta_nueva)
+    archivo_frio.archivar_lote(db, "autodiagnostico_respuestas", corte)
+    assert db.query(models.AutodiagnosticoRespuesta)\
+        .filter(models.AutodiagnosticoRespuesta.session_id == sesion_antigua).count() == 3
+    assert not archivo_frio.leer(db, "autodiagnostico_respuestas", sesion_antigua)
+
+
+def test_lote_interrumpido_se_limpia(db, directorio, sesion_antigua):
+    pytest.importorskip("pyarrow")
+    corte = datetime.utcnow() - timedelta(days=archivo_frio.RETENCION_DIAS)
+    original = db.commit
+    db.commit = lambda: (_ for _ in ()).throw(RuntimeError("caída"))
+    try:
+        with pytest.raises(RuntimeError):
+            archivo_frio.archivar_lote(db, "autodiagnostico_respuestas", corte)
+    finally:
+        db.commit = original
+    # El archivo del lote fallido se borra y las filas siguen en la base
+    assert not list(directorio.glob("autodiagnostico_respuestas/*.parquet"))
+    assert db.query(models.AutodiagnosticoRespuesta)\
+        .filter(models.AutodiagnosticoRespuesta.session_id == sesion_antigua).count() == 2
+
+    # Un archivo escrito sin registrar (proceso caído antes del commit) se elimina al reanudar
+    huerfano = directorio / "autodiagnostico_respuestas" / "huerfano.parquet"
+    huerfano.parent.mkdir(exist_ok=True)
+    huerfano.write_bytes(b"")
+    assert archivo_frio.limpiar_huerfanos(db) == [os.path.join("autodiagnostico_respuestas", "huerfano.parquet")]
@@ -0,0 +1,63 @@
+"""
+Presupuesto de arranque en frío: importar app.main no debe tocar la base de
+datos (sin DDL ni conexiones) y debe terminar dentro de IMPORT_BUDGET_SECONDS.
+Se mide en un proceso nuevo para no depender de los módulos ya importados.
+"""
+
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+
+PRESUPUESTO_SEGUNDOS = float(os.getenv("IMPORT_BUDGET_SECONDS", "5"))
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MEDICION = """
+import json, time
+from sqlalchemy import event
+from sqlalchemy.pool import Pool
+
+conexiones = []
+event.listen(Pool, "connect", lambda *a: conexiones.append(1))
+inicio = time.perf_counter()
+import app.main
+print(json.dumps({"segundos": time.perf_counter() - inicio, "conexiones": len(conexiones)}))
+"""
+
+
+def test_importar_app_no_conecta_y_cumple_presupuesto(tmp_path):
+    base = tmp_path / "arranque.db"
+    entorno = {**os.environ, "DATABASE_URL": f"sqlite:///{base}", "LOG_LEVEL": "WARNING"}
+    resultado = subprocess.run(
+        [sys.executable, "-c", MEDICION], cwd=RAIZ, env=entorno,
+        capture_output=True, text=True, timeout=60
+    )
+    assert resultado.returncode == 0, resultado.stderr
+    medicion = json.loads(resultado.stdout.strip().splitlines()[-1])
+
+    assert medicion["conexiones"] == 0
+    assert not base.exists(), "importar app.main creó la base de datos"
+    assert medicion["segundos"] <= PRESUPUESTO_SEGUNDOS, (
+        f"import app.main tardó {medicion['segundos']:.2f}s (presupuesto {PRESUPUESTO_SEGUNDOS}s)"
+    )
+
+
+def test_esquema_de_create_all_se_marca_y_migra(tmp_path):
+    # Base creada por el antiguo create_all: la revisión inicial sin alembic_version
+    base = tmp_path / "legado.db"
+    entorno = {**os.environ, "DATABASE_URL": f"sqlite:///{base}", "LOG_LEVEL": "WARNING"}
+    alembic = [sys.executable, "-m", "alembic"]
+    subprocess.run(alembic + ["upgrade", "001_initial_clean"], cwd=RAIZ, env=entorno,
+                   capture_output=True, check=True, timeout=60)
+    with sqlite3.connect(base) as conexion:
+        conexion.execute("DROP TABLE alembic_version")
+
+    resultado = subprocess.run(
+        [sys.executable, "scripts/crear_esquema.py"], cwd=RAIZ, env=entorno,
+        capture_output=True, text=True, timeout=120
+    )
+    assert resultado.returncode == 0, resultado.stderr
+    actual = subprocess.run(alembic + ["current"], cwd=RAIZ, env=entorno,
+                            capture_output=True, text=True, check=True, timeout=60)
+    assert "(head)" in actual.stdout
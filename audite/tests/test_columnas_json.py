@@ -0,0 +1,61 @@
+"""
+Columnas generadas de diagnosticos_feria: se calculan desde los JSON al escribir
+y permiten filtrar por índice sin leer ni parsear el JSON.
+"""
+
+import uuid
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app import models
+from app.utils import benchmarking
+from app.utils.tipos_json import campo_json
+
+
+@pytest.fixture
+def diagnostico(db, diagnostico_feria):
+    contacto = {**diagnostico_feria["contactInfo"], "email_contacto": "Ana.Perez@Ejemplo.CL"}
+    fila = models.DiagnosticoFeria(
+        id=str(uuid.uuid4()), access_code=uuid.uuid4().hex[:8], estado="COMPLETADO",
+        contact_info=contacto, production=diagnostico_feria["production"],
+        equipment=diagnostico_feria["equipment"], intensidad_energetica=12.5,
+    )
+    db.add(fila)
+    db.commit()
+    db.refresh(fila)
+    yield fila
+    db.delete(fila)
+    db.commit()
+
+
+def test_columnas_generadas(db, diagnostico):
+    assert diagnostico.tipo_producto == "frutas"
+    assert diagnostico.email_contacto == "ana.perez@ejemplo.cl"
+    assert diagnostico.region == "Santiago"
+    assert diagnostico.consumo_energia == 10000.0
+
+    encontrado = db.query(models.DiagnosticoFeria.id)\
+        .filter(models.DiagnosticoFeria.email_contacto == "ana.perez@ejemplo.cl").scalar()
+    assert encontrado == diagnostico.id
+
+    # Al actualizar el JSON se recalculan
+    diagnostico.production = {**diagnostico.production, "productType": "vino"}
+    db.commit()
+    db.refresh(diagnostico)
+    assert diagnostico.tipo_producto == "vino"
+
+
+def test_sketches_feria_usan_tipo_producto(db, diagnostico):
+    assert ("frutas", 12.5) in list(benchmarking._pares_feria(db))
+
+
+def test_campo_json_por_motor():
+    tabla = models.DiagnosticoFeria.__table__
+    consulta = select(campo_json(tabla.c.production, "productType"))
+    assert "production ->> 'productType'" in str(consulta.compile(dialect=postgresql.dialect()))
+    assert "json_extract(diagnosticos_feria.production, '$.productType')" in str(consulta.compile(dialect=sqlite.dialect()))
+    # Claves distintas no comparten la sentencia compilada en caché
+    otra = select(campo_json(tabla.c.production, "exportProducts"))
+    assert consulta._generate_cache_key() != otra._generate_cache_key()
@@ -0,0 +1,51 @@
+"""
+Probes de liveness y readiness: ninguno hace E/S en la petición; /readyz
+refleja el último resultado de la sonda en segundo plano.
+"""
+
+import pytest
+
+from app import health
+from app.utils import calentamiento
+
+
+@pytest.fixture
+def sonda_nueva(monkeypatch):
+    sonda = health.SondaBaseDatos()
+    monkeypatch.setattr(health, "sonda", sonda)
+    monkeypatch.setattr(calentamiento.estado, "listo", True)
+    return sonda
+
+
+def test_livez_sin_consultas(client, sentencias):
+    with sentencias() as conteo:
+        respuesta = client.get("/livez")
+    assert respuesta.status_code == 200
+    assert conteo.total == 0
+
+
+def test_readyz_usa_resultado_en_cache(client, sentencias, sonda_nueva):
+    assert client.get("/readyz").status_code == 503
+
+    assert sonda_nueva.ejecutar()
+    with sentencias() as conteo:
+        respuesta = client.get("/readyz")
+    assert conteo.total == 0
+    assert respuesta.status_code == 200
+    datos = respuesta.json()
+    assert datos["base_datos"]["ok"] is True
+    assert "clase" in datos["pool"]
+
+
+def test_readyz_no_listo_si_la_sonda_es_vieja(client, sonda_nueva, monkeypatch):
+    sonda_nueva.ejecutar()
+    monkeypatch.setattr(health, "ANTIGUEDAD_MAXIMA", -1)
+    respuesta = client.get("/readyz")
+    assert respuesta.status_code == 503
+    assert respuesta.json()["status"] == "database_unavailable"
+
+
+def test_readyz_no_listo_durante_calentamiento(client, sonda_nueva, monkeypatch):
+    sonda_nueva.ejecutar()
+    monkeypatch.setattr(calentamiento.estado, "listo", False)
+    assert client.get("/readyz").json()["status"] == "warming_up"
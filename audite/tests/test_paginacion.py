@@ -0,0 +1,81 @@
+"""
+Paginación por cursor: recorrer las páginas devuelve todas las filas una sola
+vez, en orden (created_at, id), aunque varias compartan created_at.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import text
+
+from app import models
+from app.utils.paginacion import CursorInvalido, paginar, total_tabla
+
+FILAS = 7
+
+
+@pytest.fixture
+def sectores(db):
+    base = datetime(2026, 1, 1)
+    filas = [
+        # Pares con el mismo created_at: el id desempata
+        models.SectorIndustrial(nombre=f"paginacion-{i}", created_at=base + timedelta(minutes=i // 2))
+        for i in range(FILAS)
+    ]
+    db.add_all(filas)
+    db.commit()
+    ids = [f.id for f in filas]
+    yield ids
+    db.query(models.SectorIndustrial).filter(models.SectorIndustrial.id.in_(ids)).delete()
+    db.commit()
+
+
+def _recorrer(db, limite, descendente=False):
+    query = db.query(models.SectorIndustrial).filter(models.SectorIndustrial.nombre.like("paginacion-%"))
+    vistos, cursor = [], None
+    while True:
+        pagina = paginar(query, models.SectorIndustrial, limite, cursor, descendente=descendente)
+        vistos += [f.id for f in pagina.filas]
+        if not pagina.siguiente:
+            return vistos
+        cursor = pagina.siguiente
+
+
+@pytest.mark.parametrize("limite", [1, 3, FILAS, FILAS + 1])
+def test_recorrido_completo(db, sectores, limite):
+    assert _recorrer(db, limite) == sectores
+    assert _recorrer(db, limite, descendente=True) == sectores[::-1]
+
+
+def test_filas_insertadas_sin_created_at(db):
+    # Carga SQL fuera del ORM: el default de la base evita cursores (NULL, id) que cortan el recorrido
+    for i in range(5):
+        db.execute(text("INSERT INTO sectores_industriales (nombre) VALUES (:nombre)"), {"nombre": f"paginacion-sql-{i}"})
+    db.commit()
+    try:
+        assert len(_recorrer(db, 2)) == 5
+    finally:
+        db.query(models.SectorIndustrial).filter(models.SectorIndustrial.nombre.like("paginacion-sql-%")).delete()
+        db.commit()
+
+
+def test_pagina_profunda_en_una_consulta(db, sectores, sentencias):
+    query = db.query(models.SectorIndustrial).filter(models.SectorIndustrial.nombre.like("paginacion-%"))
+    cursor = paginar(query, models.SectorIndustrial, FILAS - 2).siguiente
+    with sentencias() as conteo:
+        pagina = paginar(query, models.SectorIndustrial, 2, cursor)
+    assert [f.id for f in pagina.filas] == sectores[-2:]
+    assert conteo.total == 1
+
+
+def test_cursor_invalido(client, db):
+    with pytest.raises(CursorInvalido):
+        paginar(db.query(models.SectorIndustrial), models.SectorIndustrial, 5, "no-es-un-cursor")
+    respuesta = client.get("/auditoria-basica/", params={"cursor": "no-es-un-cursor"})
+    assert respuesta.status_code == 400
+
+
+def test_total_exacto_fuera_de_postgresql(db, sectores):
+    total, aproximado = total_tabla(db, models.SectorIndustrial)
+    if db.get_bind().dialect.name != "postgresql":
+        assert (total, aproximado) == (FILAS, False)
@@ -0,0 +1,27 @@
+"""
+Particiones mensuales de las tablas de respuestas: nombres y aritmética de meses.
+La mantención misma requiere PostgreSQL; en SQLite no hace nada.
+"""
+
+from datetime import date
+
+from app.utils import particiones
+
+
+def test_aritmetica_de_meses():
+    assert particiones.inicio_mes(date(2026, 10, 19)) == date(2026, 10, 1)
+    assert particiones.sumar_meses(date(2026, 11, 1), 2) == date(2027, 1, 1)
+    assert particiones.sumar_meses(date(2026, 1, 1), -1) == date(2025, 12, 1)
+    assert particiones.sumar_meses(date(2026, 3, 1), -27) == date(2023, 12, 1)
+
+
+def test_nombre_y_mes_de_particion():
+    nombre = particiones.nombre_particion("respuestas_formulario", date(2026, 2, 1))
+    assert nombre == "respuestas_formulario_p202602"
+    assert particiones.mes_de_particion(nombre) == date(2026, 2, 1)
+    assert particiones.mes_de_particion("respuestas_formulario_default") is None
+
+
+def test_mantencion_sin_postgresql(db):
+    assert particiones.mantener_particiones(db) == {}
+    assert not particiones.esta_particionada(db, "respuestas_formulario")
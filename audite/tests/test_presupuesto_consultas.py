@@ -0,0 +1,101 @@
+"""
+Presupuestos de sentencias SQL por endpoint público.
+Cada colección sembrada tiene varias filas (conftest.FILAS), así que un N+1
+introducido en cualquiera de estas rutas supera su presupuesto y falla aquí.
+Si un cambio necesita más consultas a propósito, se sube el presupuesto en
+el mismo commit, explicando por qué.
+"""
+
+import pytest
+
+PRESUPUESTOS_GET = [
+    # Autodiagnóstico (las sesiones incluyen la búsqueda en archivo_frio, por índice)
+    ("/autodiagnostico/preguntas", 2),
+    ("/autodiagnostico/sesion/{autodiagnostico_sesion}", 5),
+    ("/autodiagnostico/sugerencias/{autodiagnostico_sesion}", 4),
+    ("/autodiagnostico/sesion/{autodiagnostico_sesion}/completa", 4),
+    # Formularios por industria (catálogo en memoria; sesiones con archivo_frio)
+    ("/api/categorias-industria", 0),
+    ("/api/formularios/{categoria}", 0),
+    ("/api/formulario/{formulario}/preguntas", 0),
+    ("/api/formulario/sugerencias/{formulario_sesion}", 6),
+    ("/api/formulario/sesion/{formulario_sesion}", 6),
+    # Catálogos agro
+    ("/agro-data/industry-types", 1),
+    ("/agro-data/equipment", 1),
+    ("/agro-data/processes", 1),
+    ("/agro-data/equipment-categories", 1),
+    ("/agro-data/etapa-subsector", 1),
+    # Health check servido desde la sonda en segundo plano
+    ("/health", 0),
+]
+
+def verificar_presupuesto(conteo, presupuesto, ruta):
+    assert conteo.total <= presupuesto, (
+        f"{ruta} ejecutó {conteo.total} sentencias (presupuesto {presupuesto}):\n{conteo.detalle()}"
+    )
+
+
+@pytest.mark.parametrize("ruta,presupuesto", PRESUPUESTOS_GET)
+def test_presupuesto_get(client, datos, sentencias, ruta, presupuesto):
+    ruta = ruta.format(**datos)
+    with sentencias() as conteo:
+        respuesta = client.get(ruta)
+    assert respuesta.status_code == 200, respuesta.text
+    verificar_presupuesto(conteo, presupuesto, ruta)
+
+
+def test_presupuesto_responder_autodiagnostico(client, datos, sentencias, db):
+    from app import models
+    preguntas = [fila.id for fila in db.query(models.AutodiagnosticoPregunta.id)]
+    cuerpo = {"respuestas": [
+        {"session_id": "presupuesto", "pregunta_id": pregunta_id, "opcion_seleccionada": "v0"}
+        for pregunta_id in preguntas
+    ]}
+    with sentencias() as conteo:
+        respuesta = client.post("/autodiagnostico/responder", json=cuerpo)
+    assert respuesta.status_code == 200, respuesta.text
+    # Validación de preguntas + inserción en lote, sin importar cuántas respuestas haya
+    verificar_presupuesto(conteo, 2, "POST /autodiagnostico/responder")
+
+
+def test_presupuesto_diagnostico_feria(client, datos, sentencias, diagnostico_feria):
+    with sentencias() as conteo:
+        respuesta = client.post("/api/diagnosticos-feria/", json=diagnostico_feria)
+    assert respuesta.status_code == 200, respuesta.text
+    verificar_presupuesto(conteo, 3, "POST /api/diagnosticos-feria/")
+
+    diagnostico = respuesta.json()
+    for ruta in (
+        f"/api/diagnosticos-feria/{diagnostico['id']}",
+        f"/api/diagnosticos-feria/codigo/{diagnostico['accessCode']}",
+    ):
+        with sentencias() as conteo:
+            respuesta = client.get(ruta)
+        assert respuesta.status_code == 200, respuesta.text
+        verificar_presupuesto(conteo, 1, ruta)
+
+
+def test_contar_sentencias_solo_dentro_del_bloque(client, sentencias):
+    with sentencias() as conteo:
+        client.get("/agro-data/industry-types")
+    total = conteo.total
+    client.get("/agro-data/industry-types")
+    assert total == 1
+    assert conteo.total == total
+
+
+def test_escritura_local_invalida_catalogo(client, datos, sentencias, db):
+    from app import models
+    categoria = db.get(models.CategoriaIndustria, datos["categoria"])
+    categoria.descripcion = "Actualizada"
+    db.commit()
+
+    with sentencias() as conteo:
+        respuesta = client.get("/api/categorias-industria")
+    assert conteo.total > 0
+    assert respuesta.json()["categorias"][0]["descripcion"] == "Actualizada"
+
+    with sentencias() as conteo:
+        client.get("/api/categorias-industria")
+    verificar_presupuesto(conteo, 0, "/api/categorias-industria")
@@ -0,0 +1,55 @@
+"""
+El camino rápido (responder) debe producir el mismo JSON que la validación
+completa con response_model, para diagnósticos completos y recién iniciados.
+"""
+
+import pytest
+
+from app.utils import respuestas_json
+
+BASE = "/api/diagnosticos-feria"
+
+
+@pytest.fixture
+def con_validacion(monkeypatch):
+    def activar(validar: bool):
+        monkeypatch.setattr(respuestas_json, "RESPUESTA_RAPIDA", not validar)
+    return activar
+
+
+def _ambos_caminos(client, con_validacion, metodo, ruta, **kwargs):
+    respuestas = []
+    for validar in (True, False):
+        con_validacion(validar)
+        respuesta = client.request(metodo, ruta, **kwargs)
+        assert respuesta.status_code == 200, respuesta.text
+        respuestas.append(respuesta.json())
+    return respuestas
+
+
+def test_camino_rapido_equivale_a_validacion(client, con_validacion, diagnostico_feria):
+    inicio = client.post(f"{BASE}/iniciar-contacto/", json=diagnostico_feria["contactInfo"]).json()
+    codigo = inicio["accessCode"]
+
+    # Solo contacto: se completan los valores por defecto
+    validada, rapida = _ambos_caminos(client, con_validacion, "GET", f"{BASE}/codigo/{codigo}")
+    assert rapida == validada
+    validada, rapida = _ambos_caminos(client, con_validacion, "GET", f"{BASE}/{inicio['id']}")
+    assert rapida == validada
+
+    cuerpo = {k: v for k, v in diagnostico_feria.items() if k != "contactInfo"}
+    validada, rapida = _ambos_caminos(client, con_validacion, "PUT", f"{BASE}/{codigo}/completar/", json=cuerpo)
+    assert rapida == validada
+
+    for ruta in (f"{BASE}/codigo/{codigo}", f"{BASE}/{inicio['id']}"):
+        validada, rapida = _ambos_caminos(client, con_validacion, "GET", ruta)
+        assert rapida == validada
+
+
+def test_interruptor_por_endpoint(monkeypatch):
+    monkeypatch.setattr(respuestas_json, "RESPUESTA_RAPIDA", True)
+    monkeypatch.setattr(respuestas_json, "ENDPOINTS_VALIDADOS", {"obtener_diagnostico_feria"})
+    assert not respuestas_json.camino_rapido("obtener_diagnostico_feria")
+    assert respuestas_json.camino_rapido("obtener_diagnostico_por_codigo")
+    assert respuestas_json.responder("obtener_diagnostico_feria", {"a": 1}) == {"a": 1}
+    assert respuestas_json.responder("obtener_diagnostico_por_codigo", {"a": 1}).body == b'{"a":1}'
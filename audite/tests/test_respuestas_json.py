@@ -0,0 +1,56 @@
+"""
+RespuestaJSON y fila_a_dict deben producir el mismo JSON que el camino por
+defecto de FastAPI (jsonable_encoder), que es lo que ya consumen los clientes.
+"""
+
+import json
+import uuid
+from datetime import datetime, date, timezone
+from decimal import Decimal
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app import models, schemas
+from app.utils.respuestas_json import RespuestaJSON, fila_a_dict
+
+
+def _json(respuesta):
+    return json.loads(respuesta.body)
+
+
+def _por_defecto(contenido):
+    """Lo que responde FastAPI para un endpoint sin response_model"""
+    return _json(JSONResponse(jsonable_encoder(contenido)))
+
+
+def test_tipos_equivalentes_a_jsonable_encoder():
+    contenido = {
+        "naive": datetime(2026, 1, 2, 3, 4, 5, 678),
+        "utc": datetime(2026, 1, 2, tzinfo=timezone.utc),
+        "fecha": date(2026, 1, 2),
+        "uuid": uuid.UUID("12345678-1234-5678-1234-567812345678"),
+        "decimal_entero": Decimal("10"),
+        "decimal": Decimal("10.25"),
+        "modelo": schemas.DiagnosticoFeriaIniciarContactoResponse(id="a", accessCode="B"),
+        "anidado": [{"texto": "energía", "valores": [1, 2.5, None]}],
+        1: "clave numérica",
+    }
+    assert _json(RespuestaJSON(contenido)) == _por_defecto(contenido)
+
+
+def test_fila_a_dict_equivale_al_encoder_de_filas_orm():
+    creada = datetime(2026, 1, 1, 12, 0, 0)
+    pregunta = models.AutodiagnosticoPregunta(
+        id=1, numero_orden=1, pregunta="¿Consumo?", tipo_respuesta="radio",
+        es_obligatoria=True, es_activa=True, ayuda_texto=None, created_at=creada, updated_at=creada,
+    )
+    fila = models.AutodiagnosticoRespuesta(
+        id="r1", session_id="s1", pregunta_id=1, opciones_seleccionadas=["a", {"otro": "b"}],
+        respuesta_numero=None, respuesta_texto=None, opcion_seleccionada=None,
+        archivo_adjunto=None, ip_address=None, user_agent=None,
+        created_at=creada, updated_at=creada, pregunta=pregunta,
+    )
+    esperado = _por_defecto(fila)
+    obtenido = _json(RespuestaJSON(fila_a_dict(fila, relaciones=("pregunta",))))
+    assert obtenido == esperado